@@ -0,0 +1,104 @@
+"""
+Compare the cost of transforming points with afw.cameraGeom by building a
+geom.Point2D for every point against passing numpy arrays to the array
+interface of the transform's Mapping (which is what CameraUtils does).
+
+For each transformation this script reports the wall time and the number
+of memory blocks (as reported by tracemalloc) that are alive while the
+transformed points are held in memory.
+
+usage: python benchmarkAfwMapping.py [--n_pts N]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+
+import lsst.geom as geom
+from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE, PIXELS
+from lsst.sims.coordUtils import lsst_camera
+from lsst.sims.coordUtils import pupilCoordsFromPixelCoords
+
+
+def point_list_transform(transform, x_in, y_in, checkpoint):
+    point_list = transform.applyForward([geom.Point2D(xx, yy)
+                                         for xx, yy in zip(x_in, y_in)])
+    checkpoint()
+    x_out = np.array([pt.getX() for pt in point_list])
+    y_out = np.array([pt.getY() for pt in point_list])
+    return x_out, y_out
+
+
+def mapping_transform(transform, x_in, y_in, checkpoint):
+    xy_out = transform.getMapping().applyForward(np.array([x_in, y_in]))
+    checkpoint()
+    return xy_out[0], xy_out[1]
+
+
+def run(method, transform, x_in, y_in):
+    """
+    Returns the transformed coordinates, the wall time in seconds and the
+    number of live memory blocks at the point when the transformed points
+    were held in memory.
+    """
+    t_start = time.time()
+    x_out, y_out = method(transform, x_in, y_in, lambda: None)
+    elapsed = time.time() - t_start
+
+    n_blocks = []
+
+    def checkpoint():
+        snapshot = tracemalloc.take_snapshot()
+        n_blocks.append(sum([stat.count for stat in snapshot.statistics('filename')]))
+
+    tracemalloc.start()
+    method(transform, x_in, y_in, checkpoint)
+    tracemalloc.stop()
+
+    return x_out, y_out, elapsed, n_blocks[0]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_pts', type=int, default=1000000)
+    args = parser.parse_args()
+
+    camera = lsst_camera()
+    det = camera['R:2,2 S:1,1']
+    rng = np.random.RandomState(81123)
+
+    x_field = rng.random_sample(args.n_pts)*0.06-0.03
+    y_field = rng.random_sample(args.n_pts)*0.06-0.03
+    x_focal = rng.random_sample(args.n_pts)*300.0-150.0
+    y_focal = rng.random_sample(args.n_pts)*300.0-150.0
+
+    cases = [('FIELD_ANGLE->FOCAL_PLANE',
+              camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE),
+              x_field, y_field),
+             ('FOCAL_PLANE->PIXELS', det.getTransform(FOCAL_PLANE, PIXELS),
+              x_focal, y_focal)]
+
+    print('%d points' % args.n_pts)
+    for label, transform, x_in, y_in in cases:
+        (x_pt, y_pt,
+         t_pt, blocks_pt) = run(point_list_transform, transform, x_in, y_in)
+        (x_map, y_map,
+         t_map, blocks_map) = run(mapping_transform, transform, x_in, y_in)
+
+        # the two interfaces evaluate the same Mapping
+        np.testing.assert_array_equal(x_pt, x_map)
+        np.testing.assert_array_equal(y_pt, y_map)
+
+        print('%s' % label)
+        print('    Point2D list:  %.3f s  %d memory blocks' % (t_pt, blocks_pt))
+        print('    Mapping array: %.3f s  %d memory blocks' % (t_map, blocks_map))
+
+    # the public API, which now uses the Mapping interface wherever it
+    # still needs afw
+    x_pix = rng.random_sample(args.n_pts)*4000.0
+    y_pix = rng.random_sample(args.n_pts)*4000.0
+    names = rng.choice([dd.getName() for dd in camera][:20], size=args.n_pts)
+    t_start = time.time()
+    pupilCoordsFromPixelCoords(x_pix, y_pix, names, camera=camera)
+    print('pupilCoordsFromPixelCoords: %.3f s' % (time.time()-t_start))
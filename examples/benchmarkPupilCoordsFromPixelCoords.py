@@ -0,0 +1,95 @@
+"""
+Time pupilCoordsFromPixelCoords on a large batch of points scattered over
+every detector of the LSST camera (with some points on no detector at all).
+
+Three implementations are compared:
+
+    - the original loop, which called afw's applyForward on a single
+      geom.Point2D twice for every point (timed on a subset of the
+      points and scaled up, since it is far too slow to run on all of them)
+
+    - the afw fallback of pupilCoordsFromPixelCoords, which groups the
+      points by detector and transforms each group with the array
+      interface of the afw Mappings
+
+    - the default path of pupilCoordsFromPixelCoords, which gathers each
+      point's transformation from the CameraGeometrySnapshot of the camera
+      and converts every point in one pass
+
+usage: python benchmarkPupilCoordsFromPixelCoords.py [--n_pts N] [--n_loop N]
+"""
+import argparse
+import time
+import numpy as np
+
+import lsst.geom as geom
+from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE, PIXELS
+from lsst.sims.coordUtils import lsst_camera
+from lsst.sims.coordUtils import pupilCoordsFromPixelCoords
+from lsst.sims.coordUtils import _camera_snapshot
+
+
+def point_by_point(x_pix, y_pix, names, camera):
+    """
+    The original implementation of pupilCoordsFromPixelCoords
+    """
+    focal_to_field = camera.getTransformMap().getTransform(FOCAL_PLANE, FIELD_ANGLE)
+    x_pupil = []
+    y_pupil = []
+    for xx, yy, name in zip(x_pix, y_pix, names):
+        if name is None or name == 'None':
+            x_pupil.append(np.nan)
+            y_pupil.append(np.nan)
+            continue
+        focal_pt = camera[name].getTransform(PIXELS, FOCAL_PLANE).applyForward(geom.Point2D(xx, yy))
+        pupil_pt = focal_to_field.applyForward(focal_pt)
+        x_pupil.append(pupil_pt.getX())
+        y_pupil.append(pupil_pt.getY())
+    return np.array([x_pupil, y_pupil])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n_pts', type=int, default=1000000)
+    parser.add_argument('--n_loop', type=int, default=10000,
+                        help='number of points on which to time the original loop')
+    args = parser.parse_args()
+
+    camera = lsst_camera()
+    rng = np.random.RandomState(71123)
+
+    x_pix = rng.random_sample(args.n_pts)*4000.0
+    y_pix = rng.random_sample(args.n_pts)*4000.0
+    names = rng.choice([det.getName() for det in camera] + ['None'], size=args.n_pts)
+
+    print('%d points on %d detectors' % (args.n_pts, len(np.unique(names))))
+
+    n_loop = min(args.n_loop, args.n_pts)
+    t_start = time.time()
+    loop_result = point_by_point(x_pix[:n_loop], y_pix[:n_loop], names[:n_loop], camera)
+    t_loop = (time.time()-t_start)*args.n_pts/n_loop
+    print('original loop:    %.3f s (scaled up from %d points)' % (t_loop, n_loop))
+
+    # make _camera_snapshot report that camera cannot be represented by a
+    # snapshot so that pupilCoordsFromPixelCoords uses its afw fallback
+    _camera_snapshot(camera)
+    snapshot_entry = _camera_snapshot._cache[id(camera)]
+    _camera_snapshot._cache[id(camera)] = (camera, None)
+    try:
+        t_start = time.time()
+        afw_result = pupilCoordsFromPixelCoords(x_pix, y_pix, names, camera=camera)
+        t_afw = time.time()-t_start
+    finally:
+        _camera_snapshot._cache[id(camera)] = snapshot_entry
+    print('grouped afw:      %.3f s' % t_afw)
+
+    t_start = time.time()
+    snapshot_result = pupilCoordsFromPixelCoords(x_pix, y_pix, names, camera=camera)
+    t_snapshot = time.time()-t_start
+    print('snapshot:         %.3f s' % t_snapshot)
+
+    np.testing.assert_array_equal(afw_result[:, :n_loop], loop_result)
+    np.testing.assert_allclose(snapshot_result, afw_result, atol=1.0e-12, rtol=0.0)
+    print('speed up over the original loop: %.1f (grouped afw) %.1f (snapshot)'
+          % (t_loop/t_afw, t_loop/t_snapshot))
@@ -0,0 +1,22 @@
+import os
+
+
+__all__ = ["getCacheDir"]
+
+
+def getCacheDir():
+    """
+    Return the directory in which sims_coordUtils stores data products
+    (e.g. fitted optical distortion coefficients) that are expensive
+    to regenerate.
+
+    The directory is read from the environment variable
+    SIMS_COORDUTILS_CACHE_DIR.  If that is not set, it defaults to
+    ~/.cache/sims_coordUtils.  The directory is not guaranteed to
+    exist; code writing to it should create it as needed.
+    """
+    cache_dir = os.environ.get('SIMS_COORDUTILS_CACHE_DIR', None)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache',
+                                 'sims_coordUtils')
+    return cache_dir
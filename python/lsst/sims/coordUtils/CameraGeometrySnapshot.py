@@ -0,0 +1,780 @@
+import numpy as np
+import os
+import tempfile
+
+
+__all__ = ["CameraGeometrySnapshot", "RadialFieldTransform", "_apply_afw_transform"]
+
+
+def _as_output(value):
+    """
+    Convert a 0-dimensional numpy array into a numpy scalar so that
+    scalar inputs to the methods below yield scalar outputs.
+    """
+    if value.ndim == 0:
+        return value[()]
+    return value
+
+
+def _apply_afw_transform(transform, x_in, y_in):
+    """
+    Apply an afw Transform to numpy arrays of coordinates.
+
+    This uses the array interface of the Transform's Mapping, which takes
+    and returns (2, N) numpy arrays, rather than Transform.applyForward,
+    which requires a geom.Point2D for each point.
+
+    Returns two numpy arrays of transformed coordinates.
+    """
+    x_in = np.asarray(x_in, dtype=float)
+    y_in = np.asarray(y_in, dtype=float)
+    if len(x_in) == 0:
+        return np.zeros(0, dtype=float), np.zeros(0, dtype=float)
+    xy_out = transform.getMapping().applyForward(np.array([x_in, y_in]))
+    return xy_out[0], xy_out[1]
+
+
+def _apply_affine(coeffs, x_in, y_in):
+    """
+    Apply an affine transformation
+
+    Parameters
+    ----------
+    coeffs -- a numpy array of shape (2, 3) or (N, 2, 3) such that
+    x_out = coeffs[0][0]*x_in + coeffs[0][1]*y_in + coeffs[0][2]
+    y_out = coeffs[1][0]*x_in + coeffs[1][1]*y_in + coeffs[1][2]
+    (if the array is of shape (N, 2, 3), each point gets its own
+    transformation)
+
+    x_in, y_in -- numpy arrays of input coordinates
+
+    Returns
+    -------
+    x_out, y_out -- numpy arrays of output coordinates
+    """
+    coeffs = np.asarray(coeffs)
+    x_out = coeffs[..., 0, 0]*x_in + coeffs[..., 0, 1]*y_in + coeffs[..., 0, 2]
+    y_out = coeffs[..., 1, 0]*x_in + coeffs[..., 1, 1]*y_in + coeffs[..., 1, 2]
+    return x_out, y_out
+
+
+def _gather_affine(table, detector_index, dtype):
+    """
+    Look up the affine transformations of a list of detectors.
+
+    Parameters
+    ----------
+    table -- a numpy array of shape (N_detectors, 2, 3) containing the
+    affine transformation of each detector (see _apply_affine)
+
+    detector_index -- an int or a numpy array of ints indexing table.
+    Negative values denote points that are not on any detector.
+
+    dtype -- the floating point type of the returned coefficients
+
+    Returns
+    -------
+    coeffs -- the numpy array of coefficients that can be passed
+    to _apply_affine
+
+    off_chip -- a boolean numpy array marking the points with negative
+    detector_index (None if there are no such points)
+    """
+    detector_index = np.asarray(detector_index)
+    off_chip = detector_index < 0
+    if off_chip.any():
+        coeffs = table[np.where(off_chip, 0, detector_index)]
+    else:
+        off_chip = None
+        coeffs = table[detector_index]
+    return coeffs.astype(dtype, copy=False), off_chip
+
+
+def _mask_off_chip(value, off_chip):
+    """
+    Set the elements of the numpy array value that are marked by
+    off_chip (see _gather_affine) to NaN.
+    """
+    if off_chip is None:
+        return value
+    return np.where(off_chip, np.nan, value)
+
+
+def _fit_affine(x_in, y_in, x_out, y_out, tolerance):
+    """
+    Fit the affine transformation taking (x_in, y_in) to (x_out, y_out).
+
+    Returns a numpy array of shape (2, 3) that can be passed to
+    _apply_affine.  Raises a RuntimeError if the residuals of the fit
+    exceed tolerance (in which case, the transformation is not affine).
+    """
+    design = np.array([x_in, y_in, np.ones(len(x_in))]).transpose()
+    coeffs = np.linalg.lstsq(design, np.array([x_out, y_out]).transpose(),
+                             rcond=None)[0].transpose()
+
+    x_test, y_test = _apply_affine(coeffs, x_in, y_in)
+    residual = max(np.abs(x_test-x_out).max(), np.abs(y_test-y_out).max())
+    if residual > tolerance:
+        raise RuntimeError("Transformation is not affine; residual %.3e > %.3e" %
+                           (residual, tolerance))
+    return coeffs
+
+
+def _evaluate_polynomial(coeffs, ss):
+    """
+    Evaluate sum(coeffs[ii]*ss**ii) and its derivative with respect to ss
+    using Horner's method.
+    """
+    value = np.zeros_like(ss) + coeffs[-1]
+    deriv = np.zeros_like(ss)
+    for cc in coeffs[-2::-1]:
+        deriv = deriv*ss + value
+        value = value*ss + cc
+    return value, deriv
+
+
+class RadialFieldTransform(object):
+    """
+    A numpy representation of the FIELD_ANGLE<->FOCAL_PLANE transformation
+    of an afw.cameraGeom Camera in which that transformation is radial
+    (as it is for LSST).
+
+    FIELD_ANGLE->FOCAL_PLANE maps a point a distance r from the
+    boresite to the point
+
+        (g(r)/r) * M * (x, y)
+
+    where g(r) is a polynomial in r and M is a constant 2x2 matrix
+    (accounting for any rotation or flip between the two systems).
+    FOCAL_PLANE->FIELD_ANGLE is found by inverting g(r) with Newton's
+    method.
+
+    The polynomial is only fit (and validated against afw) out to a
+    field angle radius of field_radius_max (which from_camera() sets to
+    1.5 times the radius of the corners of the focal plane).  Beyond
+    that, it is an extrapolation.
+    """
+
+    # the (absolute) tolerance in mm to which the model must reproduce afw
+    _mm_tolerance = 1.0e-10
+
+    def __init__(self, coeffs, scale, matrix):
+        """
+        Parameters
+        ----------
+        coeffs -- the polynomial coefficients of g as a function of r/scale
+
+        scale -- the field angle radius (in radians) to which the
+        polynomial was fit
+
+        matrix -- the 2x2 matrix M (see the class docstring)
+
+        Users should not need to call this directly; use from_camera().
+        """
+        self._coeffs = np.array(coeffs, dtype=float)
+        self._scale = float(scale)
+        self._matrix = np.array(matrix, dtype=float)
+        self._inverse_matrix = np.linalg.inv(self._matrix)
+        self._focal_radius_max = float(_evaluate_polynomial(self._coeffs, 1.0)[0])
+
+    @classmethod
+    def from_camera(cls, camera):
+        """
+        Fit the FIELD_ANGLE<->FOCAL_PLANE transformation of an
+        afw.cameraGeom Camera.
+
+        Raises a RuntimeError if the camera's transformation cannot be
+        represented to within 1.0e-10 mm.
+        """
+        from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE
+
+        # fit the transformation out to well beyond
+        # the corners of the focal plane
+        transform_map = camera.getTransformMap()
+        field_to_focal = transform_map.getTransform(FIELD_ANGLE, FOCAL_PLANE)
+        focal_to_field = transform_map.getTransform(FOCAL_PLANE, FIELD_ANGLE)
+        fp_bbox = camera.getFpBBox()
+        x_corner = np.array([fp_bbox.getMinX(), fp_bbox.getMaxX(),
+                             fp_bbox.getMaxX(), fp_bbox.getMinX()])
+        y_corner = np.array([fp_bbox.getMinY(), fp_bbox.getMinY(),
+                             fp_bbox.getMaxY(), fp_bbox.getMaxY()])
+        x_corner, y_corner = _apply_afw_transform(focal_to_field, x_corner, y_corner)
+        r_max = 1.5*np.sqrt(x_corner**2 + y_corner**2).max()
+
+        matrix, coeffs = cls._fit(field_to_focal, r_max)
+        transform = cls(coeffs, r_max, matrix)
+        transform._validate(field_to_focal)
+        return transform
+
+    @classmethod
+    def _fit(cls, field_to_focal, r_max):
+        """
+        Fit the radial model of the FIELD_ANGLE->FOCAL_PLANE
+        transformation.
+
+        Parameters
+        ----------
+        field_to_focal -- the afw Transform from FIELD_ANGLE to FOCAL_PLANE
+
+        r_max -- the maximum field angle radius (in radians) to fit
+
+        Returns
+        -------
+        the 2x2 matrix M and the polynomial coefficients of g(r/r_max)
+        (see the class docstring)
+        """
+        ss = np.linspace(0.0, 1.0, 201)[1:]
+        x_axis = np.array(_apply_afw_transform(field_to_focal, ss*r_max,
+                                               np.zeros(len(ss)))).transpose()
+        y_axis = np.array(_apply_afw_transform(field_to_focal, np.zeros(len(ss)),
+                                               ss*r_max)).transpose()
+
+        # the columns of M are the unit vectors along which the x and y
+        # FIELD_ANGLE axes land on the focal plane
+        matrix = np.zeros((2, 2), dtype=float)
+        matrix[:, 0] = x_axis[-1]/np.sqrt((x_axis[-1]**2).sum())
+        matrix[:, 1] = y_axis[-1]/np.sqrt((y_axis[-1]**2).sum())
+
+        g_values = np.sqrt((x_axis**2).sum(axis=1))
+
+        for degree in range(1, 12):
+            # g(0) = 0, so do not fit the constant term
+            design = np.array([ss**ii for ii in range(1, degree+1)]).transpose()
+            coeffs = np.linalg.lstsq(design, g_values, rcond=None)[0]
+            coeffs = np.append([0.0], coeffs)
+            residual = np.abs(_evaluate_polynomial(coeffs, ss)[0] - g_values).max()
+            if residual < 0.1*cls._mm_tolerance:
+                return matrix, coeffs
+
+        raise RuntimeError("FIELD_ANGLE->FOCAL_PLANE transformation is not a "
+                           "radial polynomial")
+
+    def _validate(self, field_to_focal):
+        """
+        Verify that the radial model reproduces the afw FIELD_ANGLE->FOCAL_PLANE
+        Transform (and that its inverse is, in fact, the inverse of the
+        afw Transform).  Raises a RuntimeError if not.
+        """
+        rng = np.random.RandomState(8812)
+        rr = self._scale*np.sqrt(rng.random_sample(1000))
+        theta = rng.random_sample(1000)*2.0*np.pi
+        x_field = rr*np.cos(theta)
+        y_field = rr*np.sin(theta)
+
+        x_afw, y_afw = _apply_afw_transform(field_to_focal, x_field, y_field)
+
+        x_focal, y_focal = self.focalPlaneFromFieldAngle(x_field, y_field)
+        residual = max(np.abs(x_focal-x_afw).max(), np.abs(y_focal-y_afw).max())
+        if residual > self._mm_tolerance:
+            raise RuntimeError("Radial FIELD_ANGLE->FOCAL_PLANE model differs from afw "
+                               "by %.3e mm" % residual)
+
+        x_inv, y_inv = self.fieldAngleFromFocalPlane(x_afw, y_afw)
+        x_round_trip, y_round_trip = _apply_afw_transform(field_to_focal, x_inv, y_inv)
+        residual = max(np.abs(x_round_trip-x_afw).max(), np.abs(y_round_trip-y_afw).max())
+        if residual > self._mm_tolerance:
+            raise RuntimeError("Radial FOCAL_PLANE->FIELD_ANGLE model fails to invert afw "
+                               "by %.3e mm" % residual)
+
+    @property
+    def coeffs(self):
+        """
+        The polynomial coefficients of g as a function of r/scale
+        """
+        return self._coeffs
+
+    @property
+    def scale(self):
+        """
+        The field angle radius (in radians) by which r is divided
+        before evaluating the polynomial g
+        """
+        return self._scale
+
+    @property
+    def matrix(self):
+        """
+        The 2x2 matrix M (see the class docstring)
+        """
+        return self._matrix
+
+    @property
+    def field_radius_max(self):
+        """
+        The field angle radius (in radians) out to which the
+        transformation was fit
+        """
+        return self._scale
+
+    @property
+    def focal_radius_max(self):
+        """
+        The focal plane radius (in mm) corresponding to field_radius_max
+        """
+        return self._focal_radius_max
+
+    def focalPlaneFromFieldAngle(self, x_field, y_field, dtype=np.float64):
+        """
+        Convert FIELD_ANGLE coordinates (i.e. pupil coordinates in
+        radians) to FOCAL_PLANE coordinates in mm.  Inputs can be
+        either numbers or numpy arrays.  The calculation is done
+        in (and the outputs are of) the floating point type dtype.
+        """
+        x_field = np.asarray(x_field, dtype=dtype)
+        y_field = np.asarray(y_field, dtype=dtype)
+        radial_coeffs = self._coeffs.astype(dtype)
+        radial_scale = x_field.dtype.type(self._scale)
+        radial_matrix = self._matrix.astype(dtype)
+        rr = np.sqrt(x_field**2 + y_field**2)
+        g_value = _evaluate_polynomial(radial_coeffs, rr/radial_scale)[0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.where(rr > 0.0, g_value/rr,
+                             radial_coeffs[1]/radial_scale)
+        x_focal = ratio*(radial_matrix[0][0]*x_field +
+                         radial_matrix[0][1]*y_field)
+        y_focal = ratio*(radial_matrix[1][0]*x_field +
+                         radial_matrix[1][1]*y_field)
+        return _as_output(x_focal), _as_output(y_focal)
+
+    def fieldAngleFromFocalPlane(self, x_focal, y_focal, dtype=np.float64):
+        """
+        Convert FOCAL_PLANE coordinates in mm to FIELD_ANGLE coordinates
+        (i.e. pupil coordinates in radians).  Inputs can be either numbers
+        or numpy arrays.  The outputs are of the floating point type dtype;
+        the Newton's method solution is always done in double precision,
+        since it will not converge in single precision.
+        """
+        x_focal = np.asarray(x_focal, dtype=np.float64)
+        y_focal = np.asarray(y_focal, dtype=np.float64)
+        uu = (self._inverse_matrix[0][0]*x_focal +
+              self._inverse_matrix[0][1]*y_focal)
+        vv = (self._inverse_matrix[1][0]*x_focal +
+              self._inverse_matrix[1][1]*y_focal)
+        g_target = np.sqrt(uu**2 + vv**2)
+
+        # solve g(ss) = g_target with Newton's method,
+        # starting from the linear approximation
+        ss = g_target/self._coeffs[1]
+        with np.errstate(invalid='ignore'):
+            for i_iteration in range(20):
+                g_value, g_deriv = _evaluate_polynomial(self._coeffs, ss)
+                delta = (g_value-g_target)/g_deriv
+                ss = ss - delta
+                if not np.any(np.abs(delta) > 1.0e-15):
+                    break
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.where(g_target > 0.0, ss*self._scale/g_target,
+                             self._scale/self._coeffs[1])
+        return (_as_output((ratio*uu).astype(dtype, copy=False)),
+                _as_output((ratio*vv).astype(dtype, copy=False)))
+
+
+class CameraGeometrySnapshot(object):
+    """
+    A self-contained, numpy-only representation of the parts of an
+    afw.cameraGeom Camera that sims_coordUtils needs: the names, types
+    and bounding boxes of the detectors, the transformations between
+    FOCAL_PLANE and PIXELS/TAN_PIXELS on each detector, and the radial
+    transformation between FIELD_ANGLE and FOCAL_PLANE.
+
+    Snapshots are created from a Camera with from_camera(), which
+    verifies that every transformation is faithfully represented.
+    Once written to disk with write(), a snapshot can be read back
+    with read() without importing afw or instantiating a butler
+    mapper.  The file is an uncompressed numpy .npz archive of a few
+    small arrays, so reading it takes milliseconds.
+
+    Representation
+    --------------
+    FOCAL_PLANE<->PIXELS on each detector is an affine transformation.
+
+    FIELD_ANGLE->TAN_PIXELS on each detector is an affine transformation
+    (TAN_PIXELS are pixel coordinates with the field distortion removed).
+
+    FIELD_ANGLE<->FOCAL_PLANE is a RadialFieldTransform.
+    """
+
+    # increment whenever the contents of the snapshot file change
+    _format_version = 1
+
+    # the (absolute) tolerances in mm, pixels and radians to which
+    # the snapshot must reproduce afw
+    _mm_tolerance = 1.0e-10
+    _pixel_tolerance = 1.0e-8
+    _radian_tolerance = 1.0e-14
+
+    _array_names = ('names', 'detector_types', 'bbox',
+                    'center_focal', 'center_pixel',
+                    'focal_to_pixels', 'pixels_to_focal',
+                    'field_to_tan_pixels', 'tan_pixels_to_field',
+                    'radial_coeffs', 'radial_scale', 'radial_matrix',
+                    'fp_bbox')
+
+    def __init__(self, data):
+        """
+        Parameters
+        ----------
+        data -- a dict (or an open .npz file) containing numpy arrays
+        keyed on the contents of self._array_names.  Users should not
+        need to call this directly; use from_camera() or read().
+        """
+        for name in self._array_names:
+            setattr(self, '_%s' % name, np.array(data[name]))
+
+        self._radial_scale = float(self._radial_scale)
+        self._radial = RadialFieldTransform(self._radial_coeffs, self._radial_scale,
+                                            self._radial_matrix)
+        self._name_to_index = dict((name, ii) for ii, name in enumerate(self._names))
+
+    @classmethod
+    def from_camera(cls, camera):
+        """
+        Create a snapshot of an afw.cameraGeom Camera.
+
+        Raises a RuntimeError if the camera's transformations cannot be
+        represented by the snapshot to within the class' tolerances.
+        """
+        # afw is only needed to build a snapshot, not to use one
+        from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE, PIXELS, TAN_PIXELS
+        from lsst.afw.cameraGeom import SCIENCE, FOCUS, GUIDER, WAVEFRONT
+
+        type_names = {SCIENCE: 'SCIENCE', FOCUS: 'FOCUS',
+                      GUIDER: 'GUIDER', WAVEFRONT: 'WAVEFRONT'}
+
+        data = {}
+        names = []
+        detector_types = []
+        bbox = []
+        center_focal = []
+        center_pixel = []
+        focal_to_pixels = []
+        pixels_to_focal = []
+        field_to_tan_pixels = []
+        tan_pixels_to_field = []
+
+        for det in camera:
+            names.append(det.getName())
+            detector_types.append(type_names[det.getType()])
+            det_bbox = det.getBBox()
+            bbox.append([det_bbox.getMinX(), det_bbox.getMinY(),
+                         det_bbox.getMaxX(), det_bbox.getMaxY()])
+
+            center_pt = det.getCenter(FOCAL_PLANE)
+            center_focal.append([center_pt.getX(), center_pt.getY()])
+            center_pix = det.getTransform(FOCAL_PLANE, PIXELS).applyForward(center_pt)
+            center_pixel.append([center_pix.getX(), center_pix.getY()])
+
+            # sample the detector on a grid of pixel positions
+            x_grid, y_grid = np.meshgrid(np.linspace(det_bbox.getMinX()-0.5,
+                                                     det_bbox.getMaxX()+0.5, 5),
+                                         np.linspace(det_bbox.getMinY()-0.5,
+                                                     det_bbox.getMaxY()+0.5, 5))
+            x_pix = x_grid.flatten()
+            y_pix = y_grid.flatten()
+
+            x_focal, y_focal = _apply_afw_transform(det.getTransform(PIXELS, FOCAL_PLANE),
+                                                    x_pix, y_pix)
+            x_field, y_field = _apply_afw_transform(det.getTransform(PIXELS, FIELD_ANGLE),
+                                                    x_pix, y_pix)
+            x_tan, y_tan = _apply_afw_transform(det.getTransform(PIXELS, TAN_PIXELS),
+                                                x_pix, y_pix)
+
+            pixels_to_focal.append(_fit_affine(x_pix, y_pix, x_focal, y_focal,
+                                               cls._mm_tolerance))
+            focal_to_pixels.append(_fit_affine(x_focal, y_focal, x_pix, y_pix,
+                                               cls._pixel_tolerance))
+            field_to_tan_pixels.append(_fit_affine(x_field, y_field, x_tan, y_tan,
+                                                   cls._pixel_tolerance))
+            tan_pixels_to_field.append(_fit_affine(x_tan, y_tan, x_field, y_field,
+                                                   cls._radian_tolerance))
+
+        data['names'] = np.array(names)
+        data['detector_types'] = np.array(detector_types)
+        data['bbox'] = np.array(bbox, dtype=int)
+        data['center_focal'] = np.array(center_focal)
+        data['center_pixel'] = np.array(center_pixel)
+        data['focal_to_pixels'] = np.array(focal_to_pixels)
+        data['pixels_to_focal'] = np.array(pixels_to_focal)
+        data['field_to_tan_pixels'] = np.array(field_to_tan_pixels)
+        data['tan_pixels_to_field'] = np.array(tan_pixels_to_field)
+
+        fp_bbox = camera.getFpBBox()
+        data['fp_bbox'] = np.array([fp_bbox.getMinX(), fp_bbox.getMinY(),
+                                    fp_bbox.getMaxX(), fp_bbox.getMaxY()])
+
+        radial = RadialFieldTransform.from_camera(camera)
+        data['radial_coeffs'] = radial.coeffs
+        data['radial_scale'] = radial.scale
+        data['radial_matrix'] = radial.matrix
+
+        return cls(data)
+
+    @classmethod
+    def read(cls, file_name):
+        """
+        Read a snapshot from the file written by write()
+        """
+        with np.load(file_name) as data:
+            if int(data['format_version']) != cls._format_version:
+                raise RuntimeError("%s is a version %d CameraGeometrySnapshot; "
+                                   "expected version %d" %
+                                   (file_name, int(data['format_version']),
+                                    cls._format_version))
+            return cls(data)
+
+    def write(self, file_name):
+        """
+        Write the snapshot to file_name (a numpy .npz archive).
+
+        The file is written to a temporary file in the same directory and
+        then moved into place, so that processes simultaneously reading
+        file_name never see a partially-written file.
+        """
+        data = {}
+        data['format_version'] = self._format_version
+        for name in self._array_names:
+            data[name] = getattr(self, '_%s' % name)
+
+        dir_name = os.path.dirname(os.path.abspath(file_name))
+        file_handle, temp_name = tempfile.mkstemp(dir=dir_name, suffix='.npz')
+        try:
+            with os.fdopen(file_handle, 'wb') as file_obj:
+                np.savez(file_obj, **data)
+            os.replace(temp_name, file_name)
+        except:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
+
+    @property
+    def names(self):
+        """
+        A numpy array of the names of the detectors.  The index of a
+        detector in this array is used to refer to that detector
+        in the methods below.
+        """
+        return self._names
+
+    @property
+    def detector_types(self):
+        """
+        A numpy array of the detector types ('SCIENCE', 'FOCUS',
+        'GUIDER' or 'WAVEFRONT')
+        """
+        return self._detector_types
+
+    @property
+    def bbox(self):
+        """
+        A numpy array of shape (N_detectors, 4) containing the
+        (xmin, ymin, xmax, ymax) integer pixel bounds of each detector
+        in the DM convention.
+        """
+        return self._bbox
+
+    @property
+    def center_focal(self):
+        """
+        A numpy array of shape (N_detectors, 2) containing the focal
+        plane coordinates (in mm) of the center of each detector
+        """
+        return self._center_focal
+
+    @property
+    def center_pixel(self):
+        """
+        A numpy array of shape (N_detectors, 2) containing the DM pixel
+        coordinates of the center of each detector
+        """
+        return self._center_pixel
+
+    @property
+    def focal_to_pixels(self):
+        """
+        A numpy array of shape (N_detectors, 2, 3) containing the affine
+        transformation from FOCAL_PLANE to PIXELS of each detector, such that
+        x_pix = focal_to_pixels[ii][0][0]*x_focal + focal_to_pixels[ii][0][1]*y_focal
+                + focal_to_pixels[ii][0][2]
+        (and likewise for y_pix with focal_to_pixels[ii][1])
+        """
+        return self._focal_to_pixels
+
+    @property
+    def fp_bbox(self):
+        """
+        The (xmin, ymin, xmax, ymax) bounds of the focal plane in mm
+        """
+        return self._fp_bbox
+
+    def getIndex(self, detector_name):
+        """
+        Return the index of the detector named detector_name
+        """
+        return self._name_to_index[detector_name]
+
+    def getIndices(self, detector_names):
+        """
+        Return a numpy array of the indices of the detectors named in
+        detector_names (a list or numpy array).  Points whose name is
+        None or 'None' (i.e. that are not on any detector) get -1.
+
+        The dict lookup is only done once for each distinct name,
+        so this is fast even for very long lists of names.
+        """
+        names = np.asarray(detector_names)
+        if names.dtype == object:
+            names = np.where(np.equal(names, None), 'None', names).astype(str)
+        unique_names, inverse = np.unique(names.astype(str), return_inverse=True)
+        unique_indices = np.array([-1 if name == 'None' else self._name_to_index[name]
+                                   for name in unique_names], dtype=int)
+        return unique_indices[inverse.reshape(names.shape)]
+
+    @property
+    def radial_transform(self):
+        """
+        The RadialFieldTransform between FIELD_ANGLE and FOCAL_PLANE
+        """
+        return self._radial
+
+    def focalPlaneFromFieldAngle(self, x_field, y_field, dtype=np.float64):
+        """
+        Convert FIELD_ANGLE coordinates (i.e. pupil coordinates in
+        radians) to FOCAL_PLANE coordinates in mm (see
+        RadialFieldTransform.focalPlaneFromFieldAngle)
+        """
+        return self._radial.focalPlaneFromFieldAngle(x_field, y_field, dtype=dtype)
+
+    def fieldAngleFromFocalPlane(self, x_focal, y_focal, dtype=np.float64):
+        """
+        Convert FOCAL_PLANE coordinates in mm to FIELD_ANGLE coordinates
+        (see RadialFieldTransform.fieldAngleFromFocalPlane)
+        """
+        return self._radial.fieldAngleFromFocalPlane(x_focal, y_focal, dtype=dtype)
+
+    def pixelsFromFocalPlane(self, x_focal, y_focal, detector_index, tanPixels=False,
+                             dtype=np.float64):
+        """
+        Convert FOCAL_PLANE coordinates in mm into pixel coordinates
+
+        Parameters
+        ----------
+        x_focal, y_focal -- the focal plane coordinates (numbers or
+        numpy arrays)
+
+        detector_index -- the index (see names) of the detector on which
+        to reckon the pixel coordinates.  Either an int or a numpy array of
+        ints (one per point).  Points with a negative index get NaN.
+
+        tanPixels -- if True, return TAN_PIXELS rather than PIXELS coordinates
+        (default False)
+
+        dtype -- the floating point type in which to do the calculation
+        (default np.float64)
+
+        Returns
+        -------
+        x_pix, y_pix -- the pixel coordinates
+        """
+        if tanPixels:
+            x_field, y_field = self.fieldAngleFromFocalPlane(x_focal, y_focal, dtype=dtype)
+            return self.tanPixelsFromFieldAngle(x_field, y_field, detector_index, dtype=dtype)
+
+        coeffs, off_chip = _gather_affine(self._focal_to_pixels, detector_index, dtype)
+        x_pix, y_pix = _apply_affine(coeffs,
+                                     np.asarray(x_focal, dtype=dtype),
+                                     np.asarray(y_focal, dtype=dtype))
+        return (_as_output(_mask_off_chip(np.asarray(x_pix), off_chip)),
+                _as_output(_mask_off_chip(np.asarray(y_pix), off_chip)))
+
+    def focalPlaneFromPixels(self, x_pix, y_pix, detector_index, tanPixels=False,
+                             dtype=np.float64):
+        """
+        Convert pixel coordinates into FOCAL_PLANE coordinates in mm
+
+        Parameters
+        ----------
+        x_pix, y_pix -- the pixel coordinates (numbers or numpy arrays)
+
+        detector_index -- the index (see names) of the detector on which
+        the pixel coordinates are reckoned.  Either an int or a numpy
+        array of ints (one per point).  Points with a negative index
+        get NaN.
+
+        tanPixels -- if True, x_pix and y_pix are TAN_PIXELS rather than
+        PIXELS coordinates (default False)
+
+        dtype -- the floating point type in which to do the calculation
+        (default np.float64)
+
+        Returns
+        -------
+        x_focal, y_focal -- the focal plane coordinates in mm
+        """
+        if tanPixels:
+            x_field, y_field = self.fieldAngleFromTanPixels(x_pix, y_pix, detector_index,
+                                                            dtype=dtype)
+            return self.focalPlaneFromFieldAngle(x_field, y_field, dtype=dtype)
+
+        coeffs, off_chip = _gather_affine(self._pixels_to_focal, detector_index, dtype)
+        x_focal, y_focal = _apply_affine(coeffs,
+                                         np.asarray(x_pix, dtype=dtype),
+                                         np.asarray(y_pix, dtype=dtype))
+        return (_as_output(_mask_off_chip(np.asarray(x_focal), off_chip)),
+                _as_output(_mask_off_chip(np.asarray(y_focal), off_chip)))
+
+    def tanPixelsFromFieldAngle(self, x_field, y_field, detector_index, dtype=np.float64):
+        """
+        Convert FIELD_ANGLE coordinates (i.e. pupil coordinates in radians)
+        into TAN_PIXELS coordinates
+
+        Parameters
+        ----------
+        x_field, y_field -- the field angle coordinates (numbers or
+        numpy arrays)
+
+        detector_index -- the index (see names) of the detector on which
+        to reckon the pixel coordinates.  Either an int or a numpy array of
+        ints (one per point).  Points with a negative index get NaN.
+
+        dtype -- the floating point type in which to do the calculation
+        (default np.float64)
+
+        Returns
+        -------
+        x_pix, y_pix -- the TAN_PIXELS coordinates
+        """
+        coeffs, off_chip = _gather_affine(self._field_to_tan_pixels, detector_index, dtype)
+        x_pix, y_pix = _apply_affine(coeffs,
+                                     np.asarray(x_field, dtype=dtype),
+                                     np.asarray(y_field, dtype=dtype))
+        return (_as_output(_mask_off_chip(np.asarray(x_pix), off_chip)),
+                _as_output(_mask_off_chip(np.asarray(y_pix), off_chip)))
+
+    def fieldAngleFromTanPixels(self, x_pix, y_pix, detector_index, dtype=np.float64):
+        """
+        Convert TAN_PIXELS coordinates into FIELD_ANGLE coordinates
+        (i.e. pupil coordinates in radians)
+
+        Parameters
+        ----------
+        x_pix, y_pix -- the TAN_PIXELS coordinates (numbers or numpy arrays)
+
+        detector_index -- the index (see names) of the detector on which
+        the pixel coordinates are reckoned.  Either an int or a numpy
+        array of ints (one per point).  Points with a negative index
+        get NaN.
+
+        dtype -- the floating point type in which to do the calculation
+        (default np.float64)
+
+        Returns
+        -------
+        x_field, y_field -- the field angle coordinates in radians
+        """
+        coeffs, off_chip = _gather_affine(self._tan_pixels_to_field, detector_index, dtype)
+        x_field, y_field = _apply_affine(coeffs,
+                                         np.asarray(x_pix, dtype=dtype),
+                                         np.asarray(y_pix, dtype=dtype))
+        return (_as_output(_mask_off_chip(np.asarray(x_field), off_chip)),
+                _as_output(_mask_off_chip(np.asarray(y_field), off_chip)))
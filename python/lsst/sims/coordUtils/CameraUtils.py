@@ -6,6 +6,9 @@ from lsst.afw.cameraGeom import FIELD_ANGLE, PIXELS, TAN_PIXELS, FOCAL_PLANE
 from lsst.sims.utils.CodeUtilities import _validate_inputs
 from lsst.sims.utils import _pupilCoordsFromRaDec, _raDecFromPupilCoords
 from lsst.sims.utils import radiansFromArcsec
+from lsst.sims.coordUtils import CameraGeometrySnapshot, RadialFieldTransform
+from lsst.sims.coordUtils import _apply_afw_transform
+from lsst.sims.coordUtils import _run_in_chunks, _convert_into
 
 __all__ = ["MultipleChipWarning", "getCornerPixels", "_getCornerRaDec", "getCornerRaDec",
            "chipNameFromPupilCoords", "chipNameFromRaDec", "_chipNameFromRaDec",
@@ -13,7 +16,9 @@ __all__ = ["MultipleChipWarning", "getCornerPixels", "_getCornerRaDec", "getCorn
            "focalPlaneCoordsFromPupilCoords", "focalPlaneCoordsFromRaDec", "_focalPlaneCoordsFromRaDec",
            "pupilCoordsFromPixelCoords", "pupilCoordsFromFocalPlaneCoords",
            "raDecFromPixelCoords", "_raDecFromPixelCoords",
-           "_validate_inputs_and_chipname"]
+           "chipNameFromChipCode", "chipCodeFromChipName",
+           "_validate_inputs_and_chipname", "_validate_dtype", "_as_chip_codes", "_group_by_chip",
+           "_radial_field_transform", "_camera_snapshot", "_detector_name_table"]
 
 
 class MultipleChipWarning(Warning):
@@ -84,6 +89,234 @@ def _validate_inputs_and_chipname(input_list, input_names, method_name,
         return are_arrays, [chip_name]*n_pts
 
 
+def _validate_dtype(dtype, method_name):
+    """
+    Make sure that dtype is one of the floating point types in which
+    the coordinate transformations can be done (np.float32 or np.float64).
+
+    dtype is the dtype passed into the calling method.
+
+    method_name is the name of the calling method.
+
+    Returns dtype as a numpy dtype.  Raises a RuntimeError if
+    dtype is not np.float32 or np.float64.
+    """
+    try:
+        dtype_out = np.dtype(dtype)
+    except TypeError:
+        dtype_out = None
+
+    if dtype_out not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise RuntimeError("%s only supports dtype=np.float32 or np.float64; "
+                           "you passed %s" % (method_name, str(dtype)))
+    return dtype_out
+
+
+def _as_chip_codes(chip_name_list, n_detectors, method_name):
+    """
+    Detectors can be referred to by integer codes rather than by name
+    (see chipCodeFromChipName).  If chip_name_list (as returned by
+    _validate_inputs_and_chipname) contains codes, return them as a numpy
+    array of ints.  If it contains names (or is None), return None.
+
+    n_detectors is the number of detectors in the camera.
+
+    method_name is the name of the calling method.
+
+    Raises a RuntimeError if any of the codes is not between -1 (meaning
+    'not on any detector') and n_detectors-1.
+    """
+    if chip_name_list is None:
+        return None
+
+    codes = np.asarray(chip_name_list)
+    if codes.dtype.kind not in ('i', 'u'):
+        return None
+
+    if len(codes) > 0 and (codes.min() < -1 or codes.max() >= n_detectors):
+        raise RuntimeError("%s was passed chip codes outside of the range "
+                           "[-1, %d]" % (method_name, n_detectors-1))
+
+    return codes
+
+
+def _group_by_chip(chip_keys):
+    """
+    Group points by the chip they are on.
+
+    chip_keys is a numpy array containing one chip name or chip code per
+    point (the keys must be sortable, so None should be converted to
+    'None' or -1 beforehand).
+
+    Yields (key, indices) for each distinct key, where indices is a numpy
+    array of the (ascending) indices of the points with that key.  The
+    grouping is done with one np.unique and one stable argsort, so that
+    each group is a contiguous slice of the sorted indices rather than
+    the result of a separate O(N) search for every chip.
+    """
+    unique_keys, inverse = np.unique(chip_keys, return_inverse=True)
+    inverse = inverse.ravel()
+    sorted_dex = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[sorted_dex], np.arange(len(unique_keys)+1))
+    for i_key, key in enumerate(unique_keys):
+        yield key, sorted_dex[bounds[i_key]:bounds[i_key+1]]
+
+
+def _cached_camera_model(cached_method, camera, builder):
+    """
+    Return builder(camera), or None if builder raises a RuntimeError
+    (i.e. if camera cannot be represented by the model builder builds).
+
+    Building a model takes about as long as transforming a few thousand
+    points with afw, so the results are cached (in cached_method._cache)
+    for the most recently used cameras.
+    """
+    if not hasattr(cached_method, '_cache'):
+        cached_method._cache = {}
+
+    cache = cached_method._cache
+    key = id(camera)
+    if key not in cache:
+        try:
+            model = builder(camera)
+        except RuntimeError:
+            model = None
+
+        if len(cache) >= 4:
+            del cache[next(iter(cache))]
+
+        # keep a reference to the camera so that its id cannot be reused
+        cache[key] = (camera, model)
+
+    return cache[key][1]
+
+
+def _radial_field_transform(camera):
+    """
+    Return the RadialFieldTransform representing the FIELD_ANGLE<->FOCAL_PLANE
+    transformation of camera, or None if that transformation cannot be
+    represented by a RadialFieldTransform.
+    """
+    return _cached_camera_model(_radial_field_transform, camera,
+                                RadialFieldTransform.from_camera)
+
+
+def _camera_snapshot(camera):
+    """
+    Return a CameraGeometrySnapshot of camera (whose tables of per-detector
+    transformations let us convert points on many detectors in one pass),
+    or None if camera cannot be represented by a CameraGeometrySnapshot.
+    """
+    return _cached_camera_model(_camera_snapshot, camera,
+                                CameraGeometrySnapshot.from_camera)
+
+
+def _detector_name_table(camera):
+    """
+    Return a numpy array of the names of the detectors in camera, in the
+    order in which camera iterates over them.  The index of a detector in
+    this array is its chip code.
+    """
+    return _cached_camera_model(_detector_name_table, camera,
+                                lambda cam: np.array([det.getName() for det in cam]))
+
+
+def chipNameFromChipCode(chipCode, camera):
+    """
+    Convert integer chip codes (as returned by chipNameFromPupilCoords
+    with as_codes=True) into chip names.
+
+    @param [in] chipCode is an int or a numpy array of ints.
+    -1 means that the object is not on any chip.
+
+    @param [in] camera is the afwCameraGeom camera object to which the codes refer
+
+    @param [out] the chip name(s) (None for a code of -1).  A numpy array
+    if chipCode is a numpy array.
+    """
+    names = np.append(_detector_name_table(camera).astype(object), [None])
+    codes = _as_chip_codes(np.atleast_1d(chipCode), len(names)-1, 'chipNameFromChipCode')
+    if codes is None:
+        raise RuntimeError("chipNameFromChipCode needs integer chip codes; "
+                           "you passed %s" % str(chipCode))
+
+    # code -1 picks up the None at the end of names
+    if isinstance(chipCode, np.ndarray):
+        return names[codes]
+    return names[codes[0]]
+
+
+def chipCodeFromChipName(chipName, camera):
+    """
+    Convert chip names into the compact integer chip codes that
+    chipNameFromPupilCoords returns with as_codes=True and that
+    pixelCoordsFromPupilCoords and pupilCoordsFromPixelCoords accept
+    in place of chip names.
+
+    @param [in] chipName is a chip name or a list or numpy array of chip names.
+    None (or 'None') means that the object is not on any chip.
+
+    @param [in] camera is the afwCameraGeom camera object containing the chips
+
+    @param [out] the chip code(s) as np.int16 (-1 for objects not on any chip).
+    A numpy array if chipName is a list or numpy array.
+    """
+    name_to_code = dict((name, ii) for ii, name in enumerate(_detector_name_table(camera)))
+    name_to_code['None'] = -1
+
+    names = np.atleast_1d(np.asarray(chipName, dtype=object))
+    names = np.where(np.equal(names, None), 'None', names).astype(str)
+    unique_names, inverse = np.unique(names, return_inverse=True)
+    try:
+        unique_codes = np.array([name_to_code[name] for name in unique_names], dtype=np.int16)
+    except KeyError as err:
+        raise RuntimeError("chipCodeFromChipName: %s is not a chip in this camera" % str(err))
+
+    codes = unique_codes[inverse.reshape(names.shape)]
+    if isinstance(chipName, (list, np.ndarray)):
+        return codes
+    return codes[0]
+
+
+def _transform_field_angle(camera, x_in, y_in, inverse=False):
+    """
+    Transform numpy arrays of FIELD_ANGLE coordinates into FOCAL_PLANE
+    coordinates (or FOCAL_PLANE into FIELD_ANGLE, if inverse is True).
+
+    Points within the domain of the camera's RadialFieldTransform are
+    transformed with numpy.  Any other points (or all points, if the
+    camera has no RadialFieldTransform) are transformed by afw.
+
+    Returns two numpy arrays of transformed coordinates.
+    """
+    radial = _radial_field_transform(camera)
+    if radial is None:
+        x_out = np.zeros(len(x_in), dtype=float)
+        y_out = np.zeros(len(y_in), dtype=float)
+        outside = np.ones(len(x_in), dtype=bool)
+    else:
+        if inverse:
+            x_out, y_out = radial.fieldAngleFromFocalPlane(x_in, y_in)
+            r_max = radial.focal_radius_max
+        else:
+            x_out, y_out = radial.focalPlaneFromFieldAngle(x_in, y_in)
+            r_max = radial.field_radius_max
+
+        with np.errstate(invalid='ignore'):
+            outside = (np.power(x_in, 2) + np.power(y_in, 2) > r_max*r_max)
+
+    if outside.any():
+        if inverse:
+            afw_transform = camera.getTransformMap().getTransform(FOCAL_PLANE, FIELD_ANGLE)
+        else:
+            afw_transform = camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE)
+
+        x_out[outside], y_out[outside] = _apply_afw_transform(afw_transform,
+                                                              x_in[outside], y_in[outside])
+
+    return x_out, y_out
+
+
 def getCornerPixels(detector_name, camera):
     """
     Return the pixel coordinates of the corners of a detector.
@@ -195,7 +428,8 @@ def _getCornerRaDec(detector_name, camera, obs_metadata,
 
 def chipNameFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                       obs_metadata=None, camera=None,
-                      epoch=2000.0, allow_multiple_chips=False):
+                      epoch=2000.0, allow_multiple_chips=False, as_codes=False,
+                      workers=None, executor=None, out=None):
     """
     Return the names of detectors that see the object specified by
     (RA, Dec) in degrees.
@@ -231,8 +465,36 @@ def chipNameFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=Non
     and an object falls on more than one chip, it will still only return the first chip in the
     list of chips returned. THIS BEHAVIOR SHOULD BE FIXED IN A FUTURE TICKET.
 
+    @param [in] as_codes is a boolean (default False).  If True, return np.int16
+    chip codes rather than chip names (see chipNameFromPupilCoords).
+
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of length N (of dtype object, or np.int16 if as_codes is True), e.g. a field of
+    a structured array or a np.memmap.  The objects are converted in chunks which
+    are written into out, so no temporary arrays of length N are allocated, and out
+    is returned.
+
     @param [out] a numpy array of chip names
     """
+
+    if out is not None:
+        return _convert_into(chipNameFromRaDec,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                  allow_multiple_chips=allow_multiple_chips, as_codes=as_codes,
+                                  workers=workers, executor=executor),
+                             out)
+
     if pm_ra is not None:
         pm_ra_out = radiansFromArcsec(pm_ra)
     else:
@@ -252,12 +514,14 @@ def chipNameFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=Non
                               pm_ra=pm_ra_out, pm_dec=pm_dec_out,
                               parallax=parallax_out, v_rad=v_rad,
                               obs_metadata=obs_metadata, epoch=epoch,
-                              camera=camera, allow_multiple_chips=allow_multiple_chips)
+                              camera=camera, allow_multiple_chips=allow_multiple_chips,
+                              as_codes=as_codes, workers=workers, executor=executor)
 
 
 def _chipNameFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                        obs_metadata=None, camera=None,
-                       epoch=2000.0, allow_multiple_chips=False):
+                       epoch=2000.0, allow_multiple_chips=False, as_codes=False,
+                       workers=None, executor=None, out=None):
     """
     Return the names of detectors that see the object specified by
     (RA, Dec)  in radians.
@@ -294,10 +558,46 @@ def _chipNameFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=No
     and an object falls on more than one chip, it will still only return the first chip in the
     list of chips returned. THIS BEHAVIOR SHOULD BE FIXED IN A FUTURE TICKET.
 
+    @param [in] as_codes is a boolean (default False).  If True, return np.int16
+    chip codes rather than chip names (see chipNameFromPupilCoords).
+
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of length N (of dtype object, or np.int16 if as_codes is True), e.g. a field of
+    a structured array or a np.memmap.  The objects are converted in chunks which
+    are written into out, so no temporary arrays of length N are allocated, and out
+    is returned.
+
     @param [out] the name(s) of the chips on which ra, dec fall (will be a numpy
     array if more than one)
     """
 
+    if out is not None:
+        return _convert_into(_chipNameFromRaDec,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                  allow_multiple_chips=allow_multiple_chips, as_codes=as_codes,
+                                  workers=workers, executor=executor),
+                             out)
+
+    if workers is not None or executor is not None:
+        return _run_in_chunks(_chipNameFromRaDec,
+                              dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec,
+                                   parallax=parallax, v_rad=v_rad),
+                              dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                   allow_multiple_chips=allow_multiple_chips,
+                                   as_codes=as_codes),
+                              workers=workers, executor=executor)
+
     are_arrays = _validate_inputs([ra, dec], ['ra', 'dec'], "chipNameFromRaDec")
 
     if epoch is None:
@@ -320,13 +620,30 @@ def _chipNameFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=No
                                    pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax, v_rad=v_rad,
                                    obs_metadata=obs_metadata, epoch=epoch)
 
-    ans = chipNameFromPupilCoords(xp, yp, camera=camera, allow_multiple_chips=allow_multiple_chips)
+    ans = chipNameFromPupilCoords(xp, yp, camera=camera, allow_multiple_chips=allow_multiple_chips,
+                                  as_codes=as_codes)
 
     if not are_arrays:
         return ans[0]
     return ans
 
-def chipNameFromPupilCoords(xPupil, yPupil, camera=None, allow_multiple_chips=False):
+def _warn_multiple_chips(name_list, xPupil, yPupil):
+    """
+    Emit the MultipleChipWarning for an object at (xPupil, yPupil)
+    that landed on all of the chips in name_list
+    """
+    warnings.warn("An object has landed on multiple chips.  " +
+                  "You asked for this not to happen.\n" +
+                  "We will return only one of the chip names.  If you want both, " +
+                  "try re-running with " +
+                  "the kwarg allow_multiple_chips=True.\n" +
+                  "Offending chip names were %s\n" % str(name_list) +
+                  "Offending pupil coordinate point was %.12f %.12f\n" % (xPupil, yPupil),
+                  category=MultipleChipWarning)
+
+
+def chipNameFromPupilCoords(xPupil, yPupil, camera=None, allow_multiple_chips=False,
+                            as_codes=False, out=None):
     """
     Return the names of detectors that see the object specified by
     (xPupil, yPupil).
@@ -345,59 +662,92 @@ def chipNameFromPupilCoords(xPupil, yPupil, camera=None, allow_multiple_chips=Fa
 
     @param [in] camera is an afwCameraGeom object that specifies the attributes of the camera.
 
+    @param [in] as_codes is a boolean (default False).  If True, return a numpy array
+    of np.int16 chip codes (-1 for objects not on any chip) rather than chip names
+    (see chipNameFromChipCode).  Cannot be used with allow_multiple_chips=True.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of length N (of dtype object, or np.int16 if as_codes is True), e.g. a field of
+    a structured array or a np.memmap.  The objects are converted in chunks which
+    are written into out, so no temporary arrays of length N are allocated, and out
+    is returned.
+
     @param [out] a numpy array of chip names
 
     """
 
+    if out is not None:
+        return _convert_into(chipNameFromPupilCoords,
+                             dict(xPupil=xPupil, yPupil=yPupil),
+                             dict(camera=camera, allow_multiple_chips=allow_multiple_chips,
+                                  as_codes=as_codes),
+                             out)
+
     are_arrays = _validate_inputs([xPupil, yPupil], ['xPupil', 'yPupil'], "chipNameFromPupilCoords")
 
     if camera is None:
         raise RuntimeError("No camera defined.  Cannot run chipName.")
 
-    chipNames = []
+    if as_codes and allow_multiple_chips:
+        raise RuntimeError("chipNameFromPupilCoords cannot return chip codes "
+                           "with allow_multiple_chips=True")
 
-    if are_arrays:
-        pupilPointList = [geom.Point2D(x, y) for x, y in zip(xPupil, yPupil)]
-    else:
-        pupilPointList = [geom.Point2D(xPupil, yPupil)]
-
-    detList = camera.findDetectorsList(pupilPointList, FIELD_ANGLE)
-
-    for pt, det in zip(pupilPointList, detList):
-        if len(det) == 0 or np.isnan(pt.getX()) or np.isnan(pt.getY()):
-            chipNames.append(None)
+    if not are_arrays:
+        xPupil = np.array([xPupil])
+        yPupil = np.array([yPupil])
+
+    # This reproduces camera.findDetectorsList(pointList, FIELD_ANGLE):
+    # every detector transforms all of the points from FIELD_ANGLE to its
+    # PIXELS and keeps the points inside its bounding box (which, like
+    # geom.Box2D.contains, includes the lower edge but not the upper edge).
+    # The points are transformed as numpy arrays, rather than as lists of
+    # geom.Point2D.
+    det_names = [None]
+    first_det = np.zeros(len(xPupil), dtype=int)
+    multiple_dex = {}
+    transform_map = camera.getTransformMap()
+    for det in camera:
+        field_to_pixels = transform_map.getTransform(FIELD_ANGLE, det.makeCameraSys(PIXELS))
+        xPix, yPix = _apply_afw_transform(field_to_pixels, xPupil, yPupil)
+        bbox = geom.Box2D(det.getBBox())
+        on_det = np.where((xPix >= bbox.getMinX()) & (xPix < bbox.getMaxX()) &
+                          (yPix >= bbox.getMinY()) & (yPix < bbox.getMaxY()))[0]
+
+        det_names.append(det.getName())
+        for ii in on_det[first_det[on_det] > 0]:
+            if ii not in multiple_dex:
+                multiple_dex[ii] = [det_names[first_det[ii]]]
+            multiple_dex[ii].append(det.getName())
+        first_det[on_det[first_det[on_det] == 0]] = len(det_names) - 1
+
+    if as_codes:
+        for ii in sorted(multiple_dex):
+            _warn_multiple_chips(multiple_dex[ii], xPupil[ii], yPupil[ii])
+        chipCodes = (first_det - 1).astype(np.int16)
+        if not are_arrays:
+            return chipCodes[0]
+        return chipCodes
+
+    chipNames = np.array(det_names, dtype=object)[first_det]
+
+    for ii in sorted(multiple_dex):
+        name_list = multiple_dex[ii]
+        if allow_multiple_chips:
+            chipNames[ii] = str(name_list)
         else:
-            name_list = [dd.getName() for dd in det]
-            if len(name_list) > 1:
-                if allow_multiple_chips:
-                    chipNames.append(str(name_list))
-                else:
-                    warnings.warn("An object has landed on multiple chips.  " +
-                                  "You asked for this not to happen.\n" +
-                                  "We will return only one of the chip names.  If you want both, " +
-                                  "try re-running with " +
-                                  "the kwarg allow_multiple_chips=True.\n" +
-                                  "Offending chip names were %s\n" % str(name_list) +
-                                  "Offending pupil coordinate point was %.12f %.12f\n" % (pt[0], pt[1]),
-                                  category=MultipleChipWarning)
-
-                    chipNames.append(name_list[0])
-
-            elif len(name_list) == 0:
-                chipNames.append(None)
-            else:
-                chipNames.append(name_list[0])
+            _warn_multiple_chips(name_list, xPupil[ii], yPupil[ii])
 
     if not are_arrays:
         return chipNames[0]
 
-    return np.array(chipNames)
+    return np.array(list(chipNames))
 
 
 def pixelCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                          obs_metadata=None,
                          chipName=None, camera=None,
-                         epoch=2000.0, includeDistortion=True):
+                         epoch=2000.0, includeDistortion=True,
+                         workers=None, executor=None, out=None):
     """
     Get the pixel positions (or nan if not on a chip) for objects based
     on their RA, and Dec (in degrees)
@@ -444,10 +794,34 @@ def pixelCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x pixel coordinate
     and the second row is the y pixel coordinate
     """
 
+    if out is not None:
+        return _convert_into(pixelCoordsFromRaDec,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad, chipName=chipName),
+                             dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                  includeDistortion=includeDistortion, workers=workers,
+                                  executor=executor),
+                             out)
+
     if pm_ra is not None:
         pm_ra_out = radiansFromArcsec(pm_ra)
     else:
@@ -468,13 +842,15 @@ def pixelCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=
                                  parallax=parallax_out, v_rad=v_rad,
                                  chipName=chipName, camera=camera,
                                  includeDistortion=includeDistortion,
-                                 obs_metadata=obs_metadata, epoch=epoch)
+                                 obs_metadata=obs_metadata, epoch=epoch,
+                                 workers=workers, executor=executor)
 
 
 def _pixelCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                           obs_metadata=None,
                           chipName=None, camera=None,
-                          epoch=2000.0, includeDistortion=True):
+                          epoch=2000.0, includeDistortion=True,
+                          workers=None, executor=None, out=None):
     """
     Get the pixel positions (or nan if not on a chip) for objects based
     on their RA, and Dec (in radians)
@@ -520,10 +896,42 @@ def _pixelCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x pixel coordinate
     and the second row is the y pixel coordinate
     """
 
+    if out is not None:
+        return _convert_into(_pixelCoordsFromRaDec,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad, chipName=chipName),
+                             dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                  includeDistortion=includeDistortion, workers=workers,
+                                  executor=executor),
+                             out)
+
+    if workers is not None or executor is not None:
+        return _run_in_chunks(_pixelCoordsFromRaDec,
+                              dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec,
+                                   parallax=parallax, v_rad=v_rad, chipName=chipName),
+                              dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                   includeDistortion=includeDistortion),
+                              workers=workers, executor=executor)
+
     are_arrays, \
     chipNameList = _validate_inputs_and_chipname([ra, dec], ['ra', 'dec'],
                                                  'pixelCoordsFromRaDec',
@@ -553,7 +961,8 @@ def _pixelCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad
 
 
 def pixelCoordsFromPupilCoords(xPupil, yPupil, chipName=None,
-                               camera=None, includeDistortion=True):
+                               camera=None, includeDistortion=True,
+                               out=None):
     """
     Get the pixel positions (or nan if not on a chip) for objects based
     on their pupil coordinates.
@@ -570,7 +979,8 @@ def pixelCoordsFromPupilCoords(xPupil, yPupil, chipName=None,
     If a single value, all of the pixel coordinates will be reckoned on the same
     chip.  If None, this method will calculate which chip each(RA, Dec) pair actually
     falls on, and return pixel coordinates for each (RA, Dec) pair on the appropriate
-    chip.  Default is None.
+    chip.  Default is None.  Integer chip codes (see chipCodeFromChipName) can be
+    passed in place of chip names.
 
     @param [in] camera is an afwCameraGeom object specifying the attributes of the camera.
     This is an optional argument to be passed to chipName.
@@ -581,10 +991,22 @@ def pixelCoordsFromPupilCoords(xPupil, yPupil, chipName=None,
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x pixel coordinate
     and the second row is the y pixel coordinate
     """
 
+    if out is not None:
+        return _convert_into(pixelCoordsFromPupilCoords,
+                             dict(xPupil=xPupil, yPupil=yPupil, chipName=chipName),
+                             dict(camera=camera, includeDistortion=includeDistortion),
+                             out)
+
     are_arrays, \
     chipNameList = _validate_inputs_and_chipname([xPupil, yPupil], ["xPupil", "yPupil"],
                                                  "pixelCoordsFromPupilCoords",
@@ -598,58 +1020,74 @@ def pixelCoordsFromPupilCoords(xPupil, yPupil, chipName=None,
         raise RuntimeError("Camera not specified.  Cannot calculate pixel coordinates.")
 
     if chipNameList is None:
-        chipNameList = chipNameFromPupilCoords(xPupil, yPupil, camera=camera)
-        if not isinstance(chipNameList, list) and not isinstance(chipNameList, np.ndarray):
-            chipNameList = [chipNameList]
+        chipCodes = np.atleast_1d(chipNameFromPupilCoords(xPupil, yPupil, camera=camera,
+                                                          as_codes=True))
+    else:
+        chipCodes = _as_chip_codes(chipNameList, len(_detector_name_table(camera)),
+                                   "pixelCoordsFromPupilCoords")
+
+    if are_arrays and len(xPupil) == 0:
+        return np.array([[],[]])
+
+    snapshot = _camera_snapshot(camera)
+    if snapshot is not None:
+        # convert all of the points in one pass, gathering the transformation
+        # of each point's detector from the snapshot's table of transformations
+        # (chip codes index the same table)
+        if chipCodes is not None:
+            chip_index = chipCodes
+        else:
+            chip_index = snapshot.getIndices(chipNameList)
 
-    fieldToFocal = camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE)
+        if not are_arrays:
+            xPupil = np.array([xPupil])
+            yPupil = np.array([yPupil])
+            chip_index = chip_index[:1]
 
-    if are_arrays:
-        if len(xPupil) == 0:
-            return np.array([[],[]])
-        field_point_list = list([geom.Point2D(x,y) for x,y in zip(xPupil, yPupil)])
-        focal_point_list = fieldToFocal.applyForward(field_point_list)
+        if includeDistortion:
+            xFocal, yFocal = _transform_field_angle(camera, xPupil, yPupil)
+            xPix, yPix = snapshot.pixelsFromFocalPlane(xFocal, yFocal, chip_index)
+        else:
+            xPix, yPix = snapshot.tanPixelsFromFieldAngle(xPupil, yPupil, chip_index)
+
+        if are_arrays:
+            return np.array([xPix, yPix])
+        return np.array([xPix[0], yPix[0]])
 
-        transform_dict = {}
-        xPix = np.nan*np.ones(len(chipNameList), dtype=float)
-        yPix = np.nan*np.ones(len(chipNameList), dtype=float)
+    if chipCodes is not None:
+        chipNameList = chipNameFromChipCode(chipCodes, camera)
 
-        if not isinstance(chipNameList, np.ndarray):
-            chipNameList = np.array(chipNameList)
-        chipNameList = chipNameList.astype(str)
+    fieldToFocal = camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE)
 
-        for name in np.unique(chipNameList):
-            if name == 'None':
-                continue
+    if not are_arrays:
+        if chipNameList[0] is None:
+            return np.array([np.NaN, np.NaN])
+        xPupil = np.array([xPupil])
+        yPupil = np.array([yPupil])
+        chipNameList = chipNameList[:1]
 
-            valid_points = np.where(np.char.find(chipNameList, name)==0)
-            local_focal_point_list = list([focal_point_list[dex] for dex in valid_points[0]])
+    xFocal, yFocal = _apply_afw_transform(fieldToFocal, xPupil, yPupil)
 
-            if name not in transform_dict:
-                transform_dict[name] = camera[name].getTransform(FOCAL_PLANE, pixelType)
+    xPix = np.nan*np.ones(len(chipNameList), dtype=float)
+    yPix = np.nan*np.ones(len(chipNameList), dtype=float)
 
-            focalToPixels = transform_dict[name]
-            pixPoint_list = focalToPixels.applyForward(local_focal_point_list)
+    chipNameList = np.array(chipNameList).astype(str)
+    for name, valid_points in _group_by_chip(chipNameList):
+        if name == 'None':
+            continue
 
-            for i_fp, v_dex in enumerate(valid_points[0]):
-                pixPoint= pixPoint_list[i_fp]
-                xPix[v_dex] = pixPoint.getX()
-                yPix[v_dex] = pixPoint.getY()
+        focalToPixels = camera[name].getTransform(FOCAL_PLANE, pixelType)
+        xPix[valid_points], yPix[valid_points] = _apply_afw_transform(focalToPixels,
+                                                                      xFocal[valid_points],
+                                                                      yFocal[valid_points])
 
+    if are_arrays:
         return np.array([xPix, yPix])
-    else:
-        if chipNameList[0] is None:
-            return np.array([np.NaN, np.NaN])
-
-        det = camera[chipNameList[0]]
-        focalToPixels = det.getTransform(FOCAL_PLANE, pixelType)
-        focalPoint = fieldToFocal.applyForward(geom.Point2D(xPupil, yPupil))
-        pixPoint = focalToPixels.applyForward(focalPoint)
-        return np.array([pixPoint.getX(), pixPoint.getY()])
+    return np.array([xPix[0], yPix[0]])
 
 
 def pupilCoordsFromPixelCoords(xPix, yPix, chipName, camera=None,
-                               includeDistortion=True):
+                               includeDistortion=True, out=None):
 
     """
     Convert pixel coordinates into pupil coordinates
@@ -663,7 +1101,8 @@ def pupilCoordsFromPixelCoords(xPix, yPix, chipName, camera=None,
     @param [in] chipName is the name of the chip(s) on which the pixel coordinates
     are defined.  This can be a list (in which case there should be one chip name
     for each (xPix, yPix) coordinate pair), or a single value (in which case, all
-    of the (xPix, yPix) points will be reckoned on that chip).
+    of the (xPix, yPix) points will be reckoned on that chip).  Integer chip codes
+    (see chipCodeFromChipName) can be passed in place of chip names.
 
     @param [in] camera is an afw.CameraGeom.camera object defining the camera
 
@@ -673,10 +1112,22 @@ def pupilCoordsFromPixelCoords(xPix, yPix, chipName, camera=None,
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x pupil coordinate
     and the second row is the y pupil coordinate (both in radians)
     """
 
+    if out is not None:
+        return _convert_into(pupilCoordsFromPixelCoords,
+                             dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                             dict(camera=camera, includeDistortion=includeDistortion),
+                             out)
+
     if camera is None:
         raise RuntimeError("You cannot call pupilCoordsFromPixelCoords without specifying a camera")
 
@@ -686,47 +1137,79 @@ def pupilCoordsFromPixelCoords(xPix, yPix, chipName, camera=None,
                                                  chipName,
                                                  chipname_can_be_none=False)
 
+    chipCodes = _as_chip_codes(chipNameList, len(_detector_name_table(camera)),
+                               "pupilCoordsFromPixelCoords")
+
+    if are_arrays and len(xPix) == 0:
+        return np.array([[],[]])
+
+    snapshot = _camera_snapshot(camera)
+    if snapshot is not None:
+        # convert all of the points in one pass, gathering the transformation
+        # of each point's detector from the snapshot's table of transformations
+        if chipCodes is not None:
+            chip_index = chipCodes
+        else:
+            chip_index = snapshot.getIndices(chipNameList)
+
+        if not are_arrays:
+            xPix = np.array([xPix])
+            yPix = np.array([yPix])
+            chip_index = chip_index[:1]
+
+        if includeDistortion:
+            xFocal, yFocal = snapshot.focalPlaneFromPixels(xPix, yPix, chip_index)
+            xPupil, yPupil = _transform_field_angle(camera, xFocal, yFocal, inverse=True)
+        else:
+            xPupil, yPupil = snapshot.fieldAngleFromTanPixels(xPix, yPix, chip_index)
+
+        if are_arrays:
+            return np.array([xPupil, yPupil])
+        return np.array([xPupil[0], yPupil[0]])
+
+    if chipCodes is not None:
+        chipNameList = chipNameFromChipCode(chipCodes, camera)
+
     if includeDistortion:
         pixelType = PIXELS
     else:
         pixelType = TAN_PIXELS
 
-    pixel_to_focal_dict = {}
+    if not are_arrays:
+        if chipNameList[0] is None or chipNameList[0] == 'None':
+            return np.array([np.NaN, np.NaN])
+        xPix = np.array([xPix])
+        yPix = np.array([yPix])
+        chipNameList = chipNameList[:1]
+
+    xFocal = np.nan*np.ones(len(chipNameList), dtype=float)
+    yFocal = np.nan*np.ones(len(chipNameList), dtype=float)
+
+    chipNameList = np.array(chipNameList).astype(str)
+    for name, valid_points in _group_by_chip(chipNameList):
+        if name == 'None':
+            continue
+
+        pixelsToFocal = camera[name].getTransform(pixelType, FOCAL_PLANE)
+        xFocal[valid_points], yFocal[valid_points] = _apply_afw_transform(pixelsToFocal,
+                                                                          xPix[valid_points],
+                                                                          yPix[valid_points])
+
+    xPupil = np.nan*np.ones(len(chipNameList), dtype=float)
+    yPupil = np.nan*np.ones(len(chipNameList), dtype=float)
+    on_chip = (chipNameList != 'None')
     focal_to_field = camera.getTransformMap().getTransform(FOCAL_PLANE, FIELD_ANGLE)
-    for name in chipNameList:
-        if name not in pixel_to_focal_dict and name is not None and name != 'None':
-            pixel_to_focal_dict[name] = camera[name].getTransform(pixelType, FOCAL_PLANE)
+    xPupil[on_chip], yPupil[on_chip] = _apply_afw_transform(focal_to_field,
+                                                            xFocal[on_chip], yFocal[on_chip])
 
     if are_arrays:
-        xPupilList = []
-        yPupilList = []
-
-        for xx, yy, name in zip(xPix, yPix, chipNameList):
-            if name is None or name == 'None':
-                xPupilList.append(np.NaN)
-                yPupilList.append(np.NaN)
-            else:
-                focalPoint = pixel_to_focal_dict[name].applyForward(geom.Point2D(xx, yy))
-                pupilPoint = focal_to_field.applyForward(focalPoint)
-                xPupilList.append(pupilPoint.getX())
-                yPupilList.append(pupilPoint.getY())
-
-        xPupilList = np.array(xPupilList)
-        yPupilList = np.array(yPupilList)
-
-        return np.array([xPupilList, yPupilList])
-
-    # if not are_arrays
-    if chipNameList[0] is None or chipNameList[0] == 'None':
-        return np.array([np.NaN, np.NaN])
-
-    focalPoint = pixel_to_focal_dict[chipNameList[0]].applyForward(geom.Point2D(xPix, yPix))
-    pupilPoint = focal_to_field.applyForward(focalPoint)
-    return np.array([pupilPoint.getX(), pupilPoint.getY()])
+        return np.array([xPupil, yPupil])
+    return np.array([xPupil[0], yPupil[0]])
 
 
 def raDecFromPixelCoords(xPix, yPix, chipName, camera=None,
-                         obs_metadata=None, epoch=2000.0, includeDistortion=True):
+                         obs_metadata=None, epoch=2000.0, includeDistortion=True,
+                         workers=None, executor=None, out=None):
     """
     Convert pixel coordinates into RA, Dec
 
@@ -754,6 +1237,21 @@ def raDecFromPixelCoords(xPix, yPix, chipName, camera=None,
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the RA coordinate
     and the second row is the Dec coordinate (both in degrees; in the
     International Celestial Reference System)
@@ -762,15 +1260,26 @@ def raDecFromPixelCoords(xPix, yPix, chipName, camera=None,
     This method is only useful for mapping positions on a theoretical focal plane
     to positions on the celestial sphere.
     """
+
+    if out is not None:
+        return _convert_into(raDecFromPixelCoords,
+                             dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                             dict(camera=camera, obs_metadata=obs_metadata, epoch=epoch,
+                                  includeDistortion=includeDistortion, workers=workers,
+                                  executor=executor),
+                             out)
+
     output = _raDecFromPixelCoords(xPix, yPix, chipName,
                                    camera=camera, obs_metadata=obs_metadata,
-                                   epoch=epoch, includeDistortion=includeDistortion)
+                                   epoch=epoch, includeDistortion=includeDistortion,
+                                   workers=workers, executor=executor)
 
     return np.degrees(output)
 
 
 def _raDecFromPixelCoords(xPix, yPix, chipName, camera=None,
-                          obs_metadata=None, epoch=2000.0, includeDistortion=True):
+                          obs_metadata=None, epoch=2000.0, includeDistortion=True,
+                          workers=None, executor=None, out=None):
     """
     Convert pixel coordinates into RA, Dec
 
@@ -798,6 +1307,21 @@ def _raDecFromPixelCoords(xPix, yPix, chipName, camera=None,
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the RA coordinate
     and the second row is the Dec coordinate (both in radians; in the International
     Celestial Reference System)
@@ -807,6 +1331,21 @@ def _raDecFromPixelCoords(xPix, yPix, chipName, camera=None,
     to positions on the celestial sphere.
     """
 
+    if out is not None:
+        return _convert_into(_raDecFromPixelCoords,
+                             dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                             dict(camera=camera, obs_metadata=obs_metadata, epoch=epoch,
+                                  includeDistortion=includeDistortion, workers=workers,
+                                  executor=executor),
+                             out)
+
+    if workers is not None or executor is not None:
+        return _run_in_chunks(_raDecFromPixelCoords,
+                              dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                              dict(camera=camera, obs_metadata=obs_metadata, epoch=epoch,
+                                   includeDistortion=includeDistortion),
+                              workers=workers, executor=executor)
+
     are_arrays, \
     chipNameList = _validate_inputs_and_chipname([xPix, yPix],
                                                  ['xPix', 'yPix'],
@@ -839,7 +1378,7 @@ def _raDecFromPixelCoords(xPix, yPix, chipName, camera=None,
 
 
 def focalPlaneCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
-                              obs_metadata=None, epoch=2000.0, camera=None):
+                              obs_metadata=None, epoch=2000.0, camera=None, out=None):
     """
     Get the focal plane coordinates for all objects in the catalog.
 
@@ -869,11 +1408,24 @@ def focalPlaneCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v
 
     @param [in] camera is an afw.cameraGeom camera object
 
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x
     focal plane coordinate and the second row is the y focal plane
     coordinate (both in millimeters)
     """
 
+    if out is not None:
+        return _convert_into(focalPlaneCoordsFromRaDec,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, epoch=epoch, camera=camera),
+                             out)
+
     if pm_ra is not None:
         pm_ra_out = radiansFromArcsec(pm_ra)
     else:
@@ -897,7 +1449,7 @@ def focalPlaneCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v
 
 
 def _focalPlaneCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
-                               obs_metadata=None, epoch=2000.0, camera=None):
+                               obs_metadata=None, epoch=2000.0, camera=None, out=None):
     """
     Get the focal plane coordinates for all objects in the catalog.
 
@@ -928,11 +1480,24 @@ def _focalPlaneCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None,
 
     @param [in] camera is an afw.cameraGeom camera object
 
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x
     focal plane coordinate and the second row is the y focal plane
     coordinate (both in millimeters)
     """
 
+    if out is not None:
+        return _convert_into(_focalPlaneCoordsFromRaDec,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, epoch=epoch, camera=camera),
+                             out)
+
     _validate_inputs([ra, dec], ['ra', 'dec'], 'focalPlaneCoordsFromRaDec')
 
     if epoch is None:
@@ -960,7 +1525,7 @@ def _focalPlaneCoordsFromRaDec(ra, dec, pm_ra=None, pm_dec=None, parallax=None,
     return focalPlaneCoordsFromPupilCoords(xPupil, yPupil, camera=camera)
 
 
-def focalPlaneCoordsFromPupilCoords(xPupil, yPupil, camera=None):
+def focalPlaneCoordsFromPupilCoords(xPupil, yPupil, camera=None, out=None):
     """
     Get the focal plane coordinates for all objects in the catalog.
 
@@ -972,33 +1537,39 @@ def focalPlaneCoordsFromPupilCoords(xPupil, yPupil, camera=None):
 
     @param [in] camera is an afw.cameraGeom camera object
 
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x
     focal plane coordinate and the second row is the y focal plane
     coordinate (both in millimeters)
     """
 
+    if out is not None:
+        return _convert_into(focalPlaneCoordsFromPupilCoords,
+                             dict(xPupil=xPupil, yPupil=yPupil),
+                             dict(camera=camera),
+                             out)
+
     are_arrays = _validate_inputs([xPupil, yPupil],
                                   ['xPupil', 'yPupil'], 'focalPlaneCoordsFromPupilCoords')
 
     if camera is None:
         raise RuntimeError("You cannot calculate focal plane coordinates without specifying a camera")
 
-    field_to_focal = camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE)
-
     if are_arrays:
-        pupil_point_list = [geom.Point2D(x,y) for x,y in zip(xPupil, yPupil)]
-        focal_point_list = field_to_focal.applyForward(pupil_point_list)
-        xFocal = np.array([pp.getX() for pp in focal_point_list])
-        yFocal = np.array([pp.getY() for pp in focal_point_list])
-
+        xFocal, yFocal = _transform_field_angle(camera, xPupil, yPupil)
         return np.array([xFocal, yFocal])
 
     # if not are_arrays
-    fpPoint = field_to_focal.applyForward(geom.Point2D(xPupil, yPupil))
-    return np.array([fpPoint.getX(), fpPoint.getY()])
+    xFocal, yFocal = _transform_field_angle(camera, np.array([xPupil]), np.array([yPupil]))
+    return np.array([xFocal[0], yFocal[0]])
 
 
-def pupilCoordsFromFocalPlaneCoords(xFocal, yFocal, camera=None):
+def pupilCoordsFromFocalPlaneCoords(xFocal, yFocal, camera=None, out=None):
     """
     Get the pupil coordinates in radians from the focal plane
     coordinates in millimeters
@@ -1011,11 +1582,23 @@ def pupilCoordsFromFocalPlaneCoords(xFocal, yFocal, camera=None):
 
     @param [in] camera is an afw.cameraGeom camera object
 
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x
     pupil coordinate and the second row is the y pupil
     coordinate (both in radians)
     """
 
+    if out is not None:
+        return _convert_into(pupilCoordsFromFocalPlaneCoords,
+                             dict(xFocal=xFocal, yFocal=yFocal),
+                             dict(camera=camera),
+                             out)
+
     are_arrays = _validate_inputs([xFocal, yFocal],
                                   ['xFocal', 'yFocal'],
                                   'pupilCoordsFromFocalPlaneCoords')
@@ -1023,13 +1606,8 @@ def pupilCoordsFromFocalPlaneCoords(xFocal, yFocal, camera=None):
     if camera is None:
         raise RuntimeError("You cannot calculate pupil coordinates without specifying a camera")
 
-    focal_to_field = camera.getTransformMap().getTransform(FOCAL_PLANE, FIELD_ANGLE)
-
     if are_arrays:
-        focal_point_list = [geom.Point2D(x,y) for x,y in zip(xFocal, yFocal)]
-        pupil_point_list = focal_to_field.applyForward(focal_point_list)
-        pupil_arr = np.array([[pp.getX(), pp.getY()]
-                              for pp in pupil_point_list]).transpose()
+        pupil_arr = np.array(_transform_field_angle(camera, xFocal, yFocal, inverse=True))
         is_nan = np.where(np.logical_or(np.isnan(xFocal), np.isnan(yFocal)))
         pupil_arr[0][is_nan] = np.NaN
         pupil_arr[1][is_nan] = np.NaN
@@ -1038,7 +1616,8 @@ def pupilCoordsFromFocalPlaneCoords(xFocal, yFocal, camera=None):
 
     # if not are_arrays
     if np.isfinite(xFocal) and np.isfinite(yFocal):
-        pupPoint = focal_to_field.applyForward(geom.Point2D(xFocal, yFocal))
-        return np.array([pupPoint.getX(), pupPoint.getY()])
+        xPupil, yPupil = _transform_field_angle(camera, np.array([xFocal]), np.array([yFocal]),
+                                                inverse=True)
+        return np.array([xPupil[0], yPupil[0]])
 
     return np.array([np.NaN, np.NaN])
@@ -1,8 +1,6 @@
 import numpy as np
 import lsst.geom as geom
-from lsst.afw.cameraGeom import FOCAL_PLANE, PIXELS, TAN_PIXELS
-from lsst.afw.cameraGeom import FIELD_ANGLE
-from lsst.sims.coordUtils import lsst_camera
+from lsst.sims.coordUtils import lsst_camera_snapshot
 
 
 __all__ = ["DMtoCameraPixelTransformer"]
@@ -11,7 +9,7 @@ __all__ = ["DMtoCameraPixelTransformer"]
 class DMtoCameraPixelTransformer(object):
 
     def __init__(self):
-        self._camera = lsst_camera()
+        self._snapshot = lsst_camera_snapshot()
 
     def getBBox(self, detector_name):
         """
@@ -21,11 +19,9 @@ class DMtoCameraPixelTransformer(object):
             self._bbox_cache = {}
 
         if detector_name not in self._bbox_cache:
-            dm_bbox = self._camera[detector_name].getBBox()
-            dm_min = dm_bbox.getMin()
-            dm_max = dm_bbox.getMax()
-            cam_bbox = geom.Box2I(minimum=geom.Point2I(dm_min[1], dm_min[0]),
-                                  maximum=geom.Point2I(dm_max[1], dm_max[0]))
+            dm_bbox = self._snapshot.bbox[self._snapshot.getIndex(detector_name)]
+            cam_bbox = geom.Box2I(minimum=geom.Point2I(int(dm_bbox[1]), int(dm_bbox[0])),
+                                  maximum=geom.Point2I(int(dm_bbox[3]), int(dm_bbox[2])))
 
             self._bbox_cache[detector_name] = cam_bbox
 
@@ -39,13 +35,49 @@ class DMtoCameraPixelTransformer(object):
              self._center_pixel_cache = {}
 
          if detector_name not in self._center_pixel_cache:
-             centerPoint = self._camera[detector_name].getCenter(FOCAL_PLANE)
-             centerPixel_dm = self._camera[detector_name].getTransform(FOCAL_PLANE, PIXELS).applyForward(centerPoint)
-             centerPixel_cam = geom.Point2D(centerPixel_dm.getY(), centerPixel_dm.getX())
+             centerPixel_dm = self._snapshot.center_pixel[self._snapshot.getIndex(detector_name)]
+             centerPixel_cam = geom.Point2D(centerPixel_dm[1], centerPixel_dm[0])
              self._center_pixel_cache[detector_name] = centerPixel_cam
 
          return self._center_pixel_cache[detector_name]
 
+    def _cameraCenterX(self, chipName):
+        """
+        Return the Camera team x coordinate of the central pixel of the
+        detector(s) designated by chipName (a name or chip code, or a list
+        or numpy array of them).  Returns a number if chipName is a single
+        value and a numpy array if it is a list or array.  Points on no
+        detector (chipName None or chip code -1) get NaN.
+
+        The centers are gathered from a table indexed by chip code, so
+        this is one pass over chipName no matter how many detectors it
+        contains.
+        """
+        if not hasattr(self, '_center_x_table'):
+            # the extra entry at the end is picked up by chip code -1
+            self._center_x_table = np.append(self._snapshot.center_pixel[:, 1], np.nan)
+
+        are_arrays = isinstance(chipName, list) or isinstance(chipName, np.ndarray)
+        if are_arrays:
+            chip_list = chipName
+        else:
+            chip_list = [chipName]
+
+        # (this does not use CameraUtils._as_chip_codes, so that this
+        # class can be used without importing afw.cameraGeom)
+        codes = np.asarray(chip_list)
+        if codes.dtype.kind in ('i', 'u'):
+            if len(codes) > 0 and (codes.min() < -1 or codes.max() >= len(self._snapshot.names)):
+                raise RuntimeError("DMtoCameraPixelTransformer was passed chip codes outside "
+                                   "of the range [-1, %d]" % (len(self._snapshot.names)-1))
+        else:
+            codes = self._snapshot.getIndices(chip_list)
+
+        center_x = self._center_x_table[codes]
+        if are_arrays:
+            return center_x
+        return center_x[0]
+
     def cameraPixFromDMPix(self, dm_xPix, dm_yPix, chipName):
         """
         Convert DM pixel coordinates into camera pixel coordinates
@@ -59,12 +91,11 @@ class DMtoCameraPixelTransformer(object):
         a number or an array)
 
         chipName designates the names of the chips on which the pixel
-        coordinates will be reckoned.  Can be either single value, an array, or None.
-        If an array, there must be as many chipNames as there are (RA, Dec) pairs.
+        coordinates will be reckoned.  Can be either single value or an array.
+        If an array, there must be as many chipNames as there are pixel coordinates.
         If a single value, all of the pixel coordinates will be reckoned on the same
-        chip.  If None, this method will calculate which chip each(RA, Dec) pair actually
-        falls on, and return pixel coordinates for each (RA, Dec) pair on the appropriate
-        chip.  Default is None.
+        chip.  Integer chip codes (see chipCodeFromChipName) can be passed in place
+        of chip names.  Points whose chipName is None (or chip code -1) get NaN.
 
         Returns
         -------
@@ -73,15 +104,7 @@ class DMtoCameraPixelTransformer(object):
         are defined in the Camera team system, rather than the DM system.
         """
         cam_yPix = dm_xPix
-
-        if isinstance(chipName, list) or isinstance(chipName, np.ndarray):
-            cam_xPix = np.zeros(len(dm_xPix))
-            for ix, (det_name, yy) in enumerate(zip(chipName, dm_yPix)):
-                cam_center_pix = self.getCenterPixel(det_name)
-                cam_xPix[ix] = 2.0*cam_center_pix.getX() - dm_yPix
-        else:
-            cam_center_pix = self.getCenterPixel(chipName)
-            cam_xPix = 2.0*cam_center_pix.getX() - dm_yPix
+        cam_xPix = 2.0*self._cameraCenterX(chipName) - dm_yPix
 
         return cam_xPix, cam_yPix
 
@@ -101,6 +124,8 @@ class DMtoCameraPixelTransformer(object):
         are defined.  This can be a list (in which case there should be one chip name
         for each (cam_xpix, cam_ypix) coordinate pair), or a single value (in which
         case, all of the (cam_xpix, cam_ypi) points will be reckoned on that chip).
+        Integer chip codes (see chipCodeFromChipName) can be passed in place of chip
+        names.  Points whose chipName is None (or chip code -1) get NaN.
 
         Returns
         -------
@@ -112,18 +137,6 @@ class DMtoCameraPixelTransformer(object):
         """
 
         dm_x_pix = cam_y_pix
-        if isinstance(chipName, list) or isinstance(chipName, np.ndarray):
-            center_pix_dict = {}
-            dm_y_pix = np.zeros(len(cam_x_pix))
-            for ix, (det_name, xx) in enumerate(zip(chipName, cam_x_pix)):
-                if det_name not in center_pix_dict:
-                    center_pix = self.getCenterPixel(det_name)
-                    center_pix_dict[det_name] = center_pix
-                else:
-                    center_pix = center_pix_dict[det_name]
-                dm_y_pix[ix] = 2.0*center_pix[0]-xx
-        else:
-            center_pix = self.getCenterPixel(chipName)
-            dm_y_pix = 2.0*center_pix[0] - cam_x_pix
+        dm_y_pix = 2.0*self._cameraCenterX(chipName) - cam_x_pix
 
         return dm_x_pix, dm_y_pix
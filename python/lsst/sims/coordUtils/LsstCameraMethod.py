@@ -1,8 +1,13 @@
-from lsst.obs.lsstSim import LsstSimMapper
-import lsst.log as lsstLog
+import os
+import hashlib
+import warnings
+from lsst.utils import getPackageDir
+from lsst.sims.coordUtils import getCacheDir
+from lsst.sims.coordUtils import CameraGeometrySnapshot
 
 
-__all__ = ["lsst_camera"]
+__all__ = ["lsst_camera", "lsst_camera_snapshot", "lsst_distortion_model",
+           "_lsst_camera_key"]
 
 
 def lsst_camera():
@@ -10,7 +15,110 @@ def lsst_camera():
     Return a copy of the LSST Camera model as stored in obs_lsstSim.
     """
     if not hasattr(lsst_camera, '_lsst_camera'):
+        # obs_lsstSim is slow to import; only do so when the
+        # afw.cameraGeom model is actually needed
+        from lsst.obs.lsstSim import LsstSimMapper
+        import lsst.log as lsstLog
         lsstLog.setLevel('CameraMapper', lsstLog.WARN)
         lsst_camera._lsst_camera = LsstSimMapper().camera
 
     return lsst_camera._lsst_camera
+
+
+def _lsst_camera_key():
+    """
+    Return a hex digest of the contents of the files in obs_lsstSim from
+    which LsstSimMapper builds the LSST camera model (everything in its
+    policy and description directories).  Data products derived from the
+    camera geometry are keyed on this, so that they are regenerated
+    whenever obs_lsstSim is upgraded or rebuilt, even in place.  Reading
+    these files is much cheaper than instantiating LsstSimMapper.
+    """
+    if not hasattr(_lsst_camera_key, '_key'):
+        obs_dir = getPackageDir('obs_lsstSim')
+        hasher = hashlib.sha1()
+        n_files = 0
+        for sub_dir in ('policy', 'description'):
+            for dir_path, dir_names, file_names in os.walk(os.path.join(obs_dir, sub_dir)):
+                dir_names[:] = sorted(name for name in dir_names if name != '__pycache__')
+                for name in sorted(file_names):
+                    if name.endswith('.pyc'):
+                        continue
+                    file_name = os.path.join(dir_path, name)
+                    hasher.update(('%s\n' % os.path.relpath(file_name, obs_dir)).encode('utf-8'))
+                    with open(file_name, 'rb') as file_obj:
+                        for block in iter(lambda: file_obj.read(1 << 20), b''):
+                            hasher.update(block)
+                    n_files += 1
+
+        if n_files == 0:
+            raise RuntimeError("Could not find the camera description files "
+                               "of obs_lsstSim in %s" % obs_dir)
+
+        _lsst_camera_key._key = hasher.hexdigest()[:16]
+
+    return _lsst_camera_key._key
+
+
+def lsst_camera_snapshot():
+    """
+    Return a CameraGeometrySnapshot of the LSST Camera model.
+
+    The snapshot is read from the file named by the environment variable
+    SIMS_COORDUTILS_LSST_SNAPSHOT, if it is set.  Otherwise, it is read
+    from a file in getCacheDir() whose name is keyed on the contents of the
+    camera description files in obs_lsstSim (see _lsst_camera_key), so a
+    rebuilt or upgraded obs_lsstSim never reuses the snapshot of a previous
+    camera geometry.  If that file does not exist, the snapshot is
+    made from lsst_camera() and written to that file, so that future
+    processes need not instantiate LsstSimMapper.
+    """
+    if not hasattr(lsst_camera_snapshot, '_snapshot'):
+        file_name = os.environ.get('SIMS_COORDUTILS_LSST_SNAPSHOT', None)
+        if file_name is not None:
+            lsst_camera_snapshot._snapshot = CameraGeometrySnapshot.read(file_name)
+        else:
+            file_name = os.path.join(getCacheDir(),
+                                     'lsst_camera_snapshot_v%d_%s.npz' %
+                                     (CameraGeometrySnapshot._format_version,
+                                      _lsst_camera_key()))
+
+            snapshot = None
+            if os.path.exists(file_name):
+                try:
+                    snapshot = CameraGeometrySnapshot.read(file_name)
+                except (IOError, OSError, KeyError, ValueError, RuntimeError):
+                    snapshot = None
+
+            if snapshot is None:
+                snapshot = CameraGeometrySnapshot.from_camera(lsst_camera())
+                try:
+                    if not os.path.exists(os.path.dirname(file_name)):
+                        os.makedirs(os.path.dirname(file_name))
+                    snapshot.write(file_name)
+                except (IOError, OSError) as err:
+                    warnings.warn("lsst_camera_snapshot could not write %s:\n%s" %
+                                  (file_name, str(err)))
+
+            lsst_camera_snapshot._snapshot = snapshot
+
+    return lsst_camera_snapshot._snapshot
+
+
+def lsst_distortion_model():
+    """
+    Return the LsstZernikeFitter modeling the filter-dependent optical
+    distortions of the LSST camera.
+
+    There is one instance of this model per process, shared by all
+    of the LSST-specific methods in LsstCameraUtils, so that converting
+    both to and from the focal plane only reads and fits the PhoSim
+    data once.  It is deleted by clean_up_lsst_camera().
+    """
+    if not hasattr(lsst_distortion_model, '_z_fitter'):
+        # imported here to avoid a circular import;
+        # LsstZernikeFitter needs lsst_camera()
+        from lsst.sims.coordUtils import LsstZernikeFitter
+        lsst_distortion_model._z_fitter = LsstZernikeFitter()
+
+    return lsst_distortion_model._z_fitter
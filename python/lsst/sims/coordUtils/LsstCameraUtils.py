@@ -3,17 +3,14 @@ from builtins import zip
 from builtins import range
 import numpy as np
 import numbers
-import lsst.geom as geom
-from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE, PIXELS, WAVEFRONT
-from lsst.sims.coordUtils import lsst_camera
-from lsst.sims.coordUtils import focalPlaneCoordsFromPupilCoords
-from lsst.sims.coordUtils import LsstZernikeFitter
-from lsst.sims.coordUtils import pupilCoordsFromPixelCoords, pixelCoordsFromPupilCoords
-from lsst.sims.coordUtils import pupilCoordsFromFocalPlaneCoords
-from lsst.sims.coordUtils import pupilCoordsFromPixelCoords
+from lsst.sims.coordUtils import lsst_camera, lsst_camera_snapshot
+from lsst.sims.coordUtils import lsst_distortion_model
+from lsst.sims.coordUtils import _radial_field_transform, _camera_snapshot
 from lsst.sims.utils import _pupilCoordsFromRaDec
 from lsst.sims.utils import _raDecFromPupilCoords
-from lsst.sims.coordUtils import getCornerPixels, _validate_inputs_and_chipname
+from lsst.sims.coordUtils import _validate_inputs_and_chipname, _validate_dtype
+from lsst.sims.coordUtils import _as_chip_codes, _detector_name_table, _group_by_chip
+from lsst.sims.coordUtils import _run_in_chunks, _convert_into
 from lsst.sims.utils.CodeUtilities import _validate_inputs
 from lsst.sims.utils import radiansFromArcsec
 
@@ -26,22 +23,40 @@ __all__ = ["focalPlaneCoordsFromPupilCoordsLSST",
            "pupilCoordsFromPixelCoordsLSST",
            "_pixelCoordsFromRaDecLSST", "pixelCoordsFromRaDecLSST",
            "_raDecFromPixelCoordsLSST", "raDecFromPixelCoordsLSST",
+           "cameraCoordsFromPupilCoordsLSST",
+           "_cameraCoordsFromRaDecLSST", "cameraCoordsFromRaDecLSST",
            "clean_up_lsst_camera"]
 
+# the columns that can be returned by cameraCoordsFromPupilCoordsLSST
+# (in the order in which they are computed)
+_camera_coord_columns = ('xPupil', 'yPupil', 'xFocal', 'yFocal', 'chipName', 'chipCode',
+                         'xPix', 'yPix')
+
 def clean_up_lsst_camera():
     """
     Delete member objects associated with the methods below
     """
-    if hasattr(focalPlaneCoordsFromPupilCoordsLSST, '_z_fitter'):
-        del focalPlaneCoordsFromPupilCoordsLSST._z_fitter
-    if hasattr(pupilCoordsFromFocalPlaneCoordsLSST, '_z_fitter'):
-        del pupilCoordsFromFocalPlaneCoordsLSST._z_fitter
-    if hasattr(chipNameFromPupilCoordsLSST, '_detector_arr'):
-        del chipNameFromPupilCoordsLSST._detector_arr
+    if hasattr(lsst_distortion_model, '_z_fitter'):
+        del lsst_distortion_model._z_fitter
+    if hasattr(chipNameFromPupilCoordsLSST, '_focal_map'):
+        del chipNameFromPupilCoordsLSST._focal_map
+    if hasattr(chipNameFromPupilCoordsLSST, '_chip_grid'):
+        del chipNameFromPupilCoordsLSST._chip_grid
+    if hasattr(chipNameFromPupilCoordsLSST, '_chip_raster'):
+        del chipNameFromPupilCoordsLSST._chip_raster
     if hasattr(lsst_camera, '_lsst_camera'):
         del lsst_camera._lsst_camera
-
-def focalPlaneCoordsFromPupilCoordsLSST(xPupil, yPupil, band='r'):
+    if hasattr(lsst_camera_snapshot, '_snapshot'):
+        del lsst_camera_snapshot._snapshot
+    if hasattr(_radial_field_transform, '_cache'):
+        del _radial_field_transform._cache
+    if hasattr(_camera_snapshot, '_cache'):
+        del _camera_snapshot._cache
+    if hasattr(_detector_name_table, '_cache'):
+        del _detector_name_table._cache
+
+def focalPlaneCoordsFromPupilCoordsLSST(xPupil, yPupil, band='r', dtype=np.float64,
+                                        out=None):
     """
     Get the focal plane coordinates for all objects in the catalog.
 
@@ -55,6 +70,16 @@ def focalPlaneCoordsFromPupilCoordsLSST(xPupil, yPupil, band='r'):
 
     band -- the filter being simulated (default='r')
 
+    dtype -- the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64).  np.float32 is faster and
+    uses half the memory, at the cost of precision (~1e-5 mm on the focal
+    plane; a few 1e-3 pixels)
+
+    out -- an optional preallocated output (default None): a numpy array of shape
+    (2, N), or a tuple of two arrays of length N (e.g. two fields of a structured
+    array, or np.memmaps).  The objects are converted in chunks which are written
+    into out, so no temporary arrays of length N are allocated, and out is returned.
+
     Returns
     --------
     a 2-D numpy array in which the first row is the x
@@ -62,26 +87,34 @@ def focalPlaneCoordsFromPupilCoordsLSST(xPupil, yPupil, band='r'):
     coordinate (both in millimeters)
     """
 
-    if not hasattr(focalPlaneCoordsFromPupilCoordsLSST, '_z_fitter'):
-        focalPlaneCoordsFromPupilCoordsLSST._z_fitter = LsstZernikeFitter()
+    if out is not None:
+        return _convert_into(focalPlaneCoordsFromPupilCoordsLSST,
+                             dict(xPupil=xPupil, yPupil=yPupil),
+                             dict(band=band, dtype=dtype),
+                             out)
+
+    dtype = _validate_dtype(dtype, 'focalPlaneCoordsFromPupilCoordsLSST')
+    _validate_inputs([xPupil, yPupil], ['xPupil', 'yPupil'],
+                     'focalPlaneCoordsFromPupilCoordsLSST')
 
     if isinstance(xPupil, numbers.Number):
         if np.isnan(xPupil) or np.isnan(yPupil):
-            return np.array([np.NaN, np.NaN])
+            return np.array([np.NaN, np.NaN], dtype=dtype)
 
-    z_fitter = focalPlaneCoordsFromPupilCoordsLSST._z_fitter
-    x_f0, y_f0 = focalPlaneCoordsFromPupilCoords(xPupil, yPupil, camera=lsst_camera())
-    dx, dy = z_fitter.dxdy(x_f0, y_f0, band)
+    z_fitter = lsst_distortion_model()
+    x_f0, y_f0 = lsst_camera_snapshot().focalPlaneFromFieldAngle(xPupil, yPupil, dtype=dtype)
+    dx, dy = z_fitter.dxdy(x_f0, y_f0, band, dtype=dtype)
 
     if not isinstance(xPupil, numbers.Number):
         nan_dex = np.where(np.logical_or(np.isnan(xPupil), np.isnan(yPupil)))
         x_f0[nan_dex] = np.NaN
         y_f0[nan_dex] = np.NaN
 
-    return np.array([x_f0+dx, y_f0+dy])
+    return np.array([x_f0+dx, y_f0+dy], dtype=dtype)
 
 
-def pupilCoordsFromFocalPlaneCoordsLSST(xmm, ymm, band='r'):
+def pupilCoordsFromFocalPlaneCoordsLSST(xmm, ymm, band='r', dtype=np.float64,
+                                        out=None):
     """
     Convert mm on the focal plane to radians on the pupil.
 
@@ -97,31 +130,49 @@ def pupilCoordsFromFocalPlaneCoordsLSST(xmm, ymm, band='r'):
 
     band -- the filter we are simulating (default='r')
 
+    dtype -- the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64).  np.float32 is faster and
+    uses half the memory, at the cost of precision (~1e-5 mm on the focal
+    plane; a few 1e-3 pixels)
+
+    out -- an optional preallocated output (default None): a numpy array of shape
+    (2, N), or a tuple of two arrays of length N (e.g. two fields of a structured
+    array, or np.memmaps).  The objects are converted in chunks which are written
+    into out, so no temporary arrays of length N are allocated, and out is returned.
+
     Returns
     -------
     a 2-D numpy array in which the first row is the x
     pupil coordinate and the second row is the y pupil
     coordinate (both in radians)
     """
-    if not hasattr(pupilCoordsFromFocalPlaneCoordsLSST, '_z_fitter'):
-        pupilCoordsFromFocalPlaneCoordsLSST._z_fitter = LsstZernikeFitter()
+
+    if out is not None:
+        return _convert_into(pupilCoordsFromFocalPlaneCoordsLSST,
+                             dict(xmm=xmm, ymm=ymm),
+                             dict(band=band, dtype=dtype),
+                             out)
+
+    dtype = _validate_dtype(dtype, 'pupilCoordsFromFocalPlaneCoordsLSST')
+    _validate_inputs([xmm, ymm], ['xmm', 'ymm'],
+                     'pupilCoordsFromFocalPlaneCoordsLSST')
 
     if isinstance(xmm, numbers.Number):
         if np.isnan(xmm) or np.isnan(ymm):
-            return np.array([np.NaN, np.NaN])
+            return np.array([np.NaN, np.NaN], dtype=dtype)
 
-    z_fitter = pupilCoordsFromFocalPlaneCoordsLSST._z_fitter
-    dx, dy = z_fitter.dxdy_inverse(xmm, ymm, band)
+    z_fitter = lsst_distortion_model()
+    dx, dy = z_fitter.dxdy_inverse(xmm, ymm, band, dtype=dtype)
     x_f1 = xmm + dx
     y_f1 = ymm + dy
-    xp, yp = pupilCoordsFromFocalPlaneCoords(x_f1, y_f1, camera=lsst_camera())
+    xp, yp = lsst_camera_snapshot().fieldAngleFromFocalPlane(x_f1, y_f1, dtype=dtype)
 
     if not isinstance(xmm, numbers.Number):
         nan_dex = np.where(np.logical_or(np.isnan(xmm), np.isnan(ymm)))
         xp[nan_dex] = np.NaN
         yp[nan_dex] = np.NaN
 
-    return np.array([xp, yp])
+    return np.array([xp, yp], dtype=dtype)
 
 
 def _build_lsst_focal_coord_map():
@@ -134,67 +185,239 @@ def _build_lsst_focal_coord_map():
     _lsst_focal_coord_map['dp'] contains the radius (in mm) of the circle containing each chip
     """
 
-    camera = lsst_camera()
-
-    name_list = []
-    x_pix_list = []
-    y_pix_list = []
-    x_mm_list = []
-    y_mm_list = []
-    n_chips = 0
-    for chip in camera:
-        chip_name = chip.getName()
-        pixels_to_focal = chip.getTransform(PIXELS, FOCAL_PLANE)
-        n_chips += 1
-        corner_list = getCornerPixels(chip_name, lsst_camera())
-        for corner in corner_list:
-            x_pix_list.append(corner[0])
-            y_pix_list.append(corner[1])
-            pixel_pt = geom.Point2D(corner[0], corner[1])
-            focal_pt = pixels_to_focal.applyForward(pixel_pt)
-            x_mm_list.append(focal_pt.getX())
-            y_mm_list.append(focal_pt.getY())
-            name_list.append(chip_name)
-
-    x_pix_list = np.array(x_pix_list)
-    y_pix_list = np.array(y_pix_list)
-    x_mm_list = np.array(x_mm_list)
-    y_mm_list = np.array(y_mm_list)
-
-    center_x = np.zeros(n_chips, dtype=float)
-    center_y = np.zeros(n_chips, dtype=float)
-    extent = np.zeros(n_chips, dtype=float)
-    final_name = []
-    for ix_ct in range(n_chips):
-        ix = ix_ct*4
-        chip_name = name_list[ix]
-        xx = 0.25*(x_mm_list[ix] + x_mm_list[ix+1] +
-                   x_mm_list[ix+2] + x_mm_list[ix+3])
-
-        yy = 0.25*(y_mm_list[ix] + y_mm_list[ix+1] +
-                   y_mm_list[ix+2] + y_mm_list[ix+3])
-
-        dx = 0.25*np.array([np.sqrt(np.power(xx-x_mm_list[ix+ii], 2) +
-                                    np.power(yy-y_mm_list[ix+ii], 2)) for ii in range(4)]).sum()
-
-        center_x[ix_ct] = xx
-        center_y[ix_ct] = yy
-        extent[ix_ct] = dx
-        final_name.append(chip_name)
-
-    final_name = np.array(final_name)
+    snapshot = lsst_camera_snapshot()
+    n_chips = len(snapshot.names)
+
+    # the corners of each chip in pixel coordinates, in the order
+    # [(xmin, ymin), (xmin, ymax), (xmax, ymin), (xmax, ymax)]
+    # (see getCornerPixels in CameraUtils.py)
+    bbox = snapshot.bbox
+    x_pix_list = bbox[:, [0, 0, 2, 2]].astype(float)
+    y_pix_list = bbox[:, [1, 3, 1, 3]].astype(float)
+    chip_index = np.repeat(np.arange(n_chips), 4).reshape(n_chips, 4)
+
+    x_mm_list, y_mm_list = snapshot.focalPlaneFromPixels(x_pix_list, y_pix_list, chip_index)
+
+    center_x = 0.25*(x_mm_list[:, 0] + x_mm_list[:, 1] +
+                     x_mm_list[:, 2] + x_mm_list[:, 3])
+
+    center_y = 0.25*(y_mm_list[:, 0] + y_mm_list[:, 1] +
+                     y_mm_list[:, 2] + y_mm_list[:, 3])
+
+    extent = 0.25*np.sqrt(np.power(center_x[:, None]-x_mm_list, 2) +
+                          np.power(center_y[:, None]-y_mm_list, 2)).sum(axis=1)
 
     lsst_focal_coord_map = {}
-    lsst_focal_coord_map['name'] = final_name
+    lsst_focal_coord_map['name'] = np.array(snapshot.names)
     lsst_focal_coord_map['xx'] = center_x
     lsst_focal_coord_map['yy'] = center_y
     lsst_focal_coord_map['dp'] = extent
     return lsst_focal_coord_map
 
 
-def _findDetectorsListLSST(focalPointList, detectorList, possible_points,
-                           allow_multiple_chips=False):
-    """!Find the detectors that cover a list of points specified by x and y coordinates in any system
+def _build_lsst_chip_grid(focal_map, rr_lim_list):
+    """
+    Build a uniform grid on the LSST focal plane that maps each cell to the
+    detectors whose candidate circles (radius rr_lim_list about the centers
+    in focal_map) overlap that cell.
+
+    Returns a dict.
+    'x_min', 'y_min' are the focal plane coordinates (mm) of the corner of the grid
+    'cell_size' is the side of each (square) cell in mm
+    'nx', 'ny' are the number of cells in each direction
+    'detectors' is a numpy array of the detector indices overlapping each cell,
+    cell by cell; the detectors overlapping cell ii are
+    detectors[start[ii]:start[ii+1]]
+    'start' is a numpy array of length nx*ny+1 indexing 'detectors'
+    """
+    x_cam_list = focal_map['xx']
+    y_cam_list = focal_map['yy']
+
+    # the grid covers every candidate circle, so that points
+    # outside of the grid cannot be on any detector
+    x_min = (x_cam_list-rr_lim_list).min()
+    y_min = (y_cam_list-rr_lim_list).min()
+    x_max = (x_cam_list+rr_lim_list).max()
+    y_max = (y_cam_list+rr_lim_list).max()
+
+    cell_size = 0.5*rr_lim_list.min()
+    nx = int(np.ceil((x_max-x_min)/cell_size))
+    ny = int(np.ceil((y_max-y_min)/cell_size))
+
+    # distance from each detector center to the nearest point in each cell
+    cell_x0 = x_min + cell_size*np.arange(nx)
+    cell_y0 = y_min + cell_size*np.arange(ny)
+    dx = np.clip(x_cam_list[None, :], cell_x0[:, None], cell_x0[:, None]+cell_size)
+    dx -= x_cam_list[None, :]
+    dy = np.clip(y_cam_list[None, :], cell_y0[:, None], cell_y0[:, None]+cell_size)
+    dy -= y_cam_list[None, :]
+
+    # overlap[ix, iy, i_chip]; cells are numbered ix*ny + iy
+    overlap = (dx[:, None, :]**2 + dy[None, :, :]**2) <= rr_lim_list**2
+    overlap = overlap.reshape(nx*ny, len(x_cam_list))
+
+    chip_grid = {}
+    chip_grid['x_min'] = x_min
+    chip_grid['y_min'] = y_min
+    chip_grid['cell_size'] = cell_size
+    chip_grid['nx'] = nx
+    chip_grid['ny'] = ny
+    chip_grid['start'] = np.concatenate([[0], np.cumsum(overlap.sum(axis=1))])
+    chip_grid['detectors'] = np.where(overlap)[1]
+    return chip_grid
+
+
+def _build_lsst_chip_raster(chip_grid, cell_size=0.5):
+    """
+    Build a raster of the detectors on the LSST focal plane.
+
+    Each cell of the raster (cell_size mm on a side) is either 'interior',
+    meaning that every point in the cell lands on the same detector (or on
+    no detector at all), or 'boundary', meaning that the cell may straddle
+    the edge of a detector.  Because FOCAL_PLANE->PIXELS is affine on each
+    detector, the pixel coordinates of the points in a cell are bounded by
+    the pixel coordinates of the cell's center plus the image of the cell's
+    half-width.  A cell is only interior if those bounds lie entirely
+    inside (or outside) each detector's bounding box by at least 0.1 pixels,
+    far more than the round-off in the pixel coordinates (even in single
+    precision).
+
+    The raster covers the same area as chip_grid (see _build_lsst_chip_grid).
+
+    Returns a dict.
+    'x_min', 'y_min', 'cell_size', 'nx', 'ny' define the raster as in chip_grid
+    'code' is a numpy array of shape (nx, ny).  code[ix][iy] is the index of
+    the detector covering the whole cell, -1 if no detector touches the cell,
+    or -2 if the cell is a boundary cell
+    """
+    snapshot = lsst_camera_snapshot()
+    margin = 0.1
+
+    x_min = chip_grid['x_min']
+    y_min = chip_grid['y_min']
+    nx = int(np.ceil(chip_grid['nx']*chip_grid['cell_size']/cell_size))
+    ny = int(np.ceil(chip_grid['ny']*chip_grid['cell_size']/cell_size))
+
+    # the number of detectors that might touch each cell and
+    # the detector (if any) that certainly covers each cell
+    n_touch = np.zeros((nx, ny), dtype=int)
+    covered_by = np.zeros((nx, ny), dtype=int) - 1
+
+    for i_det, (coeffs, bbox) in enumerate(zip(snapshot.focal_to_pixels, snapshot.bbox)):
+        # the bounds of geom.Box2D(detector.getBBox())
+        x_lo = bbox[0] - 0.5
+        y_lo = bbox[1] - 0.5
+        x_hi = bbox[2] + 0.5
+        y_hi = bbox[3] + 0.5
+
+        # the cells within one cell of the detector on the focal plane
+        # (all other cells are certainly off of this detector)
+        x_corner, y_corner = snapshot.focalPlaneFromPixels(np.array([x_lo, x_lo, x_hi, x_hi]),
+                                                           np.array([y_lo, y_hi, y_lo, y_hi]),
+                                                           i_det)
+        ix_min = max(0, int(np.floor((x_corner.min()-x_min)/cell_size))-1)
+        ix_max = min(nx, int(np.ceil((x_corner.max()-x_min)/cell_size))+1)
+        iy_min = max(0, int(np.floor((y_corner.min()-y_min)/cell_size))-1)
+        iy_max = min(ny, int(np.ceil((y_corner.max()-y_min)/cell_size))+1)
+        if ix_min >= ix_max or iy_min >= iy_max:
+            continue
+
+        x_center, y_center = np.meshgrid(x_min + cell_size*(np.arange(ix_min, ix_max)+0.5),
+                                         y_min + cell_size*(np.arange(iy_min, iy_max)+0.5),
+                                         indexing='ij')
+
+        x_pix, y_pix = snapshot.pixelsFromFocalPlane(x_center, y_center, i_det)
+
+        # the half-width in pixels of the image of a cell
+        half_x = 0.5*cell_size*(np.abs(coeffs[0][0]) + np.abs(coeffs[0][1])) + margin
+        half_y = 0.5*cell_size*(np.abs(coeffs[1][0]) + np.abs(coeffs[1][1])) + margin
+
+        touches = ((x_pix > x_lo-half_x) & (x_pix < x_hi+half_x) &
+                   (y_pix > y_lo-half_y) & (y_pix < y_hi+half_y))
+
+        covers = ((x_pix > x_lo+half_x) & (x_pix < x_hi-half_x) &
+                  (y_pix > y_lo+half_y) & (y_pix < y_hi-half_y))
+
+        n_touch[ix_min:ix_max, iy_min:iy_max] += touches
+        covered_by[ix_min:ix_max, iy_min:iy_max][covers] = i_det
+
+    code = np.zeros((nx, ny), dtype=np.int16) - 2
+    code[n_touch == 0] = -1
+    interior = np.where(np.logical_and(n_touch == 1, covered_by >= 0))
+    code[interior] = covered_by[interior]
+
+    chip_raster = {}
+    chip_raster['x_min'] = x_min
+    chip_raster['y_min'] = y_min
+    chip_raster['cell_size'] = cell_size
+    chip_raster['nx'] = nx
+    chip_raster['ny'] = ny
+    chip_raster['code'] = code
+    return chip_raster
+
+
+def _findPossiblePointsLSST(xFocal, yFocal):
+    """
+    Find the points that could be on each detector of the LSST camera,
+    i.e. the points within 1.1 detector radii of the center of each
+    detector.
+
+    Rather than testing every point against every detector, this looks
+    up the few detectors near each point in the grid built by
+    _build_lsst_chip_grid, so that the cost scales with the number of
+    points rather than with the number of points times the number of
+    detectors.
+
+    @param [in] xFocal is a numpy array of the x focal plane coordinates (mm)
+
+    @param [in] yFocal is a numpy array of the y focal plane coordinates (mm)
+
+    @param [out] possible_points, a list of numpy arrays.  possible_points[ii]
+    contains the (sorted) indices of the points that could be on the ii-th
+    detector in lsst_camera_snapshot().names
+    """
+    focal_map = chipNameFromPupilCoordsLSST._focal_map
+    chip_grid = chipNameFromPupilCoordsLSST._chip_grid
+    x_cam_list = focal_map['xx']
+    y_cam_list = focal_map['yy']
+    rrsq_lim_list = (1.1*focal_map['dp'])**2
+
+    with np.errstate(invalid='ignore'):
+        ix = np.floor((xFocal.astype(float)-chip_grid['x_min'])/chip_grid['cell_size'])
+        iy = np.floor((yFocal.astype(float)-chip_grid['y_min'])/chip_grid['cell_size'])
+        in_grid = np.where((ix >= 0) & (ix < chip_grid['nx']) &
+                           (iy >= 0) & (iy < chip_grid['ny']))[0]
+
+    cell = ix[in_grid].astype(int)*chip_grid['ny'] + iy[in_grid].astype(int)
+
+    # expand each point into one (point, detector) pair per
+    # detector overlapping its cell
+    start = chip_grid['start'][cell]
+    n_candidates = chip_grid['start'][cell+1] - start
+    pair_start = np.cumsum(n_candidates) - n_candidates
+    pt_dex = np.repeat(in_grid, n_candidates)
+    offset = np.arange(len(pt_dex)) - np.repeat(pair_start, n_candidates)
+    det_dex = chip_grid['detectors'][np.repeat(start, n_candidates) + offset]
+
+    # the exact test of the brute force search
+    is_possible = (((xFocal[pt_dex] - x_cam_list[det_dex])**2 +
+                    (yFocal[pt_dex] - y_cam_list[det_dex])**2) < rrsq_lim_list[det_dex])
+
+    pt_dex = pt_dex[is_possible]
+    det_dex = det_dex[is_possible]
+
+    # group the points by detector (the points in each group stay
+    # in ascending order)
+    possible_points = [np.zeros(0, dtype=int)]*len(x_cam_list)
+    for i_det, pair_dex in _group_by_chip(det_dex):
+        possible_points[i_det] = pt_dex[pair_dex]
+
+    return possible_points
+
+
+def _findDetectorsListLSST(xFocal, yFocal, possible_points,
+                           allow_multiple_chips=False, dtype=np.float64, as_codes=False):
+    """!Find the detectors that cover a list of points specified by focal plane coordinates
 
     This is based one afw.camerGeom.camera.findDetectorsList.  It has been optimized for the LSST
     camera in the following way:
@@ -203,15 +426,22 @@ def _findDetectorsListLSST(focalPointList, detectorList, possible_points,
           constructed by comparing the pupil coordinates in question and comparing to the
           pupil coordinates of the center of each detector)
 
-       - it will stop looping through detectors one it has found one that is correct (the LSST
-         camera does not allow an object to fall on more than one detector)
+       - it will stop looking for a point once it has found one detector that contains it
+         (the LSST camera does not allow an object to fall on more than one detector)
+
+       - it tests all of the candidate points of each detector at once with numpy, so that
+         the loop in Python is over detectors, not points
 
-    @param[in] focalPointList  a list of points in FOCAL_PLANE coordinates
+       - it uses the numpy representation of the camera provided by lsst_camera_snapshot(),
+         rather than afw.cameraGeom
 
-    @param[in] detectorList is a list of the afwCameraGeom detector objects being considered
+    @param[in] xFocal is a numpy array of the x FOCAL_PLANE coordinates of the points (mm)
+
+    @param[in] yFocal is a numpy array of the y FOCAL_PLANE coordinates of the points (mm)
 
     @param[in] possible_points is a list of lists.  possible_points[ii] is a list of integers
-    corresponding to the indices in focalPointList of the pupilPoints that may be on detectorList[ii].
+    corresponding to the indices in xFocal of the points that may be on the ii-th detector
+    in lsst_camera_snapshot().names
 
     @param [in] allow_multiple_chips is a boolean (default False) indicating whether or not
     this method will allow objects to be visible on more than one chip.  If it is 'False'
@@ -219,22 +449,21 @@ def _findDetectorsListLSST(focalPointList, detectorList, possible_points,
     chipNames but NO WARNING WILL BE EMITTED.  If it is 'True' and an object falls on more than one
     chip, a list of chipNames will appear for that object.
 
+    @param [in] dtype is the floating point type in which to calculate the pixel
+    coordinates of the points (default np.float64)
+
+    @param [in] as_codes is a boolean (default False).  If True, return the np.int16
+    chip codes (indices into lsst_camera_snapshot().names; -1 for points that are on
+    no detector) of the detectors rather than their names.  Cannot be combined with
+    allow_multiple_chips.
+
     @return outputNameList is a numpy array of the names of the detectors
     """
-    # transform the points to the native coordinate system
-    #
-    # The conversion to a numpy array looks a little clunky.
-    # The problem, if you do the naive thing (nativePointList = np.array(lsst_camera().....),
-    # the conversion to a numpy array gets passed down to the contents of nativePointList
-    # and they end up in a form that the afwCameraGeom code does not know how to handle
-    nativePointList = np.zeros(len(focalPointList), dtype=object)
-    for ii in range(len(focalPointList)):
-        nativePointList[ii] = focalPointList[ii]
-
-    # initialize output and some caching lists
-    outputNameList = [None]*len(focalPointList)
-    chip_has_found = np.array([-1]*len(focalPointList))
-    unfound_pts = len(chip_has_found)
+    snapshot = lsst_camera_snapshot()
+
+    # the index (in snapshot.names) of the first detector found
+    # to contain each point; -1 if none has been found (yet)
+    first_det = np.zeros(len(xFocal), dtype=int) - 1
 
     # Figure out if any of these (RA, Dec) pairs could be
     # on more than one chip.  This is possible on the
@@ -243,70 +472,70 @@ def _findDetectorsListLSST(focalPointList, detectorList, possible_points,
     # See figure 2 of arXiv:1506.04839v2
     # (This might actually be a bug in obs_lsstSim
     # I opened DM-8075 on 25 October 2016 to investigate)
-    could_be_multiple = [False]*len(focalPointList)
+    could_be_multiple = np.zeros(len(xFocal), dtype=bool)
     if allow_multiple_chips:
-        for ipt in range(len(focalPointList)):
-            for det in detectorList[ipt]:
-                if det.getType() == WAVEFRONT:
-                    could_be_multiple[ipt] = True
+        for i_detector, det_type in enumerate(snapshot.detector_types):
+            if det_type == 'WAVEFRONT':
+                could_be_multiple[possible_points[i_detector]] = True
+
+    # the indices of all of the detectors containing each point
+    # that was found on more than one detector
+    multiple_dex = {}
 
-    # t_assemble_list = 0.0
     # loop over detectors
-    for i_detector, detector in enumerate(detectorList):
-        if len(possible_points[i_detector]) == 0:
+    for i_detector in range(len(snapshot.names)):
+        # find all of the points that could be on this detector; points
+        # that could be on more than one detector are never removed
+        # from contention
+        valid_pt_dexes = possible_points[i_detector]
+        if len(valid_pt_dexes) == 0:
+            continue
+        valid_pt_dexes = valid_pt_dexes[np.logical_or(first_det[valid_pt_dexes] < 0,
+                                                      could_be_multiple[valid_pt_dexes])]
+        if len(valid_pt_dexes) == 0:
             continue
 
-        if unfound_pts <= 0:
-            if unfound_pts<0:
-                raise RuntimeError("Somehow, unfound_pts = %d in _findDetectorsListLSST" % unfound_pts)
-            # we have already found all of the (RA, Dec) pairs
-            for ix, name in enumerate(outputNameList):
-                if isinstance(name, list):
-                    outputNameList[ix] = str(name)
-            return np.array(outputNameList)
-
-        # find all of the pupil points that could be on this detector
-        valid_pt_dexes = possible_points[i_detector][np.where(chip_has_found[possible_points[i_detector]]<0)]
-
-        if len(valid_pt_dexes) > 0:
-            valid_pt_list = nativePointList[valid_pt_dexes]
-            transform = detector.getTransform(lsst_camera()._nativeCameraSys, PIXELS)
-            detectorPointList = transform.applyForward(valid_pt_list)
-
-            box = geom.Box2D(detector.getBBox())
-            for ix, pt in zip(valid_pt_dexes, detectorPointList):
-                if box.contains(pt):
-                    if not could_be_multiple[ix]:
-                        # because this (RA, Dec) pair is not marked as could_be_multiple,
-                        # the fact that this (RA, Dec) pair is on the current chip
-                        # means this (RA, Dec) pair no longer needs to be considered.
-                        # You can set chip_has_found[ix] to unity.
-                        outputNameList[ix] = detector.getName()
-                        chip_has_found[ix] = 1
-                        unfound_pts -= 1
-                    else:
-                        # Since this (RA, Dec) pair has been makred could_be_multiple,
-                        # finding this (RA, Dec) pair on the chip does not remove the
-                        # (RA, Dec) pair from contention.
-                        if outputNameList[ix] is None:
-                            outputNameList[ix] = detector.getName()
-                        elif isinstance(outputNameList[ix], list):
-                            outputNameList[ix].append(detector.getName())
-                        else:
-                            outputNameList[ix] = [outputNameList[ix], detector.getName()]
+        x_pix, y_pix = snapshot.pixelsFromFocalPlane(xFocal[valid_pt_dexes],
+                                                     yFocal[valid_pt_dexes],
+                                                     i_detector, dtype=dtype)
+
+        # the bounds of geom.Box2D(detector.getBBox());
+        # Box2D.contains() is inclusive of the minimum
+        # and exclusive of the maximum
+        x_min = snapshot.bbox[i_detector][0] - 0.5
+        y_min = snapshot.bbox[i_detector][1] - 0.5
+        x_max = snapshot.bbox[i_detector][2] + 0.5
+        y_max = snapshot.bbox[i_detector][3] + 0.5
+
+        with np.errstate(invalid='ignore'):
+            on_det = valid_pt_dexes[(x_pix >= x_min) & (x_pix < x_max) &
+                                    (y_pix >= y_min) & (y_pix < y_max)]
+
+        # only points marked could_be_multiple can already have been found
+        for ix in on_det[first_det[on_det] >= 0]:
+            if ix not in multiple_dex:
+                multiple_dex[ix] = [first_det[ix]]
+            multiple_dex[ix].append(i_detector)
+
+        first_det[on_det[first_det[on_det] < 0]] = i_detector
+
+    if as_codes:
+        return first_det.astype(np.int16)
+
+    # the extra None at the end of the table is picked up by first_det == -1
+    outputNameList = np.append(snapshot.names.astype(object), [None])[first_det]
 
     # convert entries corresponding to multiple chips into strings
     # (i.e. [R:2,2 S:0,0, R:2,2 S:0,1] becomes `[R:2,2 S:0,0, R:2,2 S:0,1]`)
-    for ix, name in enumerate(outputNameList):
-        if isinstance(name, list):
-            outputNameList[ix] = str(name)
-
-    # print('t_assemble %.2e' % t_assemble_list)
+    for ix in multiple_dex:
+        outputNameList[ix] = str([str(snapshot.names[i_detector])
+                                  for i_detector in multiple_dex[ix]])
 
-    return np.array(outputNameList)
+    return outputNameList
 
 
-def chipNameFromPupilCoordsLSST(xPupil_in, yPupil_in, allow_multiple_chips=False, band='r'):
+def chipNameFromPupilCoordsLSST(xPupil_in, yPupil_in, allow_multiple_chips=False, band='r',
+                                dtype=np.float64, as_codes=False, out=None):
     """
     Return the names of LSST detectors that see the object specified by
     either (xPupil, yPupil).
@@ -325,55 +554,37 @@ def chipNameFromPupilCoordsLSST(xPupil_in, yPupil_in, allow_multiple_chips=False
 
     @param[in] band is the bandpass being simulated (default='r')
 
+    @param[in] dtype is the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64).  With np.float32, points within
+    a few 1e-3 pixels of the edge of a detector may be assigned differently.
+
+    @param[in] as_codes is a boolean (default False).  If True, return a numpy
+    array of np.int16 chip codes (the indices of the chips in
+    lsst_camera_snapshot().names; -1 for objects not on any chip) rather than
+    chip names.  Cannot be used with allow_multiple_chips=True.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of length N (of dtype object, or np.int16 if as_codes is True), e.g. a field of
+    a structured array or a np.memmap.  The objects are converted in chunks which
+    are written into out, so no temporary arrays of length N are allocated, and out
+    is returned.
+
     @param [out] a numpy array of chip names
 
     """
-    if (not hasattr(chipNameFromPupilCoordsLSST, '_focal_map') or
-    not hasattr(chipNameFromPupilCoordsLSST, '_detector_arr') or
-    len(chipNameFromPupilCoordsLSST._detector_arr) == 0):
-        focal_map = _build_lsst_focal_coord_map()
-        chipNameFromPupilCoordsLSST._focal_map = focal_map
-        camera = lsst_camera()
-        detector_arr = np.zeros(len(focal_map['name']), dtype=object)
-        for ii in range(len(focal_map['name'])):
-            detector_arr[ii] = camera[focal_map['name'][ii]]
-
-        chipNameFromPupilCoordsLSST._detector_arr = detector_arr
-
-        # build a Box2D that contains all of the detectors in the camera
-        focal_to_field = camera.getTransformMap().getTransform(FOCAL_PLANE, FIELD_ANGLE)
-        focal_bbox = camera.getFpBBox()
-        focal_corners = focal_bbox.getCorners()
-        camera_bbox = geom.Box2D()
-        x_focal_max = None
-        x_focal_min = None
-        y_focal_max = None
-        y_focal_min = None
-        for cc in focal_corners:
-            xx = cc.getX()
-            yy = cc.getY()
-            if x_focal_max is None or xx > x_focal_max:
-                x_focal_max = xx
-            if x_focal_min is None or xx < x_focal_min:
-                x_focal_min = xx
-            if y_focal_max is None or yy > y_focal_max:
-                y_focal_max = yy
-            if y_focal_min is None or yy < y_focal_min:
-                y_focal_min = yy
 
-        chipNameFromPupilCoordsLSST._x_focal_center = 0.5*(x_focal_max+x_focal_min)
-        chipNameFromPupilCoordsLSST._y_focal_center = 0.5*(y_focal_max+y_focal_min)
+    if out is not None:
+        return _convert_into(chipNameFromPupilCoordsLSST,
+                             dict(xPupil_in=xPupil_in, yPupil_in=yPupil_in),
+                             dict(allow_multiple_chips=allow_multiple_chips, band=band,
+                                  dtype=dtype, as_codes=as_codes),
+                             out)
 
-        radius_sq_max = None
-        for cc in focal_corners:
-            xx = cc.getX()
-            yy = cc.getY()
-            radius_sq = ((xx-chipNameFromPupilCoordsLSST._x_focal_center)**2 +
-                         (yy-chipNameFromPupilCoordsLSST._y_focal_center)**2)
-            if radius_sq_max is None or radius_sq > radius_sq_max:
-                radius_sq_max = radius_sq
+    dtype = _validate_dtype(dtype, 'chipNameFromPupilCoordsLSST')
 
-        chipNameFromPupilCoordsLSST._camera_focal_radius_sq = radius_sq_max*1.1
+    if as_codes and allow_multiple_chips:
+        raise RuntimeError("chipNameFromPupilCoordsLSST cannot return chip codes "
+                           "with allow_multiple_chips=True")
 
     are_arrays = _validate_inputs([xPupil_in, yPupil_in], ['xPupil_in', 'yPupil_in'],
                                   "chipNameFromPupilCoordsLSST")
@@ -382,7 +593,57 @@ def chipNameFromPupilCoordsLSST(xPupil_in, yPupil_in, allow_multiple_chips=False
         xPupil_in = np.array([xPupil_in])
         yPupil_in = np.array([yPupil_in])
 
-    xFocal, yFocal = focalPlaneCoordsFromPupilCoordsLSST(xPupil_in, yPupil_in, band=band)
+    xFocal, yFocal = focalPlaneCoordsFromPupilCoordsLSST(xPupil_in, yPupil_in, band=band,
+                                                         dtype=dtype)
+
+    nameList = _chipNameFromFocalPlaneLSST(xFocal, yFocal,
+                                           allow_multiple_chips=allow_multiple_chips,
+                                           dtype=dtype, as_codes=as_codes)
+
+    if not are_arrays:
+        return nameList[0]
+
+    return nameList
+
+
+def _chipNameFromFocalPlaneLSST(xFocal, yFocal, allow_multiple_chips=False, dtype=np.float64,
+                                as_codes=False):
+    """
+    Return the names of LSST detectors that see the objects specified by
+    the numpy arrays of focal plane coordinates (xFocal, yFocal) in mm.
+
+    This is the part of chipNameFromPupilCoordsLSST that comes after the
+    optical distortions have been applied, so that callers that already
+    have the focal plane coordinates do not need to compute them again.
+
+    @param [out] a numpy array of chip names (or of np.int16 chip codes,
+    if as_codes is True; see chipNameFromPupilCoordsLSST)
+    """
+    if not hasattr(chipNameFromPupilCoordsLSST, '_focal_map'):
+        focal_map = _build_lsst_focal_coord_map()
+        chipNameFromPupilCoordsLSST._focal_map = focal_map
+
+        # find the circle that contains all of the detectors in the camera
+        x_focal_min, y_focal_min, x_focal_max, y_focal_max = lsst_camera_snapshot().fp_bbox
+
+        chipNameFromPupilCoordsLSST._x_focal_center = 0.5*(x_focal_max+x_focal_min)
+        chipNameFromPupilCoordsLSST._y_focal_center = 0.5*(y_focal_max+y_focal_min)
+
+        radius_sq_max = None
+        for xx in (x_focal_min, x_focal_max):
+            for yy in (y_focal_min, y_focal_max):
+                radius_sq = ((xx-chipNameFromPupilCoordsLSST._x_focal_center)**2 +
+                             (yy-chipNameFromPupilCoordsLSST._y_focal_center)**2)
+                if radius_sq_max is None or radius_sq > radius_sq_max:
+                    radius_sq_max = radius_sq
+
+        chipNameFromPupilCoordsLSST._camera_focal_radius_sq = radius_sq_max*1.1
+
+        chipNameFromPupilCoordsLSST._chip_grid = _build_lsst_chip_grid(focal_map,
+                                                                      1.1*focal_map['dp'])
+
+        chip_grid = chipNameFromPupilCoordsLSST._chip_grid
+        chipNameFromPupilCoordsLSST._chip_raster = _build_lsst_chip_raster(chip_grid)
 
     radius_sq_list = ((xFocal-chipNameFromPupilCoordsLSST._x_focal_center)**2 +
                       (yFocal-chipNameFromPupilCoordsLSST._y_focal_center)**2)
@@ -391,56 +652,72 @@ def chipNameFromPupilCoordsLSST(xPupil_in, yPupil_in, allow_multiple_chips=False
         good_radii = np.where(radius_sq_list<chipNameFromPupilCoordsLSST._camera_focal_radius_sq)
 
     if len(good_radii[0]) == 0:
-        return np.array([None]*len(xPupil_in))
-
-    xFocal_good = xFocal[good_radii]
-    yFocal_good = yFocal[good_radii]
+        if as_codes:
+            return np.zeros(len(xFocal), dtype=np.int16) - 1
+        return np.full(len(xFocal), None, dtype=object)
 
     ############################################################
     # in the code below, we will only consider those points which
     # passed the 'good_radii' test above; the other points will
     # be added in with chipName == None at the end
     #
-    focalPointList = [geom.Point2D(xFocal[i_pt], yFocal[i_pt])
-                      for i_pt in good_radii[0]]
-
-    # Loop through every detector on the camera.  For each detector, assemble a list of points
-    # whose centers are within 1.1 detector radii of the center of the detector.
-
-    x_cam_list = chipNameFromPupilCoordsLSST._focal_map['xx']
-    y_cam_list = chipNameFromPupilCoordsLSST._focal_map['yy']
-    rrsq_lim_list = (1.1*chipNameFromPupilCoordsLSST._focal_map['dp'])**2
-
-    possible_points = []
-    for i_chip, (x_cam, y_cam, rrsq_lim) in \
-    enumerate(zip(x_cam_list, y_cam_list, rrsq_lim_list)):
-
-        local_possible_pts = np.where(((xFocal_good - x_cam)**2 +
-                                       (yFocal_good - y_cam)**2) < rrsq_lim)[0]
-
-        possible_points.append(local_possible_pts)
+    xFocal_good = xFocal[good_radii]
+    yFocal_good = yFocal[good_radii]
 
-    nameList_good = _findDetectorsListLSST(focalPointList,
-                                           chipNameFromPupilCoordsLSST._detector_arr,
-                                           possible_points,
-                                           allow_multiple_chips=allow_multiple_chips)
+    # Look the points up in the raster of detectors.  Points in
+    # interior cells get their chip directly; only the points
+    # in boundary cells need the exact search below.
+    # (in double precision, so that single precision inputs
+    # are not moved into a neighboring cell by round-off)
+    chip_raster = chipNameFromPupilCoordsLSST._chip_raster
+    ix = np.floor((xFocal_good.astype(float)-chip_raster['x_min'])/chip_raster['cell_size'])
+    iy = np.floor((yFocal_good.astype(float)-chip_raster['y_min'])/chip_raster['cell_size'])
+    in_raster = np.where((ix >= 0) & (ix < chip_raster['nx']) &
+                         (iy >= 0) & (iy < chip_raster['ny']))[0]
+
+    raster_code = np.zeros(len(xFocal_good), dtype=int) - 2
+    raster_code[in_raster] = chip_raster['code'][ix[in_raster].astype(int),
+                                                 iy[in_raster].astype(int)]
+
+    boundary = np.where(raster_code == -2)[0]
+    if len(boundary) > 0:
+        # For each detector on the camera, assemble a list of points
+        # whose centers are within 1.1 detector radii of the center of the detector.
+        possible_points = _findPossiblePointsLSST(xFocal_good[boundary], yFocal_good[boundary])
+
+        boundary_names = _findDetectorsListLSST(xFocal_good[boundary],
+                                                yFocal_good[boundary],
+                                                possible_points,
+                                                allow_multiple_chips=allow_multiple_chips,
+                                                dtype=dtype, as_codes=as_codes)
+
+    if as_codes:
+        if len(boundary) > 0:
+            raster_code[boundary] = boundary_names
+        chipCodes = np.zeros(len(xFocal), dtype=np.int16) - 1
+        chipCodes[good_radii] = raster_code
+        return chipCodes
 
     ####################################################################
     # initialize output as an array of Nones, effectively adding back in
-    # the points which failed the initial radius cut
-    nameList = np.array([None]*len(xPupil_in))
+    # the points which failed the initial radius cut (the names are
+    # written straight into the output, without a temporary array for
+    # the points which passed it)
+    nameList = np.full(len(xFocal), None, dtype=object)
 
-    nameList[good_radii] = nameList_good
-
-    if not are_arrays:
-        return nameList[0]
+    good_dex = good_radii[0]
+    on_chip = np.where(raster_code >= 0)[0]
+    nameList[good_dex[on_chip]] = chipNameFromPupilCoordsLSST._focal_map['name'][raster_code[on_chip]]
+    if len(boundary) > 0:
+        nameList[good_dex[boundary]] = boundary_names
 
     return nameList
 
 
 def _chipNameFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                            obs_metadata=None, epoch=2000.0, allow_multiple_chips=False,
-                           band='r'):
+                           band='r', as_codes=False,
+                           workers=None, executor=None, out=None):
     """
     Return the names of detectors on the LSST camera that see the object specified by
     (RA, Dec) in radians.
@@ -476,10 +753,46 @@ def _chipNameFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_ra
 
     @param [in] band is the filter we are simulating (Default=r)
 
+    @param [in] as_codes is a boolean (default False).  If True, return np.int16
+    chip codes rather than chip names (see chipNameFromPupilCoordsLSST).
+
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of length N (of dtype object, or np.int16 if as_codes is True), e.g. a field of
+    a structured array or a np.memmap.  The objects are converted in chunks which
+    are written into out, so no temporary arrays of length N are allocated, and out
+    is returned.
+
     @param [out] the name(s) of the chips on which ra, dec fall (will be a numpy
     array if more than one)
     """
 
+    if out is not None:
+        return _convert_into(_chipNameFromRaDecLSST,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, epoch=epoch,
+                                  allow_multiple_chips=allow_multiple_chips, band=band,
+                                  as_codes=as_codes, workers=workers, executor=executor),
+                             out)
+
+    if workers is not None or executor is not None:
+        return _run_in_chunks(_chipNameFromRaDecLSST,
+                              dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec,
+                                   parallax=parallax, v_rad=v_rad),
+                              dict(obs_metadata=obs_metadata, epoch=epoch,
+                                   allow_multiple_chips=allow_multiple_chips, band=band,
+                                   as_codes=as_codes),
+                              workers=workers, executor=executor)
+
     are_arrays = _validate_inputs([ra, dec], ['ra', 'dec'], "chipNameFromRaDecLSST")
 
     if epoch is None:
@@ -500,12 +813,13 @@ def _chipNameFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_ra
                                    obs_metadata=obs_metadata, epoch=epoch)
 
     return chipNameFromPupilCoordsLSST(xp, yp, allow_multiple_chips=allow_multiple_chips,
-                                       band=band)
+                                       band=band, as_codes=as_codes)
 
 
 def chipNameFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                           obs_metadata=None, epoch=2000.0, allow_multiple_chips=False,
-                          band='r'):
+                          band='r', as_codes=False,
+                          workers=None, executor=None, out=None):
     """
     Return the names of detectors on the LSST camera that see the object specified by
     (RA, Dec) in degrees.
@@ -541,9 +855,37 @@ def chipNameFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad
 
     @param [in] band is the filter that we are simulating (Default=r)
 
+    @param [in] as_codes is a boolean (default False).  If True, return np.int16
+    chip codes rather than chip names (see chipNameFromPupilCoordsLSST).
+
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of length N (of dtype object, or np.int16 if as_codes is True), e.g. a field of
+    a structured array or a np.memmap.  The objects are converted in chunks which
+    are written into out, so no temporary arrays of length N are allocated, and out
+    is returned.
+
     @param [out] the name(s) of the chips on which ra, dec fall (will be a numpy
     array if more than one)
     """
+
+    if out is not None:
+        return _convert_into(chipNameFromRaDecLSST,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, epoch=epoch,
+                                  allow_multiple_chips=allow_multiple_chips, band=band,
+                                  as_codes=as_codes, workers=workers, executor=executor),
+                             out)
+
     if pm_ra is not None:
         pm_ra_out = radiansFromArcsec(pm_ra)
     else:
@@ -564,11 +906,12 @@ def chipNameFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad
                                   parallax=parallax_out, v_rad=v_rad,
                                   obs_metadata=obs_metadata, epoch=epoch,
                                   allow_multiple_chips=allow_multiple_chips,
-                                  band=band)
+                                  band=band, as_codes=as_codes,
+                                  workers=workers, executor=executor)
 
 
 def pupilCoordsFromPixelCoordsLSST(xPix, yPix, chipName=None, band="r",
-                                   includeDistortion=True):
+                                   includeDistortion=True, dtype=np.float64, out=None):
     """
     Convert pixel coordinates into radians on the pupil
 
@@ -579,12 +922,23 @@ def pupilCoordsFromPixelCoordsLSST(xPix, yPix, chipName=None, band="r",
     yPix -- the y pixel coordinate
 
     chipName -- the name(s) of the chips on which xPix, yPix are reckoned
+    (or their integer chip codes; see chipNameFromPupilCoordsLSST)
 
     band -- the filter we are simulating (default=r)
 
     includeDistortion -- a boolean which turns on or off optical
     distortions (default=True)
 
+    dtype -- the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64).  np.float32 is faster and
+    uses half the memory, at the cost of precision (~1e-5 mm on the focal
+    plane; a few 1e-3 pixels)
+
+    out -- an optional preallocated output (default None): a numpy array of shape
+    (2, N), or a tuple of two arrays of length N (e.g. two fields of a structured
+    array, or np.memmaps).  The objects are converted in chunks which are written
+    into out, so no temporary arrays of length N are allocated, and out is returned.
+
     Returns
     -------
     a 2-D numpy array in which the first row is the x
@@ -592,10 +946,13 @@ def pupilCoordsFromPixelCoordsLSST(xPix, yPix, chipName=None, band="r",
     coordinate (both in radians)
     """
 
-    if not includeDistortion:
-        return pupilCoordsFromPixelCoords(xPix, yPix, chipName=chipName,
-                                          camera=lsst_camera(),
-                                          includeDistortion=includeDistortion)
+    if out is not None:
+        return _convert_into(pupilCoordsFromPixelCoordsLSST,
+                             dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                             dict(band=band, includeDistortion=includeDistortion, dtype=dtype),
+                             out)
+
+    dtype = _validate_dtype(dtype, 'pupilCoordsFromPixelCoordsLSST')
 
     are_arrays, \
     chipNameList = _validate_inputs_and_chipname([xPix, yPix], ['xPix', 'yPix'],
@@ -603,66 +960,29 @@ def pupilCoordsFromPixelCoordsLSST(xPix, yPix, chipName=None, band="r",
                                                  chipName,
                                                  chipname_can_be_none=False)
 
-    pixel_to_focal_dict = {}
-    camera = lsst_camera()
-    name_to_int = {}
-    name_to_int[None] = 0
-    name_to_int['None'] = 0
-    ii = 1
-
-    if are_arrays:
-        chip_name_int = np.zeros(len(xPix), dtype=int)
-
-    have_transform = set()
-    for i_obj, name in enumerate(chipNameList):
-        if name not in have_transform and name is not None and name != 'None':
-            pixel_to_focal_dict[name] = camera[name].getTransform(PIXELS, FOCAL_PLANE)
-            name_to_int[name] = ii
-            have_transform.add(name)
-            ii += 1
-
-        if are_arrays:
-            chip_name_int[i_obj] = name_to_int[name]
-
-    if are_arrays:
-        x_f = np.zeros(len(xPix), dtype=float)
-        y_f = np.zeros(len(yPix), dtype=float)
-
-        for name in name_to_int:
-            local_int = name_to_int[name]
-            local_valid = np.where(chip_name_int==local_int)
-            if len(local_valid[0]) == 0:
-                continue
-
-            if name is None or name == 'None':
-                x_f[local_valid] = np.NaN
-                y_f[local_valid] = np.NaN
-                continue
-
-            pixel_pt_arr = [geom.Point2D(xPix[ii], yPix[ii])
-                            for ii in local_valid[0]]
-
-            focal_pt_arr = pixel_to_focal_dict[name].applyForward(pixel_pt_arr)
-            focal_coord_arr = np.array([[pt.getX(), pt.getY()]
-                                        for pt in focal_pt_arr]).transpose()
-            x_f[local_valid] = focal_coord_arr[0]
-            y_f[local_valid] = focal_coord_arr[1]
+    # convert all of the points in one pass, gathering the transformation
+    # of each point's detector from the snapshot's table of transformations
+    # (chip codes are indices into that table)
+    snapshot = lsst_camera_snapshot()
+    chip_index = _as_chip_codes(chipNameList, len(snapshot.names),
+                                'pupilCoordsFromPixelCoordsLSST')
+    if chip_index is None:
+        chip_index = snapshot.getIndices(chipNameList)
+    if not are_arrays:
+        chip_index = chip_index[0]
 
-    else:
-        if chipNameList[0] is None or chipNameList[0] == 'None':
-            x_f = np.NaN
-            y_f = np.NaN
-        else:
-            pixel_pt = geom.Point2D(xPix, yPix)
-            focal_pt = pixel_to_focal_dict[chipNameList[0]].applyForward(pixel_pt)
-            x_f = focal_pt.getX()
-            y_f = focal_pt.getY()
+    if not includeDistortion:
+        # TAN_PIXELS map directly onto the pupil
+        x_pup, y_pup = snapshot.fieldAngleFromTanPixels(xPix, yPix, chip_index, dtype=dtype)
+        return np.array([x_pup, y_pup], dtype=dtype)
 
-    return pupilCoordsFromFocalPlaneCoordsLSST(x_f, y_f, band=band)
+    x_f, y_f = snapshot.focalPlaneFromPixels(xPix, yPix, chip_index, dtype=dtype)
+
+    return pupilCoordsFromFocalPlaneCoordsLSST(x_f, y_f, band=band, dtype=dtype)
 
 
 def pixelCoordsFromPupilCoordsLSST(xPupil, yPupil, chipName=None, band="r",
-                                   includeDistortion=True):
+                                   includeDistortion=True, dtype=np.float64, out=None):
     """
     Convert radians on the pupil into pixel coordinates.
 
@@ -678,23 +998,37 @@ def pixelCoordsFromPupilCoordsLSST(xPupil, yPupil, chipName=None, band="r",
     If a single value, all of the pixel coordinates will be reckoned on the same
     chip.  If None, this method will calculate which chip each(xPupil, yPupil) pair
     actually falls on, and return pixel coordinates for each (xPupil, yPupil) pair on
-    the appropriate chip.  Default is None.
+    the appropriate chip.  Default is None.  Integer chip codes (see
+    chipNameFromPupilCoordsLSST) can be passed in place of chip names.
 
     band -- the filter we are simulating (default=r)
 
     includeDistortion -- a boolean which turns on and off optical distortions
     (default=True)
 
+    dtype -- the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64).  np.float32 is faster and
+    uses half the memory, at the cost of precision (~1e-5 mm on the focal
+    plane; a few 1e-3 pixels)
+
+    out -- an optional preallocated output (default None): a numpy array of shape
+    (2, N), or a tuple of two arrays of length N (e.g. two fields of a structured
+    array, or np.memmaps).  The objects are converted in chunks which are written
+    into out, so no temporary arrays of length N are allocated, and out is returned.
+
     Returns
     -------
     a 2-D numpy array in which the first row is the x pixel coordinate
     and the second row is the y pixel coordinate
     """
 
-    if not includeDistortion:
-        return pixelCoordsFromPupilCoords(xPupil, yPupil, chipName=chipName,
-                                          camera=lsst_camera(),
-                                          includeDistortion=includeDistortion)
+    if out is not None:
+        return _convert_into(pixelCoordsFromPupilCoordsLSST,
+                             dict(xPupil=xPupil, yPupil=yPupil, chipName=chipName),
+                             dict(band=band, includeDistortion=includeDistortion, dtype=dtype),
+                             out)
+
+    dtype = _validate_dtype(dtype, 'pixelCoordsFromPupilCoordsLSST')
 
     are_arrays, \
     chipNameList = _validate_inputs_and_chipname([xPupil, yPupil],
@@ -702,76 +1036,46 @@ def pixelCoordsFromPupilCoordsLSST(xPupil, yPupil, chipName=None, band="r",
                                                  'pixelCoordsFromPupilCoordsLSST',
                                                  chipName)
 
+    # convert all of the points in one pass, gathering the transformation
+    # of each point's detector from the snapshot's table of transformations
+    # (chip codes are indices into that table)
+    snapshot = lsst_camera_snapshot()
+    if includeDistortion:
+        x_f, y_f = focalPlaneCoordsFromPupilCoordsLSST(xPupil, yPupil, band=band, dtype=dtype)
+    elif chipNameList is None:
+        # without the optical distortions, the chips are found
+        # from the undistorted focal plane coordinates
+        x_f, y_f = snapshot.focalPlaneFromFieldAngle(xPupil, yPupil, dtype=dtype)
+
     if chipNameList is None:
-        chipNameList = chipNameFromPupilCoordsLSST(xPupil, yPupil)
-        if not isinstance(chipNameList, np.ndarray):
-            chipNameList = np.array([chipNameList])
+        # find the chips from the focal plane coordinates we already have,
+        # rather than applying the optical distortions a second time
+        chip_index = _chipNameFromFocalPlaneLSST(np.atleast_1d(x_f), np.atleast_1d(y_f),
+                                                 dtype=dtype, as_codes=True)
     else:
-        if not isinstance(chipNameList, list) and not isinstance(chipNameList, np.ndarray):
-            chipNameList = np.array([chipNameList])
-        elif isinstance(chipNameList, list):
-            chipNameList = np.array(chipNameList)
-
-    x_f, y_f = focalPlaneCoordsFromPupilCoordsLSST(xPupil, yPupil, band=band)
-
-    if are_arrays:
-
-        has_transform = set()
-        focal_to_pixel_dict = {}
-        chip_name_int = np.zeros(len(x_f), dtype=int)
-        name_to_int = {}
-        name_to_int[None] = 0
-        name_to_int['None'] = 0
-        ii = 1
-        for i_obj, chip_name in enumerate(chipNameList):
-            if chip_name not in has_transform and chip_name is not None and chip_name != 'None':
-                has_transform.add(chip_name)
-                focal_to_pixel_dict[chip_name] = lsst_camera()[chip_name].getTransform(FOCAL_PLANE, PIXELS)
-                name_to_int[chip_name] = ii
-                ii += 1
-
-            chip_name_int[i_obj] = name_to_int[chip_name]
-
-        x_pix = np.NaN*np.ones(len(x_f), dtype=float)
-        y_pix = np.NaN*np.ones(len(x_f), dtype=float)
-
-        for chip_name in has_transform:
-            if chip_name == 'None' or chip_name is None:
-                continue
-
-            local_int = name_to_int[chip_name]
-            local_valid = np.where(chip_name_int == local_int)
-            if len(local_valid[0]) == 0:
-                continue
-            focal_pt_arr = [geom.Point2D(x_f[ii], y_f[ii])
-                            for ii in local_valid[0]]
-            pixel_pt_arr = focal_to_pixel_dict[chip_name].applyForward(focal_pt_arr)
-            pixel_coord_arr = np.array([[pp.getX(), pp.getY()]
-                                        for pp in pixel_pt_arr]).transpose()
-
-            x_pix[local_valid] = pixel_coord_arr[0]
-            y_pix[local_valid] = pixel_coord_arr[1]
+        chip_index = _as_chip_codes(chipNameList, len(snapshot.names),
+                                    'pixelCoordsFromPupilCoordsLSST')
+        if chip_index is None:
+            chip_index = snapshot.getIndices(chipNameList)
+
+    if not are_arrays:
+        chip_index = chip_index[0]
+
+    if includeDistortion:
+        x_pix, y_pix = snapshot.pixelsFromFocalPlane(x_f, y_f, chip_index, dtype=dtype)
     else:
-        chip_name = chipNameList[0]
-        if chip_name is None:
-            x_pix = np.NaN
-            y_pix = np.NaN
-        else:
-            det = lsst_camera()[chip_name]
-            focal_to_pixels = det.getTransform(FOCAL_PLANE, PIXELS)
-            focal_pt = geom.Point2D(x_f, y_f)
-            pixel_pt = focal_to_pixels.applyForward(focal_pt)
-            x_pix= pixel_pt.getX()
-            y_pix = pixel_pt.getY()
+        x_pix, y_pix = snapshot.tanPixelsFromFieldAngle(xPupil, yPupil, chip_index,
+                                                        dtype=dtype)
 
-    return np.array([x_pix, y_pix])
+    return np.array([x_pix, y_pix], dtype=dtype)
 
 
 def _pixelCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                               obs_metadata=None,
                               chipName=None, camera=None,
                               epoch=2000.0, includeDistortion=True,
-                              band='r'):
+                              band='r',
+                              workers=None, executor=None, out=None):
     """
     Get the pixel positions on the LSST camera (or nan if not on a chip) for objects based
     on their RA, and Dec (in radians)
@@ -819,10 +1123,42 @@ def _pixelCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v
 
     @param [in] band is the filter we are simulating ('u', 'g', 'r', etc.) Default='r'
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x pixel coordinate
     and the second row is the y pixel coordinate
     """
 
+    if out is not None:
+        return _convert_into(_pixelCoordsFromRaDecLSST,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad, chipName=chipName),
+                             dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                  includeDistortion=includeDistortion, band=band,
+                                  workers=workers, executor=executor),
+                             out)
+
+    if workers is not None or executor is not None:
+        return _run_in_chunks(_pixelCoordsFromRaDecLSST,
+                              dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec,
+                                   parallax=parallax, v_rad=v_rad, chipName=chipName),
+                              dict(obs_metadata=obs_metadata, camera=camera, epoch=epoch,
+                                   includeDistortion=includeDistortion, band=band),
+                              workers=workers, executor=executor)
+
     if epoch is None:
         raise RuntimeError("You need to pass an epoch into pixelCoordsFromRaDec")
 
@@ -849,7 +1185,8 @@ def _pixelCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v
 def pixelCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
                              obs_metadata=None, chipName=None,
                              epoch=2000.0, includeDistortion=True,
-                             band='r'):
+                             band='r',
+                             workers=None, executor=None, out=None):
     """
     Get the pixel positions on the LSST camera (or nan if not on a chip) for objects based
     on their RA, and Dec (in degrees)
@@ -894,10 +1231,34 @@ def pixelCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_
 
     @param [in] band is the filter we are simulating ('u', 'g', 'r', etc.) Default='r'
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the x pixel coordinate
     and the second row is the y pixel coordinate
     """
 
+    if out is not None:
+        return _convert_into(pixelCoordsFromRaDecLSST,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad, chipName=chipName),
+                             dict(obs_metadata=obs_metadata, epoch=epoch,
+                                  includeDistortion=includeDistortion, band=band,
+                                  workers=workers, executor=executor),
+                             out)
+
     if pm_ra is not None:
         pm_ra_out = radiansFromArcsec(pm_ra)
     else:
@@ -918,12 +1279,13 @@ def pixelCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_
                                      parallax=parallax_out, v_rad=v_rad,
                                      chipName=chipName, obs_metadata=obs_metadata,
                                      epoch=2000.0, includeDistortion=includeDistortion,
-                                     band=band)
+                                     band=band, workers=workers, executor=executor)
 
 
 def _raDecFromPixelCoordsLSST(xPix, yPix, chipName, band='r',
                               obs_metadata=None, epoch=2000.0,
-                              includeDistortion=True):
+                              includeDistortion=True,
+                              workers=None, executor=None, out=None):
     """
     Convert pixel coordinates into RA, Dec
 
@@ -951,6 +1313,21 @@ def _raDecFromPixelCoordsLSST(xPix, yPix, chipName, band='r',
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the RA coordinate
     and the second row is the Dec coordinate (both in radians; in the International
     Celestial Reference System)
@@ -960,6 +1337,21 @@ def _raDecFromPixelCoordsLSST(xPix, yPix, chipName, band='r',
     to positions on the celestial sphere.
     """
 
+    if out is not None:
+        return _convert_into(_raDecFromPixelCoordsLSST,
+                             dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                             dict(band=band, obs_metadata=obs_metadata, epoch=epoch,
+                                  includeDistortion=includeDistortion, workers=workers,
+                                  executor=executor),
+                             out)
+
+    if workers is not None or executor is not None:
+        return _run_in_chunks(_raDecFromPixelCoordsLSST,
+                              dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                              dict(band=band, obs_metadata=obs_metadata, epoch=epoch,
+                                   includeDistortion=includeDistortion),
+                              workers=workers, executor=executor)
+
     are_arrays, \
     chipNameList = _validate_inputs_and_chipname([xPix, yPix],
                                                  ['xPix', 'yPix'],
@@ -993,7 +1385,8 @@ def _raDecFromPixelCoordsLSST(xPix, yPix, chipName, band='r',
 
 def raDecFromPixelCoordsLSST(xPix, yPix, chipName, band='r',
                              obs_metadata=None, epoch=2000.0,
-                             includeDistortion=True):
+                             includeDistortion=True,
+                             workers=None, executor=None, out=None):
     """
     Convert pixel coordinates into RA, Dec
 
@@ -1021,6 +1414,21 @@ def raDecFromPixelCoordsLSST(xPix, yPix, chipName, band='r',
     estimated optical distortion removed.  See the documentation in afw.cameraGeom for more
     details.
 
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a numpy array
+    of shape (2, N), or a tuple of two arrays of length N (e.g. two fields of a
+    structured array, or np.memmaps).  The objects are converted in chunks which are
+    written into out, so no temporary arrays of length N are allocated, and out is
+    returned.
+
     @param [out] a 2-D numpy array in which the first row is the RA coordinate
     and the second row is the Dec coordinate (both in degrees; in the International
     Celestial Reference System)
@@ -1029,9 +1437,322 @@ def raDecFromPixelCoordsLSST(xPix, yPix, chipName, band='r',
     This method is only useful for mapping positions on a theoretical focal plane
     to positions on the celestial sphere.
     """
+
+    if out is not None:
+        return _convert_into(raDecFromPixelCoordsLSST,
+                             dict(xPix=xPix, yPix=yPix, chipName=chipName),
+                             dict(band=band, obs_metadata=obs_metadata, epoch=epoch,
+                                  includeDistortion=includeDistortion, workers=workers,
+                                  executor=executor),
+                             out)
+
     output = _raDecFromPixelCoordsLSST(xPix, yPix, chipName, band=band,
                                        obs_metadata=obs_metadata,
                                        epoch=epoch,
-                                       includeDistortion=includeDistortion)
+                                       includeDistortion=includeDistortion,
+                                       workers=workers, executor=executor)
 
     return np.degrees(output)
+
+
+def cameraCoordsFromPupilCoordsLSST(xPupil, yPupil, columns=None, band='r',
+                                    dtype=np.float64, out=None):
+    """
+    Find the focal plane coordinates, chip names and pixel coordinates of
+    objects on the LSST camera in a single pass.
+
+    pixelCoordsFromPupilCoordsLSST and chipNameFromPupilCoordsLSST each
+    apply the optical distortions to every object; calling them both (as
+    catalogs that need the chip name and the pixel coordinates do) applies
+    them twice.  This method computes each stage of the transformation
+    pupil->focal plane->chip->pixel once per object, and only those stages
+    needed for the requested columns.
+
+    Parameters
+    ----------
+    xPupil -- the x pupil coordinates in radians.
+    Can be a float or a numpy array.
+
+    yPupil -- the y pupil coordinates in radians.
+    Can be a float or a numpy array.
+
+    columns -- a list of the columns to return.  Any of 'xPupil', 'yPupil',
+    'xFocal', 'yFocal' (mm), 'chipName', 'chipCode' (the np.int16 chip code;
+    see chipNameFromPupilCoordsLSST), 'xPix', 'yPix'.  If None (default),
+    all of the columns are returned.
+
+    band -- the filter we are simulating (default=r)
+
+    dtype -- the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64).  np.float32 is faster and
+    uses half the memory, at the cost of precision (~1e-5 mm on the focal
+    plane; a few 1e-3 pixels)
+
+    out -- an optional preallocated output (default None): a structured array of
+    length N (e.g. a np.memmap) with (at least) the fields of the output.  The
+    objects are converted in chunks which are written into out, so no temporary
+    arrays of length N are allocated, and out is returned.
+
+    Returns
+    -------
+    a numpy structured array with one field per requested column (a single
+    record, if xPupil and yPupil are floats).  The values are the same as
+    those returned by focalPlaneCoordsFromPupilCoordsLSST,
+    chipNameFromPupilCoordsLSST and pixelCoordsFromPupilCoordsLSST.
+    Objects that do not land on a chip have chipName None, chipCode -1
+    and pixel coordinates NaN.
+    """
+
+    if out is not None:
+        return _convert_into(cameraCoordsFromPupilCoordsLSST,
+                             dict(xPupil=xPupil, yPupil=yPupil),
+                             dict(columns=columns, band=band, dtype=dtype),
+                             out)
+
+    dtype = _validate_dtype(dtype, 'cameraCoordsFromPupilCoordsLSST')
+
+    are_arrays = _validate_inputs([xPupil, yPupil], ['xPupil', 'yPupil'],
+                                  'cameraCoordsFromPupilCoordsLSST')
+
+    if columns is None:
+        columns = _camera_coord_columns
+    else:
+        for col in columns:
+            if col not in _camera_coord_columns:
+                raise RuntimeError("cameraCoordsFromPupilCoordsLSST cannot return column %s; "
+                                   "the valid columns are %s" % (col, str(_camera_coord_columns)))
+
+    if not are_arrays:
+        xPupil = np.array([xPupil])
+        yPupil = np.array([yPupil])
+
+    column_types = {'chipName': object, 'chipCode': np.int16}
+    output = np.zeros(len(xPupil),
+                      dtype=[(col, column_types.get(col, dtype))
+                             for col in _camera_coord_columns if col in columns])
+
+    if 'xPupil' in columns:
+        output['xPupil'] = xPupil
+    if 'yPupil' in columns:
+        output['yPupil'] = yPupil
+
+    need_pixels = 'xPix' in columns or 'yPix' in columns
+    need_chips = need_pixels or 'chipName' in columns or 'chipCode' in columns
+    need_focal = need_chips or 'xFocal' in columns or 'yFocal' in columns
+
+    if need_focal:
+        xFocal, yFocal = focalPlaneCoordsFromPupilCoordsLSST(xPupil, yPupil, band=band,
+                                                             dtype=dtype)
+        if 'xFocal' in columns:
+            output['xFocal'] = xFocal
+        if 'yFocal' in columns:
+            output['yFocal'] = yFocal
+
+    snapshot = lsst_camera_snapshot()
+
+    if need_chips:
+        chipCodes = _chipNameFromFocalPlaneLSST(xFocal, yFocal, dtype=dtype, as_codes=True)
+        if 'chipCode' in columns:
+            output['chipCode'] = chipCodes
+        if 'chipName' in columns:
+            # code -1 picks up the None at the end of the table
+            name_table = np.append(snapshot.names.astype(object), [None])
+            output['chipName'] = name_table[chipCodes]
+
+    if need_pixels:
+        xPix, yPix = snapshot.pixelsFromFocalPlane(xFocal, yFocal, chipCodes, dtype=dtype)
+        if 'xPix' in columns:
+            output['xPix'] = xPix
+        if 'yPix' in columns:
+            output['yPix'] = yPix
+
+    if not are_arrays:
+        return output[0]
+
+    return output
+
+
+def _cameraCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
+                               obs_metadata=None, epoch=2000.0, columns=None, band='r',
+                               dtype=np.float64,
+                               workers=None, executor=None, out=None):
+    """
+    Find the pupil and focal plane coordinates, chip names and pixel
+    coordinates of objects on the LSST camera from their (RA, Dec) in
+    radians in a single pass.  See cameraCoordsFromPupilCoordsLSST.
+
+    @param [in] ra in radians (a numpy array or a float).
+    In the International Celestial Reference System.
+
+    @param [in] dec in radians (a numpy array or a float).
+    In the International Celestial Reference System.
+
+    @param [in] pm_ra is proper motion in RA multiplied by cos(Dec) (radians/yr)
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] pm_dec is proper motion in dec (radians/yr)
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] parallax is parallax in radians
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] v_rad is radial velocity (km/s)
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] obs_metadata is an ObservationMetaData characterizing the telescope pointing
+
+    @param [in] epoch is the epoch in Julian years of the equinox against which RA and Dec are
+    measured.  Default is 2000.
+
+    @param [in] columns is a list of the columns to return (default None, meaning all;
+    see cameraCoordsFromPupilCoordsLSST)
+
+    @param [in] band is the filter we are simulating (Default=r)
+
+    @param [in] dtype is the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64)
+
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a structured
+    array of length N (e.g. a np.memmap) with (at least) the fields of the output.
+    The objects are converted in chunks which are written into out, so no temporary
+    arrays of length N are allocated, and out is returned.
+
+    @param [out] a numpy structured array with one field per requested column
+    """
+
+    if out is not None:
+        return _convert_into(_cameraCoordsFromRaDecLSST,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, epoch=epoch, columns=columns,
+                                  band=band, dtype=dtype, workers=workers, executor=executor),
+                             out)
+
+    if workers is not None or executor is not None:
+        return _run_in_chunks(_cameraCoordsFromRaDecLSST,
+                              dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec,
+                                   parallax=parallax, v_rad=v_rad),
+                              dict(obs_metadata=obs_metadata, epoch=epoch, columns=columns,
+                                   band=band, dtype=dtype),
+                              workers=workers, executor=executor)
+
+    _validate_inputs([ra, dec], ['ra', 'dec'], "cameraCoordsFromRaDecLSST")
+
+    if epoch is None:
+        raise RuntimeError("You need to pass an epoch into cameraCoordsFromRaDecLSST")
+
+    if obs_metadata is None:
+        raise RuntimeError("You need to pass an ObservationMetaData into cameraCoordsFromRaDecLSST")
+
+    if obs_metadata.mjd is None:
+        raise RuntimeError("You need to pass an ObservationMetaData with an mjd into "
+                           "cameraCoordsFromRaDecLSST")
+
+    if obs_metadata.rotSkyPos is None:
+        raise RuntimeError("You need to pass an ObservationMetaData with a rotSkyPos into "
+                           "cameraCoordsFromRaDecLSST")
+
+    xPupil, yPupil = _pupilCoordsFromRaDec(ra, dec,
+                                           pm_ra=pm_ra, pm_dec=pm_dec,
+                                           parallax=parallax, v_rad=v_rad,
+                                           obs_metadata=obs_metadata, epoch=epoch)
+
+    return cameraCoordsFromPupilCoordsLSST(xPupil, yPupil, columns=columns, band=band,
+                                           dtype=dtype)
+
+
+def cameraCoordsFromRaDecLSST(ra, dec, pm_ra=None, pm_dec=None, parallax=None, v_rad=None,
+                              obs_metadata=None, epoch=2000.0, columns=None, band='r',
+                              dtype=np.float64,
+                              workers=None, executor=None, out=None):
+    """
+    Find the pupil and focal plane coordinates, chip names and pixel
+    coordinates of objects on the LSST camera from their (RA, Dec) in
+    degrees in a single pass.  See cameraCoordsFromPupilCoordsLSST.
+
+    @param [in] ra in degrees (a numpy array or a float).
+    In the International Celestial Reference System.
+
+    @param [in] dec in degrees (a numpy array or a float).
+    In the International Celestial Reference System.
+
+    @param [in] pm_ra is proper motion in RA multiplied by cos(Dec) (arcsec/yr)
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] pm_dec is proper motion in dec (arcsec/yr)
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] parallax is parallax in arcsec
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] v_rad is radial velocity (km/s)
+    Can be a numpy array or a number or None (default=None).
+
+    @param [in] obs_metadata is an ObservationMetaData characterizing the telescope pointing
+
+    @param [in] epoch is the epoch in Julian years of the equinox against which RA and Dec are
+    measured.  Default is 2000.
+
+    @param [in] columns is a list of the columns to return (default None, meaning all;
+    see cameraCoordsFromPupilCoordsLSST)
+
+    @param [in] band is the filter we are simulating (Default=r)
+
+    @param [in] dtype is the floating point type (np.float32 or np.float64) in which
+    to do the calculation (default=np.float64)
+
+    @param [in] workers is the number of threads among which to split the objects
+    (default None, i.e. convert all of the objects in the calling thread)
+
+    @param [in] executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor)
+    to which chunks of the objects are submitted (default None).  The objects are
+    split into as many chunks as the executor has workers (or into workers chunks,
+    if workers is also given).  Either way, the results are identical to those of
+    the serial calculation.
+
+    @param [in] out is an optional preallocated output (default None): a structured
+    array of length N (e.g. a np.memmap) with (at least) the fields of the output.
+    The objects are converted in chunks which are written into out, so no temporary
+    arrays of length N are allocated, and out is returned.
+
+    @param [out] a numpy structured array with one field per requested column
+    """
+
+    if out is not None:
+        return _convert_into(cameraCoordsFromRaDecLSST,
+                             dict(ra=ra, dec=dec, pm_ra=pm_ra, pm_dec=pm_dec, parallax=parallax,
+                                  v_rad=v_rad),
+                             dict(obs_metadata=obs_metadata, epoch=epoch, columns=columns,
+                                  band=band, dtype=dtype, workers=workers, executor=executor),
+                             out)
+
+    if pm_ra is not None:
+        pm_ra_out = radiansFromArcsec(pm_ra)
+    else:
+        pm_ra_out = None
+
+    if pm_dec is not None:
+        pm_dec_out = radiansFromArcsec(pm_dec)
+    else:
+        pm_dec_out = None
+
+    if parallax is not None:
+        parallax_out = radiansFromArcsec(parallax)
+    else:
+        parallax_out = None
+
+    return _cameraCoordsFromRaDecLSST(np.radians(ra), np.radians(dec),
+                                      pm_ra=pm_ra_out, pm_dec=pm_dec_out,
+                                      parallax=parallax_out, v_rad=v_rad,
+                                      obs_metadata=obs_metadata, epoch=epoch,
+                                      columns=columns, band=band, dtype=dtype,
+                                      workers=workers, executor=executor)
@@ -1,14 +1,17 @@
 import numpy as np
 import os
+import math
 import numbers
-import palpy
+import hashlib
+import tempfile
+import warnings
 
 from lsst.utils import getPackageDir
 from lsst.sims.utils import ZernikePolynomialGenerator
-from lsst.sims.coordUtils import lsst_camera
+from lsst.sims.coordUtils import lsst_camera, _lsst_camera_key
 from lsst.sims.coordUtils import DMtoCameraPixelTransformer
-from lsst.afw.cameraGeom import PIXELS, FOCAL_PLANE, FIELD_ANGLE, SCIENCE
-import lsst.geom as geom
+from lsst.sims.coordUtils import getCacheDir
+from lsst.sims.coordUtils import readPhoSimCentroids, loadPhoSimCentroids
 from lsst.sims.utils.CodeUtilities import _validate_inputs
 
 
@@ -37,6 +40,8 @@ def _rawPupilCoordsFromObserved(ra_obs, dec_obs, ra0, dec0, rotSkyPos):
     radians and whose second row is the y coordinate in radians
     """
 
+    import palpy
+
     are_arrays = _validate_inputs([ra_obs, dec_obs], ['ra_obs', 'dec_obs'],
                                   "pupilCoordsFromObserved")
 
@@ -83,16 +88,208 @@ def _rawPupilCoordsFromObserved(ra_obs, dec_obs, ra0, dec0, rotSkyPos):
     return np.array([x_out, y_out])
 
 
+def _file_digest(file_name):
+    """
+    Return the sha1 hex digest of the contents of file_name.
+
+    Each file is only read once per process: the digests are kept in
+    _file_digest._cache, keyed on the absolute path, size and modification
+    time of the file, so a file that is rewritten is read again.
+    """
+    if not hasattr(_file_digest, '_cache'):
+        _file_digest._cache = {}
+
+    abs_name = os.path.abspath(file_name)
+    stat = os.stat(abs_name)
+    key = (abs_name, stat.st_size, stat.st_mtime_ns)
+    if key not in _file_digest._cache:
+        hasher = hashlib.sha1()
+        with open(abs_name, 'rb') as file_handle:
+            for block in iter(lambda: file_handle.read(1 << 20), b''):
+                hasher.update(block)
+        _file_digest._cache[key] = hasher.hexdigest()
+    return _file_digest._cache[key]
+
+
+class _ZernikeBasis(object):
+    """
+    Evaluate a whole set of Zernike polynomials at once.
+
+    Z_n^m(r, phi) = R_n^|m|(r) * cos(m phi) (or sin(|m| phi) for m<0)
+    is a polynomial in x and y.  Writing rho2 = x^2 + y^2 and
+    z = x + iy, each term r^(n-2k) cos(|m| phi) is rho2^p * Re(z^|m|)
+    (Im(z^|m|) for the sine terms), with p = (n-2k-|m|)/2.  The basis
+    is therefore built from the powers of z and the radial polynomials
+    in rho2 (evaluated with Horner's method), without computing r, phi
+    or any trigonometric functions, and with every power shared between
+    all of the terms that need it.
+
+    The normalization and sign convention of each term are calibrated
+    against the ZernikePolynomialGenerator from sims_utils, so that
+    this class is a drop-in replacement for ZernikePolynomialGenerator.evaluate_xy.
+    """
+
+    # number of points evaluated at a time; keeps the temporary
+    # arrays small enough to stay in cache
+    _chunk_size = 16384
+
+    def __init__(self, n_grid, m_grid, z_gen):
+        """
+        Parameters
+        ----------
+        n_grid -- a list of the radial orders of the Zernike polynomials
+
+        m_grid -- a list of the angular orders of the Zernike polynomials
+
+        z_gen -- the ZernikePolynomialGenerator against which to calibrate
+        """
+        self._n_grid = list(n_grid)
+        self._m_grid = list(m_grid)
+        self._m_max = max([abs(m) for m in self._m_grid])
+
+        # self._radial_coeffs[ii] contains the coefficients of the radial
+        # polynomial in rho2 of the ii-th term, highest power first
+        self._radial_coeffs = []
+        for n, m in zip(self._n_grid, self._m_grid):
+            m_abs = abs(m)
+            if (n-m_abs) % 2 != 0 or m_abs > n:
+                raise RuntimeError("Invalid Zernike polynomial n=%d m=%d" % (n, m))
+            n_p = (n-m_abs)//2
+            coeffs = np.zeros(n_p+1, dtype=float)
+            for k in range(n_p+1):
+                coeffs[k] = ((-1)**k*math.factorial(n-k) /
+                             (math.factorial(k)*math.factorial((n+m_abs)//2-k)*
+                              math.factorial((n-m_abs)//2-k)))
+            self._radial_coeffs.append(coeffs)
+
+        # the Zernike polynomials are only defined for r <= 1;
+        # reproduce what ZernikePolynomialGenerator does outside of that
+        try:
+            outside = z_gen.evaluate_xy(np.array([1.5]), np.array([0.0]), 0, 0)
+            self._nan_outside = not np.isfinite(outside).all()
+        except RuntimeError:
+            self._nan_outside = True
+
+        # calibrate the normalization and sign of each term
+        rng = np.random.RandomState(4512)
+        r_sample = 0.3+0.6*rng.random_sample(50)
+        phi_sample = 2.0*np.pi*rng.random_sample(50)
+        x_sample = r_sample*np.cos(phi_sample)
+        y_sample = r_sample*np.sin(phi_sample)
+        raw = self._evaluate_chunk(x_sample, y_sample)
+        for ii, (n, m) in enumerate(zip(self._n_grid, self._m_grid)):
+            control = z_gen.evaluate_xy(x_sample, y_sample, n, m)
+            valid = np.where(np.abs(raw[:, ii]) > 0.05)
+            scale = control[valid]/raw[:, ii][valid]
+            if len(scale) == 0 or np.abs(scale-scale[0]).max() > 1.0e-10*np.abs(scale[0]):
+                raise RuntimeError("Could not match the ZernikePolynomialGenerator "
+                                   "definition of n=%d m=%d" % (n, m))
+            self._radial_coeffs[ii] = self._radial_coeffs[ii]*scale[0]
+
+    def _evaluate_chunk(self, x, y):
+        """
+        Return the (len(x), n_terms) array of basis values at x, y
+
+        The calculation is done in the precision of x (single
+        precision if x is np.float32; double precision otherwise).
+        """
+        dtype = np.result_type(x.dtype, np.float32)
+        rho2 = x*x + y*y
+        z = (x + 1j*y).astype(np.result_type(dtype, np.complex64), copy=False)
+        z_powers = [np.ones(len(x), dtype=z.dtype)]
+        for i_power in range(self._m_max):
+            z_powers.append(z_powers[-1]*z)
+
+        output = np.empty((len(x), len(self._n_grid)), dtype=dtype)
+        for ii, m in enumerate(self._m_grid):
+            coeffs = self._radial_coeffs[ii].astype(dtype)
+            radial = np.full(len(x), coeffs[0])
+            for cc in coeffs[1:]:
+                radial *= rho2
+                radial += cc
+            if m >= 0:
+                output[:, ii] = radial*z_powers[m].real
+            else:
+                output[:, ii] = radial*z_powers[-m].imag
+
+        if self._nan_outside:
+            output[np.where(rho2 > 1.0)] = np.nan
+        return output
+
+    def design_matrix(self, x, y):
+        """
+        Return the (len(x), n_terms) array whose columns are the
+        Zernike polynomials evaluated at x, y (which must be arrays)
+        """
+        output = np.empty((len(x), len(self._n_grid)), dtype=float)
+        for i_start in range(0, len(x), self._chunk_size):
+            i_end = i_start+self._chunk_size
+            output[i_start:i_end] = self._evaluate_chunk(x[i_start:i_end], y[i_start:i_end])
+        return output
+
+    def evaluate(self, x, y, coeffs):
+        """
+        Evaluate Zernike expansions at x, y (which must be arrays)
+
+        Parameters
+        ----------
+        x, y -- the points at which to evaluate
+
+        coeffs -- a (n_expansions, n_terms) array of the coefficients
+        of each expansion
+
+        Returns
+        -------
+        A (n_expansions, len(x)) array of the values of the expansions
+        (of type np.float32 if x is np.float32; np.float64 otherwise)
+        """
+        dtype = np.result_type(x.dtype, np.float32)
+        output = np.empty((coeffs.shape[0], len(x)), dtype=dtype)
+        coeffs_t = np.ascontiguousarray(coeffs.transpose(), dtype=dtype)
+        for i_start in range(0, len(x), self._chunk_size):
+            i_end = i_start+self._chunk_size
+            basis = self._evaluate_chunk(x[i_start:i_end], y[i_start:i_end])
+            output[:, i_start:i_end] = np.dot(basis, coeffs_t).transpose()
+        return output
+
+
 class LsstZernikeFitter(object):
     """
     This class will fit and then apply the Zernike polynomials needed
     to correct the FIELD_ANGLE to FOCAL_PLANE transformation for the
     filter-dependent part.
+
+    The Zernike coefficients for each filter are fit from PhoSim
+    centroid files in sims_data the first time that filter is requested
+    through dxdy or dxdy_inverse, so that processes which only simulate
+    one filter only read and fit the data for that filter.
+
+    To avoid repeating that work in every process, the fitted
+    coefficients for each filter are written to a cache file in
+    cache_dir (see getCacheDir()) and read back from there by subsequent
+    instantiations.  The cache file is keyed on the Zernike polynomials
+    being fit, the LSST camera description in obs_lsstSim and the names
+    and contents (sha1 checksums) of the input data files, so it is
+    regenerated if any of those change.  Writing the cache for a
+    filter removes the files cached for that filter under any other key.
     """
 
-    def __init__(self):
-        self._camera = lsst_camera()
-        self._pixel_transformer = DMtoCameraPixelTransformer()
+    # increment this whenever a change to the code would change
+    # the fit coefficients or the format of the cache file
+    _cache_version = 3
+
+    def __init__(self, cache_dir=None, use_cache=True):
+        """
+        Parameters
+        ----------
+        cache_dir -- the directory in which to look for (and write)
+        the cache of fit coefficients.  If None, use the result of
+        getCacheDir()
+
+        use_cache -- a boolean.  If False, always fit the coefficients
+        from the input data and do not write a cache file.
+        (default=True)
+        """
         self._z_gen = ZernikePolynomialGenerator()
 
         self._rr = 500.0  # radius in mm of circle containing LSST focal plane;
@@ -124,68 +321,200 @@ class LsstZernikeFitter(object):
                 self._n_grid.append(n)
                 self._m_grid.append(m)
 
-        self._build_transformations()
+        self._basis = _ZernikeBasis(self._n_grid, self._m_grid, self._z_gen)
 
-    def _get_coeffs(self, x_in, y_in, x_out, y_out):
+        self._catsim_dir = os.path.join(getPackageDir('sims_data'),
+                                        'FocalPlaneData',
+                                        'CatSimData')
+
+        self._phosim_dir = os.path.join(getPackageDir('sims_data'),
+                                        'FocalPlaneData',
+                                        'PhoSimData')
+
+        self._cache_dir = None
+        if use_cache:
+            if cache_dir is None:
+                cache_dir = getCacheDir()
+            self._cache_dir = cache_dir
+
+        # the coefficients are filled in one band at a time
+        # by self._load_band(); each is a (2, n_terms) numpy array
+        # whose rows are the coefficients for dx and dy of the
+        # Zernike polynomials in self._n_grid, self._m_grid
+        self._pupil_to_focal = {}
+        self._focal_to_pupil = {}
+
+    def _input_files(self, band):
         """
-        Get the coefficients of the best fit Zernike Polynomial
-        expansion that transforms from x_in, y_in to x_out, y_out.
+        Return a sorted list of the full paths to the data files
+        from which the Zernike coefficients for band are fit.
+        """
+        prefix = 'centroid_lsst_e_2_f%d_' % self._band_to_int[band]
+        file_list = [os.path.join(self._catsim_dir, 'predicted_positions.txt')]
+        phosim_list = [name for name in os.listdir(self._phosim_dir)
+                       if name.startswith(prefix)]
+        file_list += [os.path.join(self._phosim_dir, name)
+                      for name in sorted(phosim_list)]
+        return file_list
+
+    def _input_key(self, band):
+        """
+        Return a hex digest characterizing the inputs to the fit
+        for band: the version of the cache format, the Zernike
+        polynomials being fit, the LSST camera description (see
+        _lsst_camera_key) and the name and sha1 checksum of every
+        input data file (see _file_digest).
+        """
+        hasher = hashlib.sha1()
+        hasher.update(('%d %.6e %s\n' % (self._cache_version, self._rr, band)).encode('utf-8'))
+        hasher.update(str(list(zip(self._n_grid, self._m_grid))).encode('utf-8'))
+        hasher.update(('\ncamera %s\n' % _lsst_camera_key()).encode('utf-8'))
+        for file_name in self._input_files(band):
+            hasher.update(('%s %s\n' % (os.path.basename(file_name),
+                                         _file_digest(file_name))).encode('utf-8'))
+        return hasher.hexdigest()
+
+    def _cache_file_name(self, band):
+        """
+        Return the name of the file in which the coefficients for
+        band are cached (None if the cache is not being used)
+        """
+        if self._cache_dir is None:
+            return None
+        return os.path.join(self._cache_dir,
+                            'LsstZernikeFitter_%s_%s.npz' % (band, self._input_key(band)))
 
-        Returns numpy arrays of the Zernike Polynomial expansion
-        coefficients in x and y.  Zernike Polynomials correspond
-        to the radial and angular orders stored in self._n_grid
-        and self._m_grid.
+    def _load_band(self, band):
+        """
+        Make sure that the coefficients for band (a string) are loaded,
+        either by reading them from the cache or by fitting them.
         """
+        if band in self._pupil_to_focal:
+            return
 
-        polynomials = {}
-        for n, m in zip(self._n_grid, self._m_grid):
-            values = self._z_gen.evaluate_xy(x_in/self._rr, y_in/self._rr, n, m)
-            polynomials[(n,m)] = values
+        cache_file_name = self._cache_file_name(band)
+        if cache_file_name is None or not self._read_cache(cache_file_name, band):
+            self._build_transformations(band)
+            if cache_file_name is not None:
+                self._write_cache(cache_file_name, band)
 
-        poly_keys = list(polynomials.keys())
+    def _read_cache(self, cache_file_name, band):
+        """
+        Try to read the fit coefficients for band from cache_file_name.
 
-        dx = x_out - x_in
-        dy = y_out - y_in
+        Returns True if the coefficients were successfully read;
+        False otherwise.
+        """
+        if not os.path.exists(cache_file_name):
+            return False
 
-        b = np.array([(dx*polynomials[k]).sum() for k in poly_keys])
-        m = np.array([[(polynomials[k1]*polynomials[k2]).sum() for k1 in poly_keys]
-                      for k2 in poly_keys])
+        try:
+            with np.load(cache_file_name) as cache:
+                if (int(cache['version']) != self._cache_version or
+                    not np.array_equal(cache['n_grid'], self._n_grid) or
+                    not np.array_equal(cache['m_grid'], self._m_grid)):
+
+                    return False
+
+                pupil_to_focal = np.array(cache['pupil_to_focal'], dtype=float)
+                focal_to_pupil = np.array(cache['focal_to_pupil'], dtype=float)
+                n_terms = len(self._n_grid)
+                if pupil_to_focal.shape != (2, n_terms) or focal_to_pupil.shape != (2, n_terms):
+                    return False
+        except (IOError, OSError, KeyError, ValueError):
+            return False
+
+        self._pupil_to_focal[band] = pupil_to_focal
+        self._focal_to_pupil[band] = focal_to_pupil
+        return True
+
+    def _write_cache(self, cache_file_name, band):
+        """
+        Write the fit coefficients for band to cache_file_name.
 
-        alpha_x_ = np.linalg.solve(m, b)
-        alpha_x = {}
-        for ii, kk in enumerate(poly_keys):
-            alpha_x[kk] = alpha_x_[ii]
+        The file is written to a temporary file and then moved into
+        place so that processes simultaneously reading the cache never
+        see a partially-written file.  Any files cached for band under
+        other keys (i.e. fit to inputs that have since changed) are
+        then removed.
+        """
+        cache = {}
+        cache['version'] = self._cache_version
+        cache['n_grid'] = np.array(self._n_grid)
+        cache['m_grid'] = np.array(self._m_grid)
+        cache['pupil_to_focal'] = self._pupil_to_focal[band]
+        cache['focal_to_pupil'] = self._focal_to_pupil[band]
+
+        cache_dir = os.path.dirname(cache_file_name)
+        temp_name = None
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            file_handle, temp_name = tempfile.mkstemp(dir=cache_dir, suffix='.npz')
+            with os.fdopen(file_handle, 'wb') as file_obj:
+                np.savez(file_obj, **cache)
+            os.replace(temp_name, cache_file_name)
+        except (IOError, OSError) as err:
+            if temp_name is not None and os.path.exists(temp_name):
+                os.unlink(temp_name)
+            warnings.warn("LsstZernikeFitter could not write cache file %s:\n%s" %
+                          (cache_file_name, str(err)))
+            return
+
+        prefix = 'LsstZernikeFitter_%s_' % band
+        for name in os.listdir(cache_dir):
+            if (name.startswith(prefix) and name.endswith('.npz') and
+                name != os.path.basename(cache_file_name)):
 
+                try:
+                    os.unlink(os.path.join(cache_dir, name))
+                except OSError:
+                    # another process may have removed it already
+                    pass
 
-        b = np.array([(dy*polynomials[k]).sum() for k in poly_keys])
-        m = np.array([[(polynomials[k1]*polynomials[k2]).sum() for k1 in poly_keys]
-                      for k2 in poly_keys])
+    def _design_matrix(self, xmm, ymm):
+        """
+        Return the design matrix of the Zernike expansion: a numpy array
+        of shape (len(xmm), n_terms) whose columns are the Zernike
+        polynomials in self._n_grid, self._m_grid evaluated at
+        (xmm, ymm)/self._rr
+        """
+        return self._basis.design_matrix(xmm/self._rr, ymm/self._rr)
+
+    def _get_coeffs(self, x_in, y_in, x_out, y_out):
+        """
+        Get the coefficients of the best fit Zernike Polynomial
+        expansion that transforms from x_in, y_in to x_out, y_out.
 
-        alpha_y_ = np.linalg.solve(m, b)
-        alpha_y = {}
-        for ii, kk in enumerate(poly_keys):
-            alpha_y[kk] = alpha_y_[ii]
+        The design matrix is evaluated once and the x and y offsets
+        are solved for together in a single least squares solution.
 
-        return alpha_x, alpha_y
+        Returns a numpy array of shape (2, n_terms) whose rows are
+        the Zernike Polynomial expansion coefficients in x and y.
+        Zernike Polynomials correspond to the radial and angular
+        orders stored in self._n_grid and self._m_grid.
+        """
+        design = self._design_matrix(x_in, y_in)
+        offsets = np.array([x_out - x_in, y_out - y_in]).transpose()
+        coeffs = np.linalg.lstsq(design, offsets, rcond=None)[0]
+        return np.ascontiguousarray(coeffs.transpose())
 
-    def _build_transformations(self):
+    def _load_catsim_positions(self):
         """
-        Solve for and store the coefficients of the Zernike
-        polynomial expansion of the difference between the
-        naive and the bandpass-dependent optical distortions
-        in the LSST camera.
+        Read in the positions of the sources that were given to PhoSim
+        and convert them to focal plane coordinates without attempting
+        to model the optical distortions in the telescope.  These are
+        the same for every filter, so they are computed once and stored
+        in self._catsim_xmm, self._catsim_ymm
         """
-        catsim_dir = os.path.join(getPackageDir('sims_data'),
-                                  'FocalPlaneData',
-                                  'CatSimData')
+        if hasattr(self, '_catsim_xmm'):
+            return
 
-        phosim_dir = os.path.join(getPackageDir('sims_data'),
-                                  'FocalPlaneData',
-                                  'PhoSimData')
+        from lsst.afw.cameraGeom import FOCAL_PLANE, FIELD_ANGLE
 
         # the file which contains the input sky positions of the objects
         # that were given to PhoSim
-        catsim_catalog = os.path.join(catsim_dir,'predicted_positions.txt')
+        catsim_catalog = os.path.join(self._catsim_dir,'predicted_positions.txt')
 
         with open(catsim_catalog, 'r') as input_file:
             header = input_file.readline()
@@ -209,86 +538,92 @@ class LsstZernikeFitter(object):
                                                        ra0, dec0, rotSkyPos)
 
         # convert from FIELD_ANGLE to FOCAL_PLANE without attempting to model
-        # the optical distortions in the telescope
-        field_to_focal = self._camera.getTransform(FIELD_ANGLE, FOCAL_PLANE)
-        catsim_xmm = np.zeros(len(x_field), dtype=float)
-        catsim_ymm = np.zeros(len(y_field), dtype=float)
-        for ii, (xx, yy) in enumerate(zip(x_field, y_field)):
-            focal_pt = field_to_focal.applyForward(geom.Point2D(xx, yy))
-            catsim_xmm[ii] = focal_pt.getX()
-            catsim_ymm[ii] = focal_pt.getY()
-
-        phosim_dtype = np.dtype([('id', int), ('phot', float),
-                                 ('xpix', float), ('ypix', float)])
+        # the optical distortions in the telescope; the underlying
+        # astshim Mapping transforms all of the points as one array
+        field_to_focal = self._camera.getTransform(FIELD_ANGLE, FOCAL_PLANE).getMapping()
+        catsim_focal = field_to_focal.applyForward(np.array([x_field, y_field]))
 
-        self._pupil_to_focal = {}
-        self._focal_to_pupil = {}
+        self._catsim_xmm = catsim_focal[0]
+        self._catsim_ymm = catsim_focal[1]
 
-        for i_filter in range(6):
-            self._pupil_to_focal[self._int_to_band[i_filter]] = {}
-            self._focal_to_pupil[self._int_to_band[i_filter]] = {}
-            phosim_xmm = np.zeros(len(catsim_data['ypup']), dtype=float)
-            phosim_ymm = np.zeros(len(catsim_data['ypup']), dtype=float)
-
-            for det in self._camera:
-                if det.getType() != SCIENCE:
-                    continue
-                pixels_to_focal = det.getTransform(PIXELS, FOCAL_PLANE)
-                det_name = det.getName()
-                bbox = det.getBBox()
-                det_name_m = det_name.replace(':','').replace(',','').replace(' ','_')
-
-                # read in the actual pixel positions of the sources as realized
-                # by PhoSim
-                centroid_name = 'centroid_lsst_e_2_f%d_%s_E000.txt' % (i_filter, det_name_m)
-                full_name = os.path.join(phosim_dir, centroid_name)
-                phosim_data = np.genfromtxt(full_name, dtype=phosim_dtype, skip_header=1)
-
-                # make sure that the data we are fitting to is not too close
-                # to the edge of the detector
-                assert phosim_data['xpix'].min() > bbox.getMinY() + 50.0
-                assert phosim_data['xpix'].max() < bbox.getMaxY() - 50.0
-                assert phosim_data['ypix'].min() > bbox.getMinX() + 50.0
-                assert phosim_data['ypix'].max() < bbox.getMaxX() - 50.0
-
-                xpix, ypix = self._pixel_transformer.dmPixFromCameraPix(phosim_data['xpix'],
-                                                                        phosim_data['ypix'],
-                                                                        det_name)
-                xmm = np.zeros(len(xpix), dtype=float)
-                ymm = np.zeros(len(ypix), dtype=float)
-                for ii in range(len(xpix)):
-                    focal_pt = pixels_to_focal.applyForward(geom.Point2D(xpix[ii], ypix[ii]))
-                    xmm[ii] = focal_pt.getX()
-                    ymm[ii] = focal_pt.getY()
-                phosim_xmm[phosim_data['id']-1] = xmm
-                phosim_ymm[phosim_data['id']-1] = ymm
-
-            # solve for the coefficients of the Zernike expansions
-            # necessary to model the optical transformations and go
-            # from the naive focal plane positions (catsim_xmm, catsim_ymm)
-            # to the PhoSim realized focal plane positions
-            alpha_x, alpha_y = self._get_coeffs(catsim_xmm, catsim_ymm,
-                                                phosim_xmm, phosim_ymm)
-
-            self._pupil_to_focal[self._int_to_band[i_filter]]['x'] = alpha_x
-            self._pupil_to_focal[self._int_to_band[i_filter]]['y'] = alpha_y
-
-            # solve for the coefficients to the Zernike expansions
-            # necessary to go back from the PhoSim realized focal plane
-            # positions to the naive CatSim predicted focal plane
-            # positions
-            alpha_x, alpha_y = self._get_coeffs(phosim_xmm, phosim_ymm,
-                                                catsim_xmm, catsim_ymm)
-
-            self._focal_to_pupil[self._int_to_band[i_filter]]['x'] = alpha_x
-            self._focal_to_pupil[self._int_to_band[i_filter]]['y'] = alpha_y
-
-    def _apply_transformation(self, transformation_dict, xmm, ymm, band):
+    def _build_transformations(self, band):
+        """
+        Solve for and store the coefficients of the Zernike
+        polynomial expansion of the difference between the
+        naive and the bandpass-dependent optical distortions
+        in the LSST camera for the filter band (a string).
+        """
+        # afw is only needed when the coefficients are not read
+        # from the cache
+        from lsst.afw.cameraGeom import PIXELS, FOCAL_PLANE, SCIENCE
+
+        if not hasattr(self, '_camera'):
+            self._camera = lsst_camera()
+            self._pixel_transformer = DMtoCameraPixelTransformer()
+
+        self._load_catsim_positions()
+        catsim_xmm = self._catsim_xmm
+        catsim_ymm = self._catsim_ymm
+
+        phosim_dir = self._phosim_dir
+        i_filter = self._band_to_int[band]
+
+        # read in the actual pixel positions of the sources as realized
+        # by PhoSim
+        if self._cache_dir is None:
+            centroid_data = readPhoSimCentroids(phosim_dir, i_filter)
+        else:
+            centroid_data = loadPhoSimCentroids(phosim_dir, i_filter,
+                                                cache_dir=self._cache_dir)
+
+        phosim_xmm = np.zeros(len(catsim_xmm), dtype=float)
+        phosim_ymm = np.zeros(len(catsim_ymm), dtype=float)
+
+        for det in self._camera:
+            if det.getType() != SCIENCE:
+                continue
+            pixels_to_focal = det.getTransform(PIXELS, FOCAL_PLANE).getMapping()
+            det_name = det.getName()
+            bbox = det.getBBox()
+            det_name_m = det_name.replace(':','').replace(',','').replace(' ','_')
+
+            phosim_data = centroid_data[det_name_m]
+
+            # make sure that the data we are fitting to is not too close
+            # to the edge of the detector
+            assert phosim_data['xpix'].min() > bbox.getMinY() + 50.0
+            assert phosim_data['xpix'].max() < bbox.getMaxY() - 50.0
+            assert phosim_data['ypix'].min() > bbox.getMinX() + 50.0
+            assert phosim_data['ypix'].max() < bbox.getMaxX() - 50.0
+
+            xpix, ypix = self._pixel_transformer.dmPixFromCameraPix(phosim_data['xpix'],
+                                                                    phosim_data['ypix'],
+                                                                    det_name)
+            focal = pixels_to_focal.applyForward(np.array([xpix, ypix]))
+            phosim_xmm[phosim_data['id']-1] = focal[0]
+            phosim_ymm[phosim_data['id']-1] = focal[1]
+
+        # solve for the coefficients of the Zernike expansions
+        # necessary to model the optical transformations and go
+        # from the naive focal plane positions (catsim_xmm, catsim_ymm)
+        # to the PhoSim realized focal plane positions
+        self._pupil_to_focal[band] = self._get_coeffs(catsim_xmm, catsim_ymm,
+                                                      phosim_xmm, phosim_ymm)
+
+        # solve for the coefficients to the Zernike expansions
+        # necessary to go back from the PhoSim realized focal plane
+        # positions to the naive CatSim predicted focal plane
+        # positions
+        self._focal_to_pupil[band] = self._get_coeffs(phosim_xmm, phosim_ymm,
+                                                      catsim_xmm, catsim_ymm)
+
+    def _apply_transformation(self, inverse, xmm, ymm, band, dtype=np.float64):
         """
         Parameters
         ----------
-        tranformation_dict -- a dict containing the coefficients
-        of the Zernike decomposition to be applied
+        inverse -- a boolean; if True, apply the focal plane to pupil
+        transformation; otherwise apply the pupil to focal plane
+        transformation
 
         xmm -- the input x position in mm
 
@@ -297,6 +632,9 @@ class LsstZernikeFitter(object):
         band -- the filter in which we are operating
         (can be either a string or an int; 0=u, 1=g, 2=r, etc.)
 
+        dtype -- the floating point type (np.float32 or np.float64)
+        in which to do the calculation
+
         Returns
         -------
         dx -- the x offset resulting from the transformation
@@ -306,21 +644,23 @@ class LsstZernikeFitter(object):
         if isinstance(band, int):
             band = self._int_to_band[band]
 
-        if isinstance(xmm, numbers.Number):
-            dx = 0.0
-            dy = 0.0
+        rr = np.dtype(dtype).type(self._rr)
+        xx = np.atleast_1d(np.asarray(xmm, dtype=dtype))/rr
+        yy = np.atleast_1d(np.asarray(ymm, dtype=dtype))/rr
+
+        self._load_band(band)
+        if inverse:
+            coeffs = self._focal_to_pupil[band]
         else:
-            dx = np.zeros(len(xmm), dtype=float)
-            dy = np.zeros(len(ymm), dtype=float)
+            coeffs = self._pupil_to_focal[band]
+        dxdy = self._basis.evaluate(xx, yy, coeffs)
 
-        for kk in self._pupil_to_focal[band]['x']:
-            values = self._z_gen.evaluate_xy(xmm/self._rr, ymm/self._rr, kk[0], kk[1])
-            dx += transformation_dict[band]['x'][kk]*values
-            dy += transformation_dict[band]['y'][kk]*values
+        if isinstance(xmm, numbers.Number):
+            return dxdy[0][0], dxdy[1][0]
 
-        return dx, dy
+        return dxdy[0], dxdy[1]
 
-    def dxdy(self, xmm, ymm, band):
+    def dxdy(self, xmm, ymm, band, dtype=np.float64):
         """
         Apply the transformation necessary when going from pupil
         coordinates to focal plane coordinates.
@@ -347,15 +687,20 @@ class LsstZernikeFitter(object):
         band -- the filter in which we are operating
         (can be either a string or an int; 0=u, 1=g, 2=r, etc.)
 
+        dtype -- the floating point type (np.float32 or np.float64) in
+        which to do the calculation.  np.float32 is faster and uses half
+        the memory, at the cost of ~1e-5 mm of precision.  (default=np.float64)
+
         Returns
         -------
         dx -- the offset in the x focal plane position in mm
 
         dy -- the offset in the y focal plane position in mm
         """
-        return self._apply_transformation(self._pupil_to_focal, xmm, ymm, band)
+        return self._apply_transformation(False, xmm, ymm, band,
+                                          dtype=dtype)
 
-    def dxdy_inverse(self, xmm, ymm, band):
+    def dxdy_inverse(self, xmm, ymm, band, dtype=np.float64):
         """
         Apply the transformation necessary when going from focal
         plane coordinates to pupil coordinates.
@@ -380,10 +725,15 @@ class LsstZernikeFitter(object):
         band -- the filter in which we are operating
         (can be either a string or an int; 0=u, 1=g, 2=r, etc.)
 
+        dtype -- the floating point type (np.float32 or np.float64) in
+        which to do the calculation.  np.float32 is faster and uses half
+        the memory, at the cost of ~1e-5 mm of precision.  (default=np.float64)
+
         Returns
         -------
         dx -- the offset in the x focal plane position in mm
 
         dy -- the offset in the y focal plane position in mm
         """
-        return self._apply_transformation(self._focal_to_pupil, xmm, ymm, band)
+        return self._apply_transformation(True, xmm, ymm, band,
+                                          dtype=dtype)
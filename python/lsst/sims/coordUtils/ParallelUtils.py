@@ -0,0 +1,117 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+__all__ = ["_run_in_chunks"]
+
+
+# the largest number of points handed to a worker at once
+# (bounds the size of the temporary arrays each worker allocates)
+_max_chunk_size = 1000000
+
+
+def _run_in_chunks(method, point_args, other_args, workers=None, executor=None):
+    """
+    Call method(**point_args, **other_args), splitting the points into
+    chunks that are converted in parallel.
+
+    method is the (module-level) conversion method to call.  It must
+    return a numpy array whose last axis runs over the points.
+
+    point_args is a dict of the arguments to method that can have one
+    value per point (coordinates, proper motions, chip names, etc.).
+    Those that are numpy arrays or lists with one element per point are
+    split into chunks; all others (None, single values) are passed to
+    every chunk unchanged.  The first value in point_args determines the
+    number of points.
+
+    other_args is a dict of the arguments that are passed to every
+    chunk unchanged.
+
+    workers is the number of chunks into which to split the points.  If
+    executor is None, a ThreadPoolExecutor with that many threads is
+    created (and shut down) for the call.
+
+    executor is a concurrent.futures.Executor (e.g. a ProcessPoolExecutor
+    or a long-lived ThreadPoolExecutor) to which the chunks are submitted.
+    If it is a process pool, method and all of its arguments must be
+    picklable, and each process builds its own camera models.  Unless
+    workers is also given, the points are split into as many chunks as
+    the executor has workers (os.cpu_count() if that cannot be determined).
+
+    The first chunk is converted in the calling thread before the others
+    are submitted, so that the camera models and lookup tables which the
+    conversion methods build the first time they are called are built
+    once, before any of the workers need them.  When an executor is given,
+    there are always at least two chunks, so that it receives some of the
+    work.  If the conversion of any chunk raises an exception, the chunks
+    which have not started yet are cancelled before it is re-raised.
+
+    The results are concatenated in the order of the input points, and are
+    identical to the result of calling method on all of the points at once.
+    """
+    if workers is not None and (not isinstance(workers, (int, np.integer)) or workers < 1):
+        raise RuntimeError("workers must be a positive integer; "
+                           "you passed %s to %s" % (str(workers), method.__name__))
+
+    first_arg = next(iter(point_args.values()))
+    if not isinstance(first_arg, np.ndarray) or first_arg.ndim != 1:
+        # scalar inputs (or invalid inputs, which method will complain about)
+        return method(**point_args, **other_args)
+
+    n_pts = len(first_arg)
+    for value in point_args.values():
+        if isinstance(value, (list, np.ndarray)) and len(value) not in (1, n_pts):
+            # let method raise the appropriate exception
+            return method(**point_args, **other_args)
+
+    if workers is not None:
+        n_chunks = workers
+    else:
+        n_chunks = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+
+    if executor is not None:
+        n_chunks = max(2, n_chunks)
+
+    chunk_size = min(_max_chunk_size, -(-n_pts//n_chunks))
+    if n_pts <= chunk_size:
+        return method(**point_args, **other_args)
+
+    def chunk_args(i_start):
+        args = dict(other_args)
+        for name, value in point_args.items():
+            if isinstance(value, (list, np.ndarray)) and len(value) == n_pts:
+                args[name] = value[i_start:i_start+chunk_size]
+            else:
+                args[name] = value
+        return args
+
+    chunk_starts = range(0, n_pts, chunk_size)
+    results = [method(**chunk_args(chunk_starts[0]))]
+
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(method, **chunk_args(i_start))
+                       for i_start in chunk_starts[1:]]
+            results += _collect_results(futures)
+    else:
+        futures = [executor.submit(method, **chunk_args(i_start))
+                   for i_start in chunk_starts[1:]]
+        results += _collect_results(futures)
+
+    return np.concatenate(results, axis=-1)
+
+
+def _collect_results(futures):
+    """
+    Return the results of futures, in order.  If any of them raises an
+    exception, cancel the others (those that have not started running)
+    before re-raising it, so that they do not keep the executor busy.
+    """
+    try:
+        return [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
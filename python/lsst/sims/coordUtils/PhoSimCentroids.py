@@ -0,0 +1,330 @@
+"""
+This module contains methods to read in the PhoSim centroid files
+(centroid_lsst_e_2_f*_*_E000.txt) in sims_data that are used to fit
+the filter-dependent optical distortions of the LSST camera.
+
+The centroid data is returned as a dict keyed on detector name (with
+the punctuation removed as in the centroid file names, e.g. 'R22_S11')
+whose values are dicts of numpy arrays keyed on 'id', 'phot', 'xpix'
+and 'ypix'.
+"""
+import numpy as np
+import os
+import re
+import hashlib
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from lsst.sims.coordUtils import getCacheDir
+
+__all__ = ["readPhoSimCentroidFile", "readPhoSimCentroids",
+           "consolidatePhoSimCentroids", "loadPhoSimCentroids"]
+
+
+_centroid_columns = ('id', 'phot', 'xpix', 'ypix')
+
+_centroid_file_pattern = re.compile(r'^centroid_lsst_e_2_f([0-9])_(.+)_E000\.txt$')
+
+# increment this whenever the format of the consolidated file changes
+_consolidated_version = 2
+
+
+def _default_n_threads():
+    n_cpu = os.cpu_count()
+    if n_cpu is None:
+        return 4
+    return min(8, n_cpu)
+
+
+def _centroid_file_list(phosim_dir, i_filter=None):
+    """
+    Return a sorted list of (i_filter, detector name, file name) tuples
+    for the centroid files in phosim_dir.  If i_filter is not None,
+    only return the files for that filter.
+    """
+    file_list = []
+    for name in os.listdir(phosim_dir):
+        match = _centroid_file_pattern.match(name)
+        if match is None:
+            continue
+        file_filter = int(match.group(1))
+        if i_filter is not None and file_filter != i_filter:
+            continue
+        file_list.append((file_filter, match.group(2), name))
+    file_list.sort()
+    return file_list
+
+
+def readPhoSimCentroidFile(file_name):
+    """
+    Read in a PhoSim centroid file.
+
+    These files have one header line followed by four whitespace-separated
+    columns (id, phot, xpix, ypix), so they are parsed in a single pass
+    with np.fromstring, which is much faster than np.genfromtxt.
+
+    Parameters
+    ----------
+    file_name is the full path to the file
+
+    Returns
+    -------
+    A dict of numpy arrays keyed on 'id', 'phot', 'xpix', 'ypix'
+    """
+    with open(file_name, 'r') as input_file:
+        input_file.readline()
+        body = input_file.read()
+
+    values = np.fromstring(body, dtype=float, sep=' ')
+    n_lines = len([line for line in body.split('\n') if len(line.strip()) > 0])
+    if len(values) != 4*n_lines:
+        raise RuntimeError("Could not parse %s as a PhoSim centroid file; "
+                           "expected 4 columns in %d rows; found %d values" %
+                           (file_name, n_lines, len(values)))
+
+    values = values.reshape((n_lines, 4))
+    output = {}
+    output['id'] = values[:, 0].astype(int)
+    output['phot'] = values[:, 1].copy()
+    output['xpix'] = values[:, 2].copy()
+    output['ypix'] = values[:, 3].copy()
+    return output
+
+
+def readPhoSimCentroids(phosim_dir, i_filter, n_threads=None):
+    """
+    Read in all of the PhoSim centroid files for one filter, using a pool
+    of threads to read several files concurrently.
+
+    Parameters
+    ----------
+    phosim_dir is the directory containing the centroid files
+
+    i_filter is the filter as an int (0=u, 1=g, 2=r, etc.)
+
+    n_threads is the number of threads to use (default is the number
+    of CPUs, up to a maximum of 8)
+
+    Returns
+    -------
+    A dict keyed on detector name whose values are the outputs of
+    readPhoSimCentroidFile
+    """
+    if n_threads is None:
+        n_threads = _default_n_threads()
+
+    file_list = _centroid_file_list(phosim_dir, i_filter=i_filter)
+    full_names = [os.path.join(phosim_dir, name) for _, _, name in file_list]
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        data_list = list(executor.map(readPhoSimCentroidFile, full_names))
+
+    return dict((det_name, data) for (_, det_name, _), data in zip(file_list, data_list))
+
+
+def _centroid_files_key(phosim_dir, refresh=False):
+    """
+    Return a hex digest of the name, size and modification time (not the
+    contents) of every centroid file in phosim_dir.
+
+    The digest is computed once per phosim_dir per process (so that
+    loading each filter does not stat the files of all six filters again)
+    and kept in _centroid_files_key._cache.  If refresh is True, it is
+    recomputed (consolidatePhoSimCentroids does this before reading the
+    files, so that the file it writes is keyed on their current state).
+    """
+    if not hasattr(_centroid_files_key, '_cache'):
+        _centroid_files_key._cache = {}
+
+    abs_dir = os.path.abspath(phosim_dir)
+    if refresh or abs_dir not in _centroid_files_key._cache:
+        hasher = hashlib.sha1()
+        for _, _, name in _centroid_file_list(abs_dir):
+            stat = os.stat(os.path.join(abs_dir, name))
+            hasher.update(('%s %d %d\n' % (name, stat.st_size, stat.st_mtime_ns)).encode('utf-8'))
+        _centroid_files_key._cache[abs_dir] = hasher.hexdigest()
+    return _centroid_files_key._cache[abs_dir]
+
+
+def _consolidated_file_name(phosim_dir, cache_dir, refresh=False):
+    """
+    Return the name of the file in cache_dir that holds the consolidated
+    contents of the centroid files in phosim_dir.
+
+    The name is PhoSimCentroids_v<version>_<directory key>_<file key>.npy.
+    The directory key is a hash of the path to phosim_dir.  The file key
+    is a hash of the name, size and modification time (not the contents)
+    of every centroid file (see _centroid_files_key; refresh is passed to
+    it), so a consolidated file is not used once any of the centroid files
+    has been touched, copied or rewritten.
+    """
+    dir_key = hashlib.sha1(os.path.abspath(phosim_dir).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'PhoSimCentroids_v%d_%s_%s.npy' %
+                        (_consolidated_version, dir_key,
+                         _centroid_files_key(phosim_dir, refresh=refresh)))
+
+
+def _stale_consolidated_files(file_name):
+    """
+    Return the full paths of the consolidated files in the directory of
+    file_name (see _consolidated_file_name) that were written for the same
+    PhoSim directory under a different file key, or by an older version of
+    this module, and so will never be read again.
+    """
+    cache_dir, base_name = os.path.split(file_name)
+    if not os.path.isdir(cache_dir):
+        return []
+
+    prefix = base_name[:base_name.rindex('_')+1]
+    stale = []
+    for name in os.listdir(cache_dir):
+        if name == base_name or not name.endswith('.npy'):
+            continue
+        if name.startswith(prefix):
+            stale.append(name)
+        elif (name.startswith('PhoSimCentroids_v') and
+              not name.startswith('PhoSimCentroids_v%d_' % _consolidated_version)):
+            stale.append(name)
+
+    return [os.path.join(cache_dir, name) for name in sorted(stale)]
+
+
+def consolidatePhoSimCentroids(phosim_dir, cache_dir=None, n_threads=None):
+    """
+    Read in all of the PhoSim centroid files in phosim_dir and write
+    them to a single binary file in cache_dir, which loadPhoSimCentroids
+    will memory-map instead of parsing the text files.
+
+    The file is a .npy file containing a single record whose fields
+    ('filter', 'detector', 'id', 'phot', 'xpix', 'ypix') are each a
+    contiguous array with one element per source, sorted by filter
+    and detector.
+
+    Parameters
+    ----------
+    phosim_dir is the directory containing the centroid files
+
+    cache_dir is the directory in which to write the consolidated file
+    (default is getCacheDir())
+
+    n_threads is the number of threads to use when reading the text
+    files (default is the number of CPUs, up to a maximum of 8)
+
+    Any consolidated files previously written to cache_dir for phosim_dir
+    (before the centroid files changed) are removed.
+
+    Returns
+    -------
+    The name of the file that was written
+    """
+    if cache_dir is None:
+        cache_dir = getCacheDir()
+
+    file_name = _consolidated_file_name(phosim_dir, cache_dir, refresh=True)
+
+    filter_list = []
+    det_list = []
+    data_list = []
+    for i_filter in range(6):
+        filter_data = readPhoSimCentroids(phosim_dir, i_filter, n_threads=n_threads)
+        for det_name in sorted(filter_data):
+            n_src = len(filter_data[det_name]['id'])
+            filter_list.append(np.full(n_src, i_filter, dtype=np.int8))
+            det_list.append(np.full(n_src, det_name, dtype='U16'))
+            data_list.append(filter_data[det_name])
+
+    n_total = sum([len(ff) for ff in filter_list])
+    dtype = np.dtype([('filter', np.int8, (n_total,)),
+                      ('detector', 'U16', (n_total,)),
+                      ('id', int, (n_total,)),
+                      ('phot', float, (n_total,)),
+                      ('xpix', float, (n_total,)),
+                      ('ypix', float, (n_total,))])
+
+    consolidated = np.zeros((), dtype=dtype)
+    if n_total > 0:
+        consolidated['filter'][:] = np.concatenate(filter_list)
+        consolidated['detector'][:] = np.concatenate(det_list)
+        for column in _centroid_columns:
+            consolidated[column][:] = np.concatenate([data[column] for data in data_list])
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    file_handle, temp_name = tempfile.mkstemp(dir=cache_dir, suffix='.npy')
+    try:
+        with os.fdopen(file_handle, 'wb') as file_obj:
+            np.save(file_obj, consolidated)
+        os.replace(temp_name, file_name)
+    finally:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+
+    for stale_name in _stale_consolidated_files(file_name):
+        try:
+            os.unlink(stale_name)
+        except OSError:
+            # another process may have removed it already
+            pass
+
+    return file_name
+
+
+def loadPhoSimCentroids(phosim_dir, i_filter, cache_dir=None, n_threads=None):
+    """
+    Return the PhoSim centroid data for one filter.
+
+    If consolidatePhoSimCentroids has been run on phosim_dir (and the
+    centroid files had not changed since when they were first looked at
+    by this process), the data is memory-mapped
+    from the consolidated file.  Otherwise, the text files are read
+    with readPhoSimCentroids.  A warning is emitted if there is a
+    consolidated file for phosim_dir that is out of date (i.e. the
+    centroid files have been modified, touched or copied since it was
+    written); run consolidatePhoSimCentroids again to replace it.
+
+    Parameters
+    ----------
+    phosim_dir is the directory containing the centroid files
+
+    i_filter is the filter as an int (0=u, 1=g, 2=r, etc.)
+
+    cache_dir is the directory in which to look for the consolidated
+    file (default is getCacheDir())
+
+    n_threads is the number of threads to use if reading the text files
+
+    Returns
+    -------
+    A dict keyed on detector name whose values are dicts of numpy
+    arrays keyed on 'id', 'phot', 'xpix', 'ypix'
+    """
+    if cache_dir is None:
+        cache_dir = getCacheDir()
+
+    file_name = _consolidated_file_name(phosim_dir, cache_dir)
+    if not os.path.exists(file_name):
+        prefix = os.path.basename(file_name)
+        prefix = prefix[:prefix.rindex('_')+1]
+        stale = [name for name in _stale_consolidated_files(file_name)
+                 if os.path.basename(name).startswith(prefix)]
+        if len(stale) > 0:
+            warnings.warn("The consolidated PhoSim centroid file %s is out of date: the "
+                          "centroid files in %s have changed since it was written.  "
+                          "Reading the text files instead; run consolidatePhoSimCentroids "
+                          "to replace it." % (stale[0], phosim_dir))
+        return readPhoSimCentroids(phosim_dir, i_filter, n_threads=n_threads)
+
+    consolidated = np.load(file_name, mmap_mode='r')
+    filter_col = consolidated['filter']
+    i_start = np.searchsorted(filter_col, i_filter, side='left')
+    i_end = np.searchsorted(filter_col, i_filter, side='right')
+
+    det_names, det_start = np.unique(consolidated['detector'][i_start:i_end],
+                                     return_index=True)
+    det_end = np.append(det_start[1:], i_end-i_start)
+
+    output = {}
+    for det_name, i0, i1 in zip(det_names, det_start+i_start, det_end+i_start):
+        output[str(det_name)] = dict((column, consolidated[column][i0:i1])
+                                     for column in _centroid_columns)
+    return output
@@ -0,0 +1,210 @@
+import numbers
+import numpy as np
+
+
+__all__ = ["streamConversion", "_convert_into"]
+
+
+# An upper limit on the memory (in bytes) that the conversion pipelines
+# (chipNameFromRaDecLSST, pixelCoordsFromRaDecLSST, cameraCoordsFromRaDecLSST,
+# raDecFromPixelCoordsLSST and the generic chipNameFromRaDec,
+# pixelCoordsFromRaDec and raDecFromPixelCoords) allocate per object
+# while converting a chunk, including their outputs, i.e. the
+# peak memory traced by tracemalloc while converting a large catalog
+# divided by the number of objects.  test_working_set in
+# tests/testStreamingUtils.py measures this for each pipeline and fails
+# if any of them exceeds the limit.
+_working_bytes_per_object = 1024
+
+_default_max_chunk_bytes = 256*1024*1024
+
+
+def _chunk_arguments(chunk):
+    """
+    Split a chunk of inputs (see streamConversion) into a tuple of
+    positional arguments and a dict of keyword arguments.  Structured
+    arrays are split into views of their fields, so no data is copied.
+    """
+    if isinstance(chunk, np.ndarray) and chunk.dtype.names is not None:
+        return (), dict((name, chunk[name]) for name in chunk.dtype.names)
+    if isinstance(chunk, dict):
+        return (), chunk
+    if isinstance(chunk, (tuple, list)):
+        return tuple(chunk), {}
+    raise RuntimeError("streamConversion cannot interpret a chunk of type %s; "
+                       "chunks must be tuples of arrays, dicts of arrays "
+                       "or structured arrays" % type(chunk))
+
+
+def _slice_column(value, n_obj, i_start, i_end):
+    """
+    Return the objects i_start:i_end of value if it is a list or numpy
+    array with one element per object (n_obj); otherwise return value
+    (e.g. a single chip name that applies to every object).
+    """
+    if isinstance(value, list) and len(value) == n_obj:
+        return value[i_start:i_end]
+    if isinstance(value, np.ndarray) and value.ndim > 0 and len(value) == n_obj:
+        return value[i_start:i_end]
+    return value
+
+
+def streamConversion(method, chunks, max_chunk_bytes=_default_max_chunk_bytes, **kwargs):
+    """
+    Apply one of the coordinate conversion methods of this package to a
+    catalog that arrives in chunks (e.g. from a database cursor or a file
+    reader), so that the whole catalog never has to be held in memory.
+
+    Parameters
+    ----------
+    method -- the conversion method to apply (e.g. chipNameFromRaDecLSST,
+    pixelCoordsFromRaDecLSST, raDecFromPixelCoords, cameraCoordsFromRaDecLSST)
+
+    chunks -- an iterable (e.g. a generator) of chunks of the per-object
+    inputs of method.  Each chunk is one of
+
+        - a tuple of numpy arrays, passed as the leading positional
+          arguments of method (e.g. (ra, dec) or (xPix, yPix, chipName))
+
+        - a dict mapping the names of the arguments of method to numpy
+          arrays (e.g. {'ra': ra, 'dec': dec, 'pm_ra': pm_ra})
+
+        - a numpy structured array whose field names are the names of
+          the arguments of method (its fields are passed as views)
+
+    max_chunk_bytes -- an upper limit on the memory (in bytes) used to
+    convert each chunk (default 256 MB).  Chunks with more objects than
+    this allows are split into smaller chunks.  The memory needed is
+    estimated as _working_bytes_per_object bytes per object.  If None,
+    chunks are never split.
+
+    kwargs -- the other arguments of method (obs_metadata, camera, band,
+    etc.), which are passed to every call.  Per-object arguments must be
+    passed in the chunks.
+
+    Yields
+    ------
+    The output of method for each chunk (or piece of a split chunk), in
+    the order in which the objects were read.
+    """
+    if max_chunk_bytes is not None:
+        if not isinstance(max_chunk_bytes, numbers.Number) or max_chunk_bytes <= 0:
+            raise RuntimeError("max_chunk_bytes must be a positive number; "
+                               "you passed %s" % str(max_chunk_bytes))
+        max_objects = max(1, int(max_chunk_bytes // _working_bytes_per_object))
+    else:
+        max_objects = None
+
+    for chunk in chunks:
+        args, chunk_kwargs = _chunk_arguments(chunk)
+
+        # the number of objects is the length of the longest per-object
+        # column; others (e.g. a single chip name) apply to every object
+        columns = [value for value in list(args) + list(chunk_kwargs.values())
+                   if isinstance(value, list) or
+                   (isinstance(value, np.ndarray) and value.ndim > 0)]
+        if len(columns) == 0:
+            # scalar inputs
+            yield method(*args, **chunk_kwargs, **kwargs)
+            continue
+
+        n_obj = max(len(value) for value in columns)
+        if max_objects is None or n_obj <= max_objects:
+            yield method(*args, **chunk_kwargs, **kwargs)
+            continue
+
+        for i_start in range(0, n_obj, max_objects):
+            i_end = i_start + max_objects
+            yield method(*[_slice_column(value, n_obj, i_start, i_end) for value in args],
+                         **dict((name, _slice_column(value, n_obj, i_start, i_end))
+                                for name, value in chunk_kwargs.items()),
+                         **kwargs)
+
+
+def _write_chunk(out, result, i_start, i_end, method_name):
+    """
+    Write result, the output of method_name for the objects i_start:i_end,
+    into the corresponding elements of out (see _convert_into).
+    """
+    if isinstance(out, np.ndarray) and out.dtype.names is not None:
+        missing = [name for name in result.dtype.names if name not in out.dtype.names]
+        if len(missing) > 0:
+            raise RuntimeError("The structured array passed as out to %s has no "
+                               "fields %s" % (method_name, str(missing)))
+        pairs = [(out[name], result[name]) for name in result.dtype.names]
+    elif isinstance(out, (tuple, list)):
+        if len(out) != len(result):
+            raise RuntimeError("%s returns %d rows; you passed %d arrays as out"
+                               % (method_name, len(result), len(out)))
+        pairs = list(zip(out, result))
+    else:
+        pairs = [(out, result)]
+
+    for column, value in pairs:
+        target = column[..., i_start:i_end]
+        if target.shape != np.shape(value):
+            raise RuntimeError("%s returns an array of shape %s for %d objects; "
+                               "out has shape %s"
+                               % (method_name, str(np.shape(value)), i_end-i_start,
+                                  str(column.shape)))
+        target[...] = value
+
+
+def _convert_into(method, point_args, other_args, out):
+    """
+    Call method(**point_args, **other_args) and write the result into the
+    preallocated buffer out, which is returned.
+
+    method is the (module-level) conversion method to call.
+
+    point_args is a dict of the arguments to method that can have one
+    value per object (see _run_in_chunks).  The first value in point_args
+    must be a numpy array; it determines the number of objects.
+
+    other_args is a dict of the arguments that are passed to every call
+    unchanged.
+
+    out is one of
+
+        - a numpy array (or np.memmap) with the same shape as the output of
+          method, e.g. (2, N) for pixel coordinates or (N,) for chip names
+
+        - a tuple (or list) of 1-D arrays of length N, one per row of the
+          output of method, e.g. two fields of a structured array
+
+        - a structured array of length N with (at least) the fields of the
+          structured array returned by method (e.g. cameraCoordsFromRaDecLSST)
+
+    The objects are converted in chunks of at most
+    _default_max_chunk_bytes/_working_bytes_per_object objects, each of
+    which is written into out before the next is converted, so no temporary
+    array with one element per object is ever allocated.  The inputs are
+    sliced, not copied, so they can also be fields of a structured array or
+    np.memmaps.  Values are cast to the dtype of out.
+    """
+    first_arg = next(iter(point_args.values()))
+    if not isinstance(first_arg, np.ndarray) or first_arg.ndim != 1:
+        raise RuntimeError("%s can only write into out when its inputs are "
+                           "1-D numpy arrays" % method.__name__)
+
+    n_obj = len(first_arg)
+
+    if isinstance(out, (tuple, list)):
+        columns = list(out)
+    else:
+        columns = [out]
+    for column in columns:
+        if not isinstance(column, np.ndarray) or column.ndim == 0 or column.shape[-1] != n_obj:
+            raise RuntimeError("out must be a numpy array (or a tuple of numpy arrays) "
+                               "with one element per object; %s was called with %d "
+                               "objects" % (method.__name__, n_obj))
+
+    chunk_size = max(1, _default_max_chunk_bytes//_working_bytes_per_object)
+    for i_start in range(0, n_obj, chunk_size):
+        i_end = min(n_obj, i_start + chunk_size)
+        result = method(**dict((name, _slice_column(value, n_obj, i_start, i_end))
+                               for name, value in point_args.items()),
+                        **other_args)
+        _write_chunk(out, result, i_start, i_end, method.__name__)
+
+    return out
@@ -1,5 +1,108 @@
-from .LsstCameraMethod import *
-from .DMtoCameraModule import *
-from .LsstZernikeFitter import *
-from .CameraUtils import *
-from .LsstCameraUtils import *
+"""
+The contents of the sub-modules of lsst.sims.coordUtils are exposed in the
+package namespace, but the sub-modules are only imported the first time one
+of their contents is requested.  This keeps `import lsst.sims.coordUtils`
+from importing afw, obs_lsstSim, etc. until they are actually needed.
+
+_submodule_exports must list the contents of __all__ for each sub-module
+(this is verified by tests/testImports.py).
+"""
+import importlib
+import types
+import sys
+
+_submodule_exports = {}
+_submodule_exports['CacheUtils'] = ["getCacheDir"]
+
+_submodule_exports['ParallelUtils'] = ["_run_in_chunks"]
+
+_submodule_exports['StreamingUtils'] = ["streamConversion", "_convert_into"]
+
+_submodule_exports['CameraGeometrySnapshot'] = ["CameraGeometrySnapshot", "RadialFieldTransform",
+                                                "_apply_afw_transform"]
+
+_submodule_exports['LsstCameraMethod'] = ["lsst_camera", "lsst_camera_snapshot",
+                                          "lsst_distortion_model", "_lsst_camera_key"]
+
+_submodule_exports['DMtoCameraModule'] = ["DMtoCameraPixelTransformer"]
+
+_submodule_exports['PhoSimCentroids'] = ["readPhoSimCentroidFile", "readPhoSimCentroids",
+                                         "consolidatePhoSimCentroids", "loadPhoSimCentroids"]
+
+_submodule_exports['LsstZernikeFitter'] = ["LsstZernikeFitter"]
+
+_submodule_exports['CameraUtils'] = ["MultipleChipWarning", "getCornerPixels",
+                                     "_getCornerRaDec", "getCornerRaDec",
+                                     "chipNameFromPupilCoords", "chipNameFromRaDec",
+                                     "_chipNameFromRaDec",
+                                     "pixelCoordsFromPupilCoords", "pixelCoordsFromRaDec",
+                                     "_pixelCoordsFromRaDec",
+                                     "focalPlaneCoordsFromPupilCoords",
+                                     "focalPlaneCoordsFromRaDec",
+                                     "_focalPlaneCoordsFromRaDec",
+                                     "pupilCoordsFromPixelCoords",
+                                     "pupilCoordsFromFocalPlaneCoords",
+                                     "raDecFromPixelCoords", "_raDecFromPixelCoords",
+                                     "chipNameFromChipCode", "chipCodeFromChipName",
+                                     "_validate_inputs_and_chipname", "_validate_dtype",
+                                     "_as_chip_codes", "_group_by_chip",
+                                     "_radial_field_transform", "_camera_snapshot",
+                                     "_detector_name_table"]
+
+_submodule_exports['LsstCameraUtils'] = ["focalPlaneCoordsFromPupilCoordsLSST",
+                                         "pupilCoordsFromFocalPlaneCoordsLSST",
+                                         "chipNameFromPupilCoordsLSST",
+                                         "_chipNameFromRaDecLSST", "chipNameFromRaDecLSST",
+                                         "pixelCoordsFromPupilCoordsLSST",
+                                         "pupilCoordsFromPixelCoordsLSST",
+                                         "_pixelCoordsFromRaDecLSST", "pixelCoordsFromRaDecLSST",
+                                         "_raDecFromPixelCoordsLSST", "raDecFromPixelCoordsLSST",
+                                         "cameraCoordsFromPupilCoordsLSST",
+                                         "_cameraCoordsFromRaDecLSST", "cameraCoordsFromRaDecLSST",
+                                         "clean_up_lsst_camera"]
+
+_name_to_submodule = {}
+for _submodule_name in _submodule_exports:
+    for _name in _submodule_exports[_submodule_name]:
+        _name_to_submodule[_name] = _submodule_name
+
+__all__ = list(_name_to_submodule.keys())
+
+
+def _export(submodule):
+    """
+    Copy the contents of submodule.__all__ into the package namespace
+    """
+    package = sys.modules[__name__]
+    for name in submodule.__all__:
+        types.ModuleType.__setattr__(package, name, getattr(submodule, name))
+
+
+class _LazyModule(types.ModuleType):
+    """
+    A module whose missing attributes are imported from the sub-module
+    listed in _submodule_exports.
+    """
+
+    def __getattr__(self, name):
+        if name not in _name_to_submodule:
+            raise AttributeError("module '%s' has no attribute '%s'" % (self.__name__, name))
+        _export(importlib.import_module('.%s' % _name_to_submodule[name], self.__name__))
+        return self.__dict__[name]
+
+    def __setattr__(self, name, value):
+        types.ModuleType.__setattr__(self, name, value)
+        # The import machinery sets each sub-module as an attribute of the
+        # package after it is loaded, which would hide any contents of the
+        # sub-module that share its name (e.g. the class LsstZernikeFitter
+        # in the module LsstZernikeFitter).  Make sure that the contents
+        # of the sub-module take precedence, as they would after
+        # `from .LsstZernikeFitter import *`
+        if name in _submodule_exports and isinstance(value, types.ModuleType):
+            _export(value)
+
+    def __dir__(self):
+        return sorted(set(types.ModuleType.__dir__(self)) | set(__all__))
+
+
+sys.modules[__name__].__class__ = _LazyModule
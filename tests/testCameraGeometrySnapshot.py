@@ -0,0 +1,205 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+
+import lsst.utils.tests
+import lsst.geom as geom
+from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE, PIXELS, TAN_PIXELS
+from lsst.sims.coordUtils import CameraGeometrySnapshot
+from lsst.sims.coordUtils import lsst_camera, lsst_camera_snapshot
+from lsst.sims.coordUtils import clean_up_lsst_camera, _lsst_camera_key
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class CameraGeometrySnapshotTestCase(unittest.TestCase):
+    """
+    Test that CameraGeometrySnapshot reproduces the transformations
+    of the afw.cameraGeom model of the LSST camera
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._scratch_dir = tempfile.mkdtemp(prefix='camera_snapshot_test_')
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.exists(cls._scratch_dir):
+            shutil.rmtree(cls._scratch_dir)
+        clean_up_lsst_camera()
+
+    def test_detectors(self):
+        """
+        Test that the detector names, types, bounding boxes and centers
+        match the camera
+        """
+        camera = lsst_camera()
+        snapshot = lsst_camera_snapshot()
+        self.assertEqual(len(snapshot.names), len(camera))
+        for ii, det in enumerate(camera):
+            self.assertEqual(snapshot.names[ii], det.getName())
+            self.assertEqual(snapshot.getIndex(det.getName()), ii)
+            bbox = det.getBBox()
+            np.testing.assert_array_equal(snapshot.bbox[ii],
+                                          [bbox.getMinX(), bbox.getMinY(),
+                                           bbox.getMaxX(), bbox.getMaxY()])
+            center = det.getCenter(FOCAL_PLANE)
+            self.assertEqual(snapshot.center_focal[ii][0], center.getX())
+            self.assertEqual(snapshot.center_focal[ii][1], center.getY())
+
+    def test_field_angle_transforms(self):
+        """
+        Test the conversions between FIELD_ANGLE and FOCAL_PLANE
+        """
+        camera = lsst_camera()
+        snapshot = lsst_camera_snapshot()
+        field_to_focal = camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE)
+
+        rng = np.random.RandomState(66123)
+        x_field = rng.random_sample(1000)*0.06-0.03
+        y_field = rng.random_sample(1000)*0.06-0.03
+        focal_pts = field_to_focal.applyForward([geom.Point2D(xx, yy)
+                                                 for xx, yy in zip(x_field, y_field)])
+        x_afw = np.array([pt.getX() for pt in focal_pts])
+        y_afw = np.array([pt.getY() for pt in focal_pts])
+
+        x_focal, y_focal = snapshot.focalPlaneFromFieldAngle(x_field, y_field)
+        np.testing.assert_allclose(x_focal, x_afw, atol=1.0e-10, rtol=0.0)
+        np.testing.assert_allclose(y_focal, y_afw, atol=1.0e-10, rtol=0.0)
+
+        x_back, y_back = snapshot.fieldAngleFromFocalPlane(x_focal, y_focal)
+        np.testing.assert_allclose(x_back, x_field, atol=1.0e-14, rtol=0.0)
+        np.testing.assert_allclose(y_back, y_field, atol=1.0e-14, rtol=0.0)
+
+        # test scalars
+        for ii in range(10):
+            xf, yf = snapshot.focalPlaneFromFieldAngle(x_field[ii], y_field[ii])
+            self.assertEqual(xf, x_focal[ii])
+            self.assertEqual(yf, y_focal[ii])
+
+    def test_pixel_transforms(self):
+        """
+        Test the conversions between FOCAL_PLANE and PIXELS/TAN_PIXELS
+        """
+        camera = lsst_camera()
+        snapshot = lsst_camera_snapshot()
+        rng = np.random.RandomState(1123)
+        for det in camera:
+            i_det = snapshot.getIndex(det.getName())
+            x_pix = rng.random_sample(20)*4000.0
+            y_pix = rng.random_sample(20)*4000.0
+            pixel_pts = [geom.Point2D(xx, yy) for xx, yy in zip(x_pix, y_pix)]
+            for pixel_sys, is_tan in zip((PIXELS, TAN_PIXELS), (False, True)):
+                focal_pts = det.getTransform(pixel_sys, FOCAL_PLANE).applyForward(pixel_pts)
+                x_afw = np.array([pt.getX() for pt in focal_pts])
+                y_afw = np.array([pt.getY() for pt in focal_pts])
+                x_focal, y_focal = snapshot.focalPlaneFromPixels(x_pix, y_pix, i_det,
+                                                                 tanPixels=is_tan)
+                np.testing.assert_allclose(x_focal, x_afw, atol=1.0e-9, rtol=0.0)
+                np.testing.assert_allclose(y_focal, y_afw, atol=1.0e-9, rtol=0.0)
+
+                x_back, y_back = snapshot.pixelsFromFocalPlane(x_focal, y_focal, i_det,
+                                                               tanPixels=is_tan)
+                np.testing.assert_allclose(x_back, x_pix, atol=1.0e-7, rtol=0.0)
+                np.testing.assert_allclose(y_back, y_pix, atol=1.0e-7, rtol=0.0)
+
+    def test_mixed_detectors(self):
+        """
+        Test that converting a batch of points on many detectors in one
+        call gives the same answer as converting them detector-by-detector,
+        and that points with detector index -1 get NaN
+        """
+        snapshot = lsst_camera_snapshot()
+        rng = np.random.RandomState(6612)
+        n_pts = 1000
+        names = rng.choice(list(snapshot.names)+[None, 'None'], size=n_pts)
+        i_det = snapshot.getIndices(names)
+        for ii, name in enumerate(names):
+            if name is None or name == 'None':
+                self.assertEqual(i_det[ii], -1)
+            else:
+                self.assertEqual(i_det[ii], snapshot.getIndex(name))
+
+        x_in = rng.random_sample(n_pts)*600.0-300.0
+        y_in = rng.random_sample(n_pts)*600.0-300.0
+        for method in (snapshot.pixelsFromFocalPlane, snapshot.focalPlaneFromPixels,
+                       snapshot.tanPixelsFromFieldAngle, snapshot.fieldAngleFromTanPixels):
+            x_out, y_out = method(x_in, y_in, i_det)
+            for ii in range(n_pts):
+                if i_det[ii] < 0:
+                    self.assertTrue(np.isnan(x_out[ii]))
+                    self.assertTrue(np.isnan(y_out[ii]))
+                else:
+                    x_control, y_control = method(x_in[ii], y_in[ii], i_det[ii])
+                    self.assertEqual(x_out[ii], x_control)
+                    self.assertEqual(y_out[ii], y_control)
+
+    def test_write_read(self):
+        """
+        Test that a snapshot survives being written to and read from disk
+        """
+        snapshot = lsst_camera_snapshot()
+        file_name = os.path.join(self._scratch_dir, 'snapshot.npz')
+        snapshot.write(file_name)
+        test_snapshot = CameraGeometrySnapshot.read(file_name)
+        np.testing.assert_array_equal(test_snapshot.names, snapshot.names)
+        np.testing.assert_array_equal(test_snapshot.detector_types, snapshot.detector_types)
+        np.testing.assert_array_equal(test_snapshot.bbox, snapshot.bbox)
+        np.testing.assert_array_equal(test_snapshot.center_pixel, snapshot.center_pixel)
+
+        rng = np.random.RandomState(88)
+        x_focal = rng.random_sample(100)*600.0-300.0
+        y_focal = rng.random_sample(100)*600.0-300.0
+        i_det = rng.randint(0, len(snapshot.names), size=100)
+        np.testing.assert_array_equal(test_snapshot.fieldAngleFromFocalPlane(x_focal, y_focal),
+                                      snapshot.fieldAngleFromFocalPlane(x_focal, y_focal))
+        np.testing.assert_array_equal(test_snapshot.pixelsFromFocalPlane(x_focal, y_focal, i_det),
+                                      snapshot.pixelsFromFocalPlane(x_focal, y_focal, i_det))
+
+    def test_cache_key(self):
+        """
+        Test that the cached snapshot of the LSST camera is keyed on the
+        contents of the camera description files, so that a different
+        camera description is never served an old snapshot
+        """
+        cache_dir = os.path.join(self._scratch_dir, 'cache_key_test')
+        old_env = {}
+        for name in ('SIMS_COORDUTILS_CACHE_DIR', 'SIMS_COORDUTILS_LSST_SNAPSHOT'):
+            old_env[name] = os.environ.pop(name, None)
+        os.environ['SIMS_COORDUTILS_CACHE_DIR'] = cache_dir
+        true_key = _lsst_camera_key()
+        try:
+            clean_up_lsst_camera()
+            snapshot = lsst_camera_snapshot()
+            self.assertEqual(os.listdir(cache_dir),
+                             ['lsst_camera_snapshot_v%d_%s.npz' %
+                              (CameraGeometrySnapshot._format_version, true_key)])
+
+            # a changed camera description gets a snapshot file of its own
+            _lsst_camera_key._key = 'a' * len(true_key)
+            clean_up_lsst_camera()
+            test_snapshot = lsst_camera_snapshot()
+            self.assertIsNot(test_snapshot, snapshot)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            np.testing.assert_array_equal(test_snapshot.bbox, snapshot.bbox)
+        finally:
+            _lsst_camera_key._key = true_key
+            clean_up_lsst_camera()
+            for name, value in old_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -28,10 +28,12 @@ from lsst.sims.coordUtils import raDecFromPixelCoords, _raDecFromPixelCoords
 from lsst.sims.coordUtils import getCornerPixels, _getCornerRaDec, getCornerRaDec
 
 from lsst.sims.coordUtils import pupilCoordsFromFocalPlaneCoords
+from lsst.sims.coordUtils import chipNameFromChipCode, chipCodeFromChipName
+from lsst.sims.coordUtils import _group_by_chip
 from lsst.sims.coordUtils import lsst_camera
 
 from lsst.afw.geom import Point2D
-from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE
+from lsst.afw.cameraGeom import FIELD_ANGLE, FOCAL_PLANE, PIXELS, TAN_PIXELS
 
 def setup_module(module):
     lsst.utils.tests.init()
@@ -353,6 +355,103 @@ class ChipNameTest(unittest.TestCase):
         self.assertGreater(is_none, 0)
         self.assertLess(is_none, len(ra_list))
 
+    def test_agreement_with_afw(self):
+        """
+        Test that chipNameFromPupilCoords finds the same detectors
+        as afw's camera.findDetectorsList
+        """
+        rng = np.random.RandomState(77123)
+        n_pts = 2000
+        xp = rng.random_sample(n_pts)*0.004-0.002
+        yp = rng.random_sample(n_pts)*0.004-0.002
+        xp[11] = np.NaN
+        det_list = self.camera.findDetectorsList([Point2D(xx, yy)
+                                                  for xx, yy in zip(xp, yp)],
+                                                 FIELD_ANGLE)
+
+        names = chipNameFromPupilCoords(xp, yp, camera=self.camera,
+                                        allow_multiple_chips=True)
+        n_on_chip = 0
+        for name, det in zip(names, det_list):
+            if len(det) == 0:
+                self.assertIsNone(name)
+            elif len(det) == 1:
+                self.assertEqual(name, det[0].getName())
+                n_on_chip += 1
+            else:
+                self.assertEqual(name, str([dd.getName() for dd in det]))
+                n_on_chip += 1
+
+        self.assertIsNone(names[11])
+        self.assertGreater(n_on_chip, 0)
+        self.assertLess(n_on_chip, n_pts)
+
+    def test_group_by_chip(self):
+        """
+        Test that _group_by_chip finds the same points as searching
+        for each chip name or code separately
+        """
+        rng = np.random.RandomState(4418)
+        names = np.array([det.getName() for det in self.camera] + ['None'])
+        for chip_keys in (rng.choice(names, size=5000),
+                          rng.randint(-1, len(self.camera), size=5000)):
+            n_grouped = 0
+            for key, indices in _group_by_chip(chip_keys):
+                np.testing.assert_array_equal(indices, np.where(chip_keys == key)[0])
+                n_grouped += len(indices)
+            self.assertEqual(n_grouped, len(chip_keys))
+
+        self.assertEqual(len(list(_group_by_chip(np.array([], dtype=str)))), 0)
+
+    def test_chip_codes(self):
+        """
+        Test that chipNameFromPupilCoords can return chip codes, that
+        the codes map back onto the chip names, and that the pixel
+        coordinate methods accept codes in place of names
+        """
+        rng = np.random.RandomState(8812)
+        n_pts = 2000
+        xp = rng.random_sample(n_pts)*0.004-0.002
+        yp = rng.random_sample(n_pts)*0.004-0.002
+        xp[3] = np.NaN
+
+        names = chipNameFromPupilCoords(xp, yp, camera=self.camera)
+        codes = chipNameFromPupilCoords(xp, yp, camera=self.camera, as_codes=True)
+        self.assertEqual(codes.dtype, np.int16)
+        self.assertEqual(codes[3], -1)
+        self.assertGreater(len(np.where(codes >= 0)[0]), 0)
+        self.assertGreater(len(np.where(codes < 0)[0]), 1)
+        np.testing.assert_array_equal(chipNameFromChipCode(codes, self.camera), names)
+        np.testing.assert_array_equal(chipCodeFromChipName(names, self.camera), codes)
+        for ii, det in enumerate(self.camera):
+            self.assertEqual(chipCodeFromChipName(det.getName(), self.camera), ii)
+            self.assertEqual(chipNameFromChipCode(ii, self.camera), det.getName())
+
+        xpix, ypix = pixelCoordsFromPupilCoords(xp, yp, camera=self.camera)
+        xpix_test, ypix_test = pixelCoordsFromPupilCoords(xp, yp, chipName=codes,
+                                                          camera=self.camera)
+        np.testing.assert_array_equal(xpix_test, xpix)
+        np.testing.assert_array_equal(ypix_test, ypix)
+
+        valid = np.where(codes >= 0)[0]
+        xpup_test, ypup_test = pupilCoordsFromPixelCoords(xpix[valid], ypix[valid],
+                                                          chipName=codes[valid],
+                                                          camera=self.camera)
+        xpup_control, ypup_control = pupilCoordsFromPixelCoords(xpix[valid], ypix[valid],
+                                                                chipName=names[valid],
+                                                                camera=self.camera)
+        np.testing.assert_array_equal(xpup_test, xpup_control)
+        np.testing.assert_array_equal(ypup_test, ypup_control)
+
+        with self.assertRaises(RuntimeError):
+            chipCodeFromChipName('not a chip', self.camera)
+        with self.assertRaises(RuntimeError):
+            pixelCoordsFromPupilCoords(xp, yp, chipName=codes+len(self.camera),
+                                       camera=self.camera)
+        with self.assertRaises(RuntimeError):
+            chipNameFromPupilCoords(xp, yp, camera=self.camera, as_codes=True,
+                                    allow_multiple_chips=True)
+
 
 class PixelCoordTest(unittest.TestCase):
 
@@ -1065,6 +1164,33 @@ class PixelCoordTest(unittest.TestCase):
                     self.assertAlmostEqual(xx, xpx_f, 12)
                     self.assertAlmostEqual(yy, ypx_f, 12)
 
+    def testAgreementWithAfw(self):
+        """
+        Test that pixelCoordsFromPupilCoords (which converts all of the points
+        in one pass using tables of the detectors' transformations) agrees
+        with transforming the points one-by-one with afw
+        """
+        xp = radiansFromArcsec((self.rng.random_sample(1000)-0.5)*500.0)
+        yp = radiansFromArcsec((self.rng.random_sample(1000)-0.5)*500.0)
+        chip_name_list = chipNameFromPupilCoords(xp, yp, camera=self.camera)
+        self.assertGreater(len(np.unique(chip_name_list.astype(str))), 2)
+
+        field_to_focal = self.camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE)
+        for includeDistortion, pixel_sys in zip((True, False), (PIXELS, TAN_PIXELS)):
+            x_pix, y_pix = pixelCoordsFromPupilCoords(xp, yp, chipName=chip_name_list,
+                                                      camera=self.camera,
+                                                      includeDistortion=includeDistortion)
+            for ii, name in enumerate(chip_name_list):
+                if name is None:
+                    self.assertTrue(np.isnan(x_pix[ii]))
+                    self.assertTrue(np.isnan(y_pix[ii]))
+                    continue
+                focal_to_pixels = self.camera[name].getTransform(FOCAL_PLANE, pixel_sys)
+                pix_pt = focal_to_pixels.applyForward(field_to_focal.applyForward(Point2D(xp[ii],
+                                                                                          yp[ii])))
+                self.assertAlmostEqual(x_pix[ii], pix_pt.getX(), 7)
+                self.assertAlmostEqual(y_pix[ii], pix_pt.getY(), 7)
+
     def testDistortion(self):
         """
         Make sure that the results from pixelCoordsFromPupilCoords are different
@@ -1495,6 +1621,46 @@ class FocalPlaneCoordTest(unittest.TestCase):
 
         del lsst_camera._lsst_camera
 
+    def test_agreement_with_afw(self):
+        """
+        Test that focalPlaneCoordsFromPupilCoords and pupilCoordsFromFocalPlaneCoords
+        (which use a numpy representation of the FIELD_ANGLE<->FOCAL_PLANE
+        transformation) agree with afw to 1.0e-10 mm, both inside and
+        outside of the domain over which that representation was fit
+        """
+        rng = np.random.RandomState(71123)
+        n_pts = 1000
+        for camera in (self.camera, lsst_camera()):
+            field_to_focal = camera.getTransformMap().getTransform(FIELD_ANGLE, FOCAL_PLANE)
+            focal_to_field = camera.getTransformMap().getTransform(FOCAL_PLANE, FIELD_ANGLE)
+            corner_pts = focal_to_field.applyForward(list(camera.getFpBBox().getCorners()))
+            r_corner = max([np.sqrt(pt.getX()**2 + pt.getY()**2) for pt in corner_pts])
+
+            rr = 2.0*r_corner*np.sqrt(rng.random_sample(n_pts))
+            theta = rng.random_sample(n_pts)*2.0*np.pi
+            x_pup = rr*np.cos(theta)
+            y_pup = rr*np.sin(theta)
+
+            afw_pts = field_to_focal.applyForward([Point2D(xx, yy)
+                                                   for xx, yy in zip(x_pup, y_pup)])
+            x_f_afw = np.array([pt.getX() for pt in afw_pts])
+            y_f_afw = np.array([pt.getY() for pt in afw_pts])
+
+            x_f, y_f = focalPlaneCoordsFromPupilCoords(x_pup, y_pup, camera=camera)
+            self.assertLess(np.abs(x_f-x_f_afw).max(), 1.0e-10)
+            self.assertLess(np.abs(y_f-y_f_afw).max(), 1.0e-10)
+
+            # test the inverse transformation by sending it back through afw
+            x_p, y_p = pupilCoordsFromFocalPlaneCoords(x_f_afw, y_f_afw, camera=camera)
+            round_trip_pts = field_to_focal.applyForward([Point2D(xx, yy)
+                                                          for xx, yy in zip(x_p, y_p)])
+            x_f_round_trip = np.array([pt.getX() for pt in round_trip_pts])
+            y_f_round_trip = np.array([pt.getY() for pt in round_trip_pts])
+            self.assertLess(np.abs(x_f_round_trip-x_f_afw).max(), 1.0e-10)
+            self.assertLess(np.abs(y_f_round_trip-y_f_afw).max(), 1.0e-10)
+
+        del lsst_camera._lsst_camera
+
 
 class ConversionFromPixelTest(unittest.TestCase):
 
@@ -1579,6 +1745,37 @@ class ConversionFromPixelTest(unittest.TestCase):
         np.testing.assert_equal(xPupTest[5], np.NaN)
         np.testing.assert_equal(yPupTest[5], np.NaN)
 
+    def test_agreement_with_afw(self):
+        """
+        Test that pupilCoordsFromPixelCoords, which converts all of the
+        points in one pass, agrees with transforming each point with afw
+        """
+        rng = np.random.RandomState(61123)
+        n_pts = 2000
+        for camera in (self.camera, lsst_camera()):
+            focal_to_field = camera.getTransformMap().getTransform(FOCAL_PLANE, FIELD_ANGLE)
+            x_pix = rng.random_sample(n_pts)*4000.0
+            y_pix = rng.random_sample(n_pts)*4000.0
+            names = rng.choice([det.getName() for det in camera] + [None], size=n_pts)
+            names[7] = None
+            for pixel_type, include_distortion in zip((PIXELS, TAN_PIXELS), (True, False)):
+                x_pup, y_pup = pupilCoordsFromPixelCoords(x_pix, y_pix, names, camera=camera,
+                                                          includeDistortion=include_distortion)
+                self.assertTrue(np.isnan(x_pup[7]))
+                self.assertTrue(np.isnan(y_pup[7]))
+                for ii in range(n_pts):
+                    if names[ii] is None:
+                        self.assertTrue(np.isnan(x_pup[ii]))
+                        self.assertTrue(np.isnan(y_pup[ii]))
+                        continue
+                    pixels_to_focal = camera[names[ii]].getTransform(pixel_type, FOCAL_PLANE)
+                    pupil_pt = focal_to_field.applyForward(
+                        pixels_to_focal.applyForward(Point2D(x_pix[ii], y_pix[ii])))
+                    self.assertAlmostEqual(x_pup[ii], pupil_pt.getX(), 12)
+                    self.assertAlmostEqual(y_pup[ii], pupil_pt.getY(), 12)
+
+        del lsst_camera._lsst_camera
+
     def testRaDecExceptions(self):
         """
         Test that raDecFromPupilCoords raises exceptions when it is supposed to
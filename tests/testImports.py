@@ -0,0 +1,103 @@
+import unittest
+import sys
+import subprocess
+import importlib
+
+import lsst.utils.tests
+
+
+# The maximum wall-clock time (in seconds) that `import lsst.sims.coordUtils`
+# may take in a fresh interpreter.  Importing the package used to import
+# obs_lsstSim, afw.cameraGeom and palpy, which took several seconds; with
+# the lazy namespace it takes a few milliseconds on top of the interpreter
+# start up, so this leaves plenty of margin for slow machines.
+_IMPORT_TIME_BUDGET = 0.5
+
+# modules that should not be imported just by importing the package
+_HEAVY_MODULES = ('lsst.obs.lsstSim', 'lsst.daf.persistence',
+                  'lsst.afw.cameraGeom', 'palpy', 'lsst.sims.utils')
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+def _run_in_subprocess(statement):
+    """
+    Run statement in a fresh interpreter; return the time it took
+    (in seconds) and the list of heavy modules it imported.
+    """
+    script = ("import sys\n"
+              "import time\n"
+              "t_start = time.time()\n"
+              "%s\n"
+              "t_elapsed = time.time() - t_start\n"
+              "print(t_elapsed)\n"
+              "print(','.join([mm for mm in %s if mm in sys.modules]))\n"
+              % (statement, repr(_HEAVY_MODULES)))
+
+    output = subprocess.check_output([sys.executable, '-c', script])
+    lines = output.decode('utf-8').strip().split('\n')
+    t_elapsed = float(lines[-2])
+    imported = [mm for mm in lines[-1].split(',') if len(mm) > 0]
+    return t_elapsed, imported
+
+
+class LazyImportTestCase(unittest.TestCase):
+
+    def test_package_import(self):
+        """
+        Test that importing the package does not import any heavy
+        dependencies and fits within the import time budget
+        """
+        t_elapsed, imported = _run_in_subprocess("import lsst.sims.coordUtils")
+        self.assertEqual(imported, [])
+        self.assertLess(t_elapsed, _IMPORT_TIME_BUDGET)
+
+    def test_pixel_transformer_import(self):
+        """
+        Test that DMtoCameraPixelTransformer can be used without
+        importing obs_lsstSim or afw.cameraGeom
+        """
+        t_elapsed, imported = _run_in_subprocess("from lsst.sims.coordUtils "
+                                                 "import DMtoCameraPixelTransformer")
+        self.assertEqual(imported, [])
+
+    def test_camera_utils_import(self):
+        """
+        Test that the generic CameraUtils functions can be used without
+        importing obs_lsstSim
+        """
+        t_elapsed, imported = _run_in_subprocess("from lsst.sims.coordUtils "
+                                                 "import chipNameFromPupilCoords")
+        self.assertNotIn('lsst.obs.lsstSim', imported)
+
+    def test_exports(self):
+        """
+        Test that the lazy namespace knows about everything in the
+        __all__ of each sub-module, and that it exposes the contents
+        of the sub-modules (rather than the sub-modules themselves)
+        """
+        import lsst.sims.coordUtils as coordUtils
+        for submodule_name in coordUtils._submodule_exports:
+            submodule = importlib.import_module('lsst.sims.coordUtils.%s' % submodule_name)
+            self.assertEqual(sorted(submodule.__all__),
+                             sorted(coordUtils._submodule_exports[submodule_name]))
+            for name in submodule.__all__:
+                self.assertIs(getattr(coordUtils, name), getattr(submodule, name))
+                self.assertIn(name, coordUtils.__all__)
+
+        from lsst.sims.coordUtils import LsstZernikeFitter
+        self.assertIsInstance(LsstZernikeFitter, type)
+
+        with self.assertRaises(AttributeError):
+            coordUtils.not_a_function
+
+
+class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -12,12 +12,18 @@ from lsst.sims.coordUtils import (chipNameFromPupilCoords,
                                   pixelCoordsFromPupilCoords)
 from lsst.sims.coordUtils import lsst_camera
 from lsst.sims.coordUtils import focalPlaneCoordsFromPupilCoordsLSST
+from lsst.sims.coordUtils import pixelCoordsFromPupilCoordsLSST
+from lsst.sims.coordUtils import pupilCoordsFromPixelCoordsLSST
+from lsst.sims.coordUtils import cameraCoordsFromPupilCoordsLSST, cameraCoordsFromRaDecLSST
 from lsst.sims.utils import pupilCoordsFromRaDec, radiansFromArcsec
 from lsst.sims.utils import ObservationMetaData
 from lsst.obs.lsstSim import LsstSimMapper
 from lsst.sims.utils import angularSeparation
 
 from lsst.sims.coordUtils import clean_up_lsst_camera
+from lsst.sims.coordUtils.LsstCameraUtils import _findPossiblePointsLSST
+from lsst.sims.coordUtils.LsstCameraUtils import _chipNameFromFocalPlaneLSST
+from lsst.sims.coordUtils import lsst_camera_snapshot
 
 def setup_module(module):
     lsst.utils.tests.init()
@@ -105,6 +111,85 @@ class ChipNameTestCase(unittest.TestCase):
         self.assertGreater(is_none, 0)
         self.assertLess(is_none, (3*len(ra_list))//4)
 
+    def test_possible_points(self):
+        """
+        Test that the grid used to find the detectors near each point
+        gives the same candidates as testing every point against every
+        detector
+        """
+        # make sure that the focal plane map and grid have been built
+        chipNameFromPupilCoordsLSST(0.0, 0.0)
+        focal_map = chipNameFromPupilCoordsLSST._focal_map
+
+        rng = np.random.RandomState(11723)
+        n_pts = 20000
+        x_focal = rng.random_sample(n_pts)*800.0-400.0
+        y_focal = rng.random_sample(n_pts)*800.0-400.0
+        x_focal[7] = np.NaN
+        possible_points = _findPossiblePointsLSST(x_focal, y_focal)
+        self.assertEqual(len(possible_points), len(focal_map['name']))
+
+        n_candidates = 0
+        for i_chip in range(len(focal_map['name'])):
+            rrsq_lim = (1.1*focal_map['dp'][i_chip])**2
+            with np.errstate(invalid='ignore'):
+                control = np.where(((x_focal-focal_map['xx'][i_chip])**2 +
+                                    (y_focal-focal_map['yy'][i_chip])**2) < rrsq_lim)[0]
+            np.testing.assert_array_equal(possible_points[i_chip], control)
+            n_candidates += len(control)
+        self.assertGreater(n_candidates, n_pts//2)
+
+    def test_chip_raster(self):
+        """
+        Test that looking chips up in the raster of detectors gives
+        exactly the same answer as the exact search, even for points
+        on the edges of detectors
+        """
+        # make sure that the raster has been built
+        chipNameFromPupilCoordsLSST(0.0, 0.0)
+
+        snapshot = lsst_camera_snapshot()
+        rng = np.random.RandomState(5512)
+        n_pts = 20000
+        x_focal = rng.random_sample(n_pts)*700.0-350.0
+        y_focal = rng.random_sample(n_pts)*700.0-350.0
+
+        # put half of the points on the edges of random detectors
+        n_edge = n_pts//2
+        i_det = rng.randint(0, len(snapshot.names), size=n_edge)
+        bbox = snapshot.bbox[i_det]
+        on_x_edge = rng.random_sample(n_edge) < 0.5
+        x_pix = np.where(on_x_edge,
+                         np.where(rng.random_sample(n_edge) < 0.5, bbox[:, 0]-0.5, bbox[:, 2]+0.5),
+                         bbox[:, 0] + rng.random_sample(n_edge)*(bbox[:, 2]-bbox[:, 0]))
+        y_pix = np.where(on_x_edge,
+                         bbox[:, 1] + rng.random_sample(n_edge)*(bbox[:, 3]-bbox[:, 1]),
+                         np.where(rng.random_sample(n_edge) < 0.5, bbox[:, 1]-0.5, bbox[:, 3]+0.5))
+        x_focal[:n_edge], y_focal[:n_edge] = snapshot.focalPlaneFromPixels(x_pix, y_pix, i_det)
+
+        chip_raster = chipNameFromPupilCoordsLSST._chip_raster
+        self.assertGreater(len(np.where(chip_raster['code'] >= 0)[0]),
+                           10*len(np.where(chip_raster['code'] == -2)[0]))
+
+        for dtype in (np.float64, np.float32):
+            xf = x_focal.astype(dtype)
+            yf = y_focal.astype(dtype)
+            names = _chipNameFromFocalPlaneLSST(xf, yf, dtype=dtype)
+
+            # force every point through the exact search
+            exact_raster = dict(chip_raster)
+            exact_raster['code'] = np.zeros(chip_raster['code'].shape, dtype=np.int16) - 2
+            chipNameFromPupilCoordsLSST._chip_raster = exact_raster
+            try:
+                control = _chipNameFromFocalPlaneLSST(xf, yf, dtype=dtype)
+            finally:
+                chipNameFromPupilCoordsLSST._chip_raster = chip_raster
+
+            np.testing.assert_array_equal(names, control)
+            n_none = len(np.where(np.equal(names, None))[0])
+            self.assertGreater(n_none, 0)
+            self.assertLess(n_none, n_pts//2)
+
     def test_chip_name_from_ra_dec_radians(self):
         """
         test that _chipNameFromRaDecLSST agrees with _chipNameFromRaDec
@@ -559,6 +644,241 @@ class MotionTestCase(unittest.TestCase):
             self.assertLess(len(np.where(np.isnan(ypx_control))[0]), len(ypx_test)/4)
 
 
+class SinglePrecisionTestCase(unittest.TestCase):
+    """
+    Document the accuracy lost by doing the LSST camera transformations
+    with dtype=np.float32
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        clean_up_lsst_camera()
+
+    def setUp(self):
+        rng = np.random.RandomState(81123)
+        n_pts = 10000
+        rr = np.radians(1.75)*np.sqrt(rng.random_sample(n_pts))
+        theta = rng.random_sample(n_pts)*2.0*np.pi
+        self.xpup = rr*np.cos(theta)
+        self.ypup = rr*np.sin(theta)
+
+    def test_focal_plane(self):
+        """
+        Test that single precision focal plane coordinates are accurate
+        to better than 1e-4 mm
+        """
+        for band in 'ugrizy':
+            control = focalPlaneCoordsFromPupilCoordsLSST(self.xpup, self.ypup, band=band)
+            test = focalPlaneCoordsFromPupilCoordsLSST(self.xpup.astype(np.float32),
+                                                       self.ypup.astype(np.float32),
+                                                       band=band, dtype=np.float32)
+            self.assertEqual(test.dtype, np.float32)
+            self.assertLess(np.abs(test-control).max(), 1.0e-4)
+
+    def test_pixel_coords(self):
+        """
+        Test that single precision pixel coordinates are accurate to better
+        than 0.02 pixels (the typical loss is a few 1e-3 pixels), and that
+        only points at the very edges of detectors change chips
+        """
+        name_control = chipNameFromPupilCoordsLSST(self.xpup, self.ypup)
+        name_test = chipNameFromPupilCoordsLSST(self.xpup, self.ypup, dtype=np.float32)
+        different = np.where(name_control != name_test)[0]
+        self.assertLess(len(different), len(name_control)//1000+1)
+
+        xpix_control, ypix_control = pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                                                    chipName=name_control)
+        xpix_test, ypix_test = pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                                              chipName=name_control,
+                                                              dtype=np.float32)
+        self.assertEqual(xpix_test.dtype, np.float32)
+        on_chip = np.where(np.isfinite(xpix_control))
+        self.assertGreater(len(on_chip[0]), len(xpix_control)//2)
+        np.testing.assert_array_equal(np.isnan(xpix_test), np.isnan(xpix_control))
+        self.assertLess(np.abs(xpix_test[on_chip]-xpix_control[on_chip]).max(), 0.02)
+        self.assertLess(np.abs(ypix_test[on_chip]-ypix_control[on_chip]).max(), 0.02)
+
+        xpup_test, ypup_test = pupilCoordsFromPixelCoordsLSST(xpix_test[on_chip],
+                                                              ypix_test[on_chip],
+                                                              chipName=name_control[on_chip],
+                                                              dtype=np.float32)
+        self.assertEqual(xpup_test.dtype, np.float32)
+        # 0.02 pixels is 2e-4 mm or ~2e-8 radians
+        self.assertLess(np.abs(xpup_test-self.xpup[on_chip]).max(), 5.0e-8)
+        self.assertLess(np.abs(ypup_test-self.ypup[on_chip]).max(), 5.0e-8)
+
+        # TAN_PIXELS (includeDistortion=False) are also computed in single precision
+        xpix_control, ypix_control = pixelCoordsFromPupilCoords(self.xpup, self.ypup,
+                                                                chipName=name_control,
+                                                                camera=lsst_camera(),
+                                                                includeDistortion=False)
+        xpix_test, ypix_test = pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                                              chipName=name_control,
+                                                              includeDistortion=False)
+        np.testing.assert_array_equal(xpix_test, xpix_control)
+        np.testing.assert_array_equal(ypix_test, ypix_control)
+        xpix_test, ypix_test = pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                                              chipName=name_control,
+                                                              includeDistortion=False,
+                                                              dtype=np.float32)
+        self.assertEqual(xpix_test.dtype, np.float32)
+        on_chip = np.where(np.isfinite(xpix_control))
+        np.testing.assert_array_equal(np.isnan(xpix_test), np.isnan(xpix_control))
+        self.assertLess(np.abs(xpix_test[on_chip]-xpix_control[on_chip]).max(), 0.02)
+        self.assertLess(np.abs(ypix_test[on_chip]-ypix_control[on_chip]).max(), 0.02)
+
+        xpup_test, ypup_test = pupilCoordsFromPixelCoordsLSST(xpix_test[on_chip],
+                                                              ypix_test[on_chip],
+                                                              chipName=name_control[on_chip],
+                                                              includeDistortion=False,
+                                                              dtype=np.float32)
+        self.assertEqual(xpup_test.dtype, np.float32)
+        self.assertLess(np.abs(xpup_test-self.xpup[on_chip]).max(), 5.0e-8)
+        self.assertLess(np.abs(ypup_test-self.ypup[on_chip]).max(), 5.0e-8)
+
+    def test_bad_dtype(self):
+        """
+        Test that only np.float32 and np.float64 are accepted
+        """
+        for dtype in (int, np.float16, 'not a dtype'):
+            with self.assertRaises(RuntimeError):
+                focalPlaneCoordsFromPupilCoordsLSST(self.xpup, self.ypup, dtype=dtype)
+            with self.assertRaises(RuntimeError):
+                pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup, includeDistortion=False,
+                                               dtype=dtype)
+
+
+class CameraCoordsTestCase(unittest.TestCase):
+    """
+    Test that the single-pass cameraCoordsFromPupilCoordsLSST agrees with
+    the methods that compute its columns separately
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        clean_up_lsst_camera()
+
+    def setUp(self):
+        rng = np.random.RandomState(7721)
+        n_pts = 2000
+        rr = np.radians(2.0)*np.sqrt(rng.random_sample(n_pts))
+        theta = rng.random_sample(n_pts)*2.0*np.pi
+        self.xpup = rr*np.cos(theta)
+        self.ypup = rr*np.sin(theta)
+        self.xpup[5] = np.NaN
+
+    def test_columns(self):
+        """
+        Test that every column matches the corresponding method
+        """
+        for band in 'gz':
+            coords = cameraCoordsFromPupilCoordsLSST(self.xpup, self.ypup, band=band)
+            self.assertEqual(coords.dtype.names, ('xPupil', 'yPupil', 'xFocal', 'yFocal',
+                                                  'chipName', 'chipCode', 'xPix', 'yPix'))
+
+            np.testing.assert_array_equal(coords['xPupil'], self.xpup)
+            np.testing.assert_array_equal(coords['yPupil'], self.ypup)
+
+            xf, yf = focalPlaneCoordsFromPupilCoordsLSST(self.xpup, self.ypup, band=band)
+            np.testing.assert_array_equal(coords['xFocal'], xf)
+            np.testing.assert_array_equal(coords['yFocal'], yf)
+
+            names = chipNameFromPupilCoordsLSST(self.xpup, self.ypup, band=band)
+            np.testing.assert_array_equal(coords['chipName'], names)
+            self.assertIsNone(coords['chipName'][5])
+            np.testing.assert_array_equal(coords['chipCode'],
+                                          lsst_camera_snapshot().getIndices(names))
+            self.assertEqual(coords['chipCode'].dtype, np.int16)
+
+            xpix, ypix = pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup, band=band)
+            np.testing.assert_array_equal(coords['xPix'], xpix)
+            np.testing.assert_array_equal(coords['yPix'], ypix)
+            self.assertGreater(len(np.where(np.isfinite(xpix))[0]), len(xpix)//2)
+            self.assertGreater(len(np.where(np.isnan(xpix))[0]), 0)
+
+        # test scalar inputs
+        for ii in range(10):
+            coord = cameraCoordsFromPupilCoordsLSST(self.xpup[ii], self.ypup[ii], band='z')
+            self.assertEqual(coord['chipName'], coords['chipName'][ii])
+            if ii != 5:
+                self.assertEqual(coord['xFocal'], coords['xFocal'][ii])
+                self.assertEqual(coord['yPix'], coords['yPix'][ii])
+
+    def test_chip_codes(self):
+        """
+        Test that the chip name and pixel methods accept and return
+        chip codes in place of chip names
+        """
+        snapshot = lsst_camera_snapshot()
+        names = chipNameFromPupilCoordsLSST(self.xpup, self.ypup)
+        codes = chipNameFromPupilCoordsLSST(self.xpup, self.ypup, as_codes=True)
+        self.assertEqual(codes.dtype, np.int16)
+        self.assertEqual(codes[5], -1)
+        np.testing.assert_array_equal(codes, snapshot.getIndices(names))
+        self.assertEqual(chipNameFromPupilCoordsLSST(self.xpup[0], self.ypup[0],
+                                                     as_codes=True), codes[0])
+
+        xpix, ypix = pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup)
+        valid = np.where(codes >= 0)[0]
+        for chip_name in (codes, codes.astype(int)):
+            xpix_test, ypix_test = pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                                                  chipName=chip_name)
+            np.testing.assert_array_equal(xpix_test, xpix)
+            np.testing.assert_array_equal(ypix_test, ypix)
+
+        xpup_test, ypup_test = pupilCoordsFromPixelCoordsLSST(xpix[valid], ypix[valid],
+                                                              chipName=codes[valid])
+        xpup_control, ypup_control = pupilCoordsFromPixelCoordsLSST(xpix[valid], ypix[valid],
+                                                                    chipName=names[valid])
+        np.testing.assert_array_equal(xpup_test, xpup_control)
+        np.testing.assert_array_equal(ypup_test, ypup_control)
+
+        with self.assertRaises(RuntimeError):
+            pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                           chipName=np.zeros(len(self.xpup), dtype=int)-2)
+        with self.assertRaises(RuntimeError):
+            pixelCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                           chipName=len(snapshot.names))
+        with self.assertRaises(RuntimeError):
+            chipNameFromPupilCoordsLSST(self.xpup, self.ypup, as_codes=True,
+                                        allow_multiple_chips=True)
+
+    def test_column_selection(self):
+        """
+        Test that only the requested columns are returned
+        """
+        coords = cameraCoordsFromPupilCoordsLSST(self.xpup, self.ypup,
+                                                 columns=['yPix', 'chipName'],
+                                                 dtype=np.float32)
+        self.assertEqual(coords.dtype.names, ('chipName', 'yPix'))
+        self.assertEqual(coords['yPix'].dtype, np.float32)
+        control = cameraCoordsFromPupilCoordsLSST(self.xpup, self.ypup, dtype=np.float32)
+        np.testing.assert_array_equal(coords['chipName'], control['chipName'])
+        np.testing.assert_array_equal(coords['yPix'], control['yPix'])
+
+        with self.assertRaises(RuntimeError):
+            cameraCoordsFromPupilCoordsLSST(self.xpup, self.ypup, columns=['ra'])
+
+    def test_ra_dec(self):
+        """
+        Test cameraCoordsFromRaDecLSST
+        """
+        obs = ObservationMetaData(pointingRA=25.0, pointingDec=-34.0,
+                                  rotSkyPos=112.0, mjd=59580.0, bandpassName='i')
+        rng = np.random.RandomState(1188)
+        ra = 25.0 + rng.random_sample(1000)*4.0-2.0
+        dec = -34.0 + rng.random_sample(1000)*4.0-2.0
+        coords = cameraCoordsFromRaDecLSST(ra, dec, obs_metadata=obs, band='i')
+        xpup, ypup = pupilCoordsFromRaDec(ra, dec, obs_metadata=obs)
+        np.testing.assert_array_equal(coords['xPupil'], xpup)
+        np.testing.assert_array_equal(coords['yPupil'], ypup)
+        np.testing.assert_array_equal(coords['chipName'],
+                                      chipNameFromRaDecLSST(ra, dec, obs_metadata=obs, band='i'))
+        xpix, ypix = pixelCoordsFromRaDecLSST(ra, dec, obs_metadata=obs, band='i')
+        np.testing.assert_array_equal(coords['xPix'], xpix)
+        np.testing.assert_array_equal(coords['yPix'], ypix)
+
+
 class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
     pass
 
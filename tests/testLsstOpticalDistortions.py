@@ -1,5 +1,7 @@
 import unittest
 import os
+import shutil
+import tempfile
 import numpy as np
 import numbers
 import lsst.utils.tests
@@ -7,7 +9,7 @@ import lsst.utils.tests
 from lsst.utils import getPackageDir
 from lsst.afw.cameraGeom import PIXELS, FOCAL_PLANE, SCIENCE
 import lsst.geom as geom
-from lsst.sims.coordUtils import lsst_camera
+from lsst.sims.coordUtils import lsst_camera, _lsst_camera_key
 from lsst.sims.coordUtils import focalPlaneCoordsFromPupilCoordsLSST
 from lsst.sims.coordUtils import focalPlaneCoordsFromPupilCoords
 from lsst.sims.coordUtils import pupilCoordsFromFocalPlaneCoordsLSST
@@ -27,6 +29,9 @@ from lsst.sims.coordUtils import pupilCoordsFromPixelCoordsLSST
 from lsst.sims.coordUtils import raDecFromPixelCoordsLSST
 from lsst.sims.coordUtils import _raDecFromPixelCoordsLSST
 from lsst.sims.coordUtils.LsstZernikeFitter import _rawPupilCoordsFromObserved
+from lsst.sims.coordUtils.LsstZernikeFitter import _file_digest
+from lsst.sims.coordUtils import LsstZernikeFitter
+from lsst.sims.coordUtils import lsst_distortion_model
 
 from lsst.sims.coordUtils import clean_up_lsst_camera
 
@@ -1209,6 +1214,243 @@ class FullTransformationTestCase(unittest.TestCase):
         self.assertTrue(np.isnan(yf))
 
 
+class ZernikeFitTestCase(unittest.TestCase):
+
+    def test_get_coeffs(self):
+        """
+        Test that LsstZernikeFitter._get_coeffs recovers the coefficients
+        of an offset field built out of the Zernike polynomials being fit
+        """
+        fitter = LsstZernikeFitter(use_cache=False)
+        n_terms = len(fitter._n_grid)
+        rng = np.random.RandomState(44)
+        x_in = rng.random_sample(2000)*600.0-300.0
+        y_in = rng.random_sample(2000)*600.0-300.0
+        truth = rng.random_sample((2, n_terms))*0.02-0.01
+
+        design = fitter._design_matrix(x_in, y_in)
+        self.assertEqual(design.shape, (len(x_in), n_terms))
+        for ii, (n, m) in enumerate(zip(fitter._n_grid, fitter._m_grid)):
+            np.testing.assert_allclose(design[:, ii],
+                                       fitter._z_gen.evaluate_xy(x_in/fitter._rr,
+                                                                 y_in/fitter._rr, n, m),
+                                       atol=1.0e-13, rtol=0.0)
+
+        x_out = x_in + np.dot(design, truth[0])
+        y_out = y_in + np.dot(design, truth[1])
+        coeffs = fitter._get_coeffs(x_in, y_in, x_out, y_out)
+        self.assertEqual(coeffs.shape, (2, n_terms))
+        np.testing.assert_allclose(coeffs, truth, atol=1.0e-12, rtol=0.0)
+
+    def test_basis(self):
+        """
+        Test that the batched Zernike basis evaluator agrees with
+        ZernikePolynomialGenerator, both for the design matrix and
+        for dxdy/dxdy_inverse
+        """
+        fitter = LsstZernikeFitter(use_cache=False)
+        rng = np.random.RandomState(8812)
+        # use more points than _ZernikeBasis._chunk_size so that
+        # chunking is exercised
+        n_pts = 3*fitter._basis._chunk_size + 17
+        x_in = rng.random_sample(n_pts)*700.0-350.0
+        y_in = rng.random_sample(n_pts)*700.0-350.0
+        design = fitter._design_matrix(x_in, y_in)
+        for ii, (n, m) in enumerate(zip(fitter._n_grid, fitter._m_grid)):
+            control = fitter._z_gen.evaluate_xy(x_in/fitter._rr, y_in/fitter._rr, n, m)
+            np.testing.assert_allclose(design[:, ii], control, atol=1.0e-13, rtol=0.0)
+
+        for band in 'gy':
+            for transform_dict, method in zip((fitter._pupil_to_focal, fitter._focal_to_pupil),
+                                              (fitter.dxdy, fitter.dxdy_inverse)):
+                dx, dy = method(x_in, y_in, band)
+                coeffs = transform_dict[band]
+                dx_control = np.zeros(n_pts, dtype=float)
+                dy_control = np.zeros(n_pts, dtype=float)
+                for ii, (n, m) in enumerate(zip(fitter._n_grid, fitter._m_grid)):
+                    values = fitter._z_gen.evaluate_xy(x_in/fitter._rr, y_in/fitter._rr, n, m)
+                    dx_control += coeffs[0][ii]*values
+                    dy_control += coeffs[1][ii]*values
+                np.testing.assert_allclose(dx, dx_control, atol=1.0e-12, rtol=0.0)
+                np.testing.assert_allclose(dy, dy_control, atol=1.0e-12, rtol=0.0)
+
+                # test scalars
+                for ii in range(5):
+                    dx_s, dy_s = method(x_in[ii], y_in[ii], band)
+                    self.assertIsInstance(dx_s, numbers.Number)
+                    self.assertAlmostEqual(dx_s, dx[ii], 14)
+                    self.assertAlmostEqual(dy_s, dy[ii], 14)
+
+
+class SharedDistortionModelTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        clean_up_lsst_camera()
+
+    def test_shared_model(self):
+        """
+        Test that the forward and inverse LSST transformations share
+        one LsstZernikeFitter and that clean_up_lsst_camera deletes it
+        """
+        clean_up_lsst_camera()
+        self.assertFalse(hasattr(lsst_distortion_model, '_z_fitter'))
+        xmm, ymm = focalPlaneCoordsFromPupilCoordsLSST(0.001, 0.002, 'g')
+        z_fitter = lsst_distortion_model()
+        pupilCoordsFromFocalPlaneCoordsLSST(xmm, ymm, 'g')
+        chipNameFromPupilCoordsLSST(0.001, 0.002, band='g')
+        pupilCoordsFromPixelCoordsLSST(100.0, 200.0, chipName='R:2,2 S:1,1', band='g')
+        self.assertIs(lsst_distortion_model(), z_fitter)
+        self.assertEqual(list(z_fitter._pupil_to_focal.keys()), ['g'])
+
+        clean_up_lsst_camera()
+        self.assertFalse(hasattr(lsst_distortion_model, '_z_fitter'))
+        self.assertIsNot(lsst_distortion_model(), z_fitter)
+
+
+class ZernikeCacheTestCase(unittest.TestCase):
+    """
+    Test that LsstZernikeFitter can persist its fit coefficients
+    to disk and read them back
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cache_dir = tempfile.mkdtemp(prefix='zernike_cache_test_')
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.exists(cls._cache_dir):
+            shutil.rmtree(cls._cache_dir)
+        clean_up_lsst_camera()
+
+    def test_cache_round_trip(self):
+        """
+        Test that a fitter built from the cache gives the same
+        results as the fitter that wrote the cache
+        """
+        fitter_fit = LsstZernikeFitter(cache_dir=self._cache_dir)
+        fitter_cached = LsstZernikeFitter(cache_dir=self._cache_dir)
+
+        rng = np.random.RandomState(88123)
+        xmm = rng.random_sample(100)*600.0-300.0
+        ymm = rng.random_sample(100)*600.0-300.0
+        for band in 'ugrizy':
+            dx_fit, dy_fit = fitter_fit.dxdy(xmm, ymm, band)
+            cache_name = fitter_fit._cache_file_name(band)
+            self.assertTrue(os.path.exists(cache_name))
+            self.assertEqual(os.path.dirname(cache_name), self._cache_dir)
+            self.assertEqual(fitter_cached._cache_file_name(band), cache_name)
+
+            dx_cached, dy_cached = fitter_cached.dxdy(xmm, ymm, band)
+            np.testing.assert_array_equal(dx_fit, dx_cached)
+            np.testing.assert_array_equal(dy_fit, dy_cached)
+
+            dx_fit, dy_fit = fitter_fit.dxdy_inverse(xmm, ymm, band)
+            dx_cached, dy_cached = fitter_cached.dxdy_inverse(xmm, ymm, band)
+            np.testing.assert_array_equal(dx_fit, dx_cached)
+            np.testing.assert_array_equal(dy_fit, dy_cached)
+
+        # the cached fitter should not have needed to read
+        # in the camera to fit the coefficients
+        self.assertFalse(hasattr(fitter_cached, '_camera'))
+
+    def test_stale_entries(self):
+        """
+        Test that the cache is keyed on the camera description, and that
+        writing the cache for a band removes the files cached for that
+        band under other keys
+        """
+        cache_dir = os.path.join(self._cache_dir, 'stale_test')
+        os.makedirs(cache_dir)
+        stale_names = ['LsstZernikeFitter_g_%s.npz' % ('0'*40),
+                       'LsstZernikeFitter_r_%s.npz' % ('0'*40)]
+        for name in stale_names:
+            with open(os.path.join(cache_dir, name), 'w') as file_handle:
+                file_handle.write('stale')
+
+        fitter = LsstZernikeFitter(cache_dir=cache_dir)
+        fitter.dxdy(1.0, 2.0, 'g')
+        cache_name = fitter._cache_file_name('g')
+        self.assertEqual(sorted(os.listdir(cache_dir)),
+                         sorted([os.path.basename(cache_name), stale_names[1]]))
+
+        true_key = _lsst_camera_key()
+        try:
+            _lsst_camera_key._key = 'a'*len(true_key)
+            self.assertNotEqual(fitter._cache_file_name('g'), cache_name)
+        finally:
+            _lsst_camera_key._key = true_key
+        self.assertEqual(fitter._cache_file_name('g'), cache_name)
+
+    def test_input_digest(self):
+        """
+        Test that the cache key depends on the contents of the input
+        files, not on their size and modification time
+        """
+        digest_dir = os.path.join(self._cache_dir, 'digest_test')
+        os.makedirs(digest_dir)
+        file_name = os.path.join(digest_dir, 'input.txt')
+        with open(file_name, 'w') as file_handle:
+            file_handle.write('1 2 3 4\n')
+        stat = os.stat(file_name)
+        digest = _file_digest(file_name)
+
+        # a copy (with a different modification time) has the same digest
+        copy_name = os.path.join(digest_dir, 'copy.txt')
+        shutil.copy(file_name, copy_name)
+        os.utime(copy_name, ns=(stat.st_atime_ns, stat.st_mtime_ns+1000000000))
+        self.assertEqual(_file_digest(copy_name), digest)
+
+        # different contents with the same size and modification time
+        # (e.g. restored with cp -p) have a different digest once the
+        # process has forgotten the old one
+        with open(file_name, 'w') as file_handle:
+            file_handle.write('5 6 7 8\n')
+        os.utime(file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(os.stat(file_name).st_size, stat.st_size)
+        del _file_digest._cache
+        self.assertNotEqual(_file_digest(file_name), digest)
+        self.assertEqual(_file_digest(copy_name), digest)
+
+    def test_no_cache(self):
+        """
+        Test that use_cache=False does not write a cache file
+        """
+        no_cache_dir = os.path.join(self._cache_dir, 'no_cache')
+        fitter = LsstZernikeFitter(cache_dir=no_cache_dir, use_cache=False)
+        fitter.dxdy(1.0, 2.0, 'g')
+        self.assertIsNone(fitter._cache_file_name('g'))
+        self.assertFalse(os.path.exists(no_cache_dir))
+
+    def test_lazy_bands(self):
+        """
+        Test that bands are only fit when they are requested
+        and that the result does not depend on the order in which
+        bands are requested
+        """
+        fitter = LsstZernikeFitter(use_cache=False)
+        self.assertEqual(len(fitter._pupil_to_focal), 0)
+        self.assertEqual(len(fitter._focal_to_pupil), 0)
+
+        rng = np.random.RandomState(7712)
+        xmm = rng.random_sample(100)*600.0-300.0
+        ymm = rng.random_sample(100)*600.0-300.0
+
+        dx_r, dy_r = fitter.dxdy(xmm, ymm, 'r')
+        self.assertEqual(list(fitter._pupil_to_focal.keys()), ['r'])
+        self.assertEqual(list(fitter._focal_to_pupil.keys()), ['r'])
+
+        fitter.dxdy_inverse(xmm, ymm, 4)
+        self.assertEqual(sorted(fitter._pupil_to_focal.keys()), ['r', 'z'])
+
+        control_fitter = LsstZernikeFitter(use_cache=False)
+        for band in 'ugizy':
+            control_fitter.dxdy(xmm, ymm, band)
+        dx_control, dy_control = control_fitter.dxdy(xmm, ymm, 'r')
+        np.testing.assert_array_equal(dx_r, dx_control)
+        np.testing.assert_array_equal(dy_r, dy_control)
+
+
 class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
     pass
 
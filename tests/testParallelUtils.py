@@ -0,0 +1,204 @@
+import unittest
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import lsst.utils.tests
+from lsst.utils import getPackageDir
+from lsst.sims.utils import ObservationMetaData
+from lsst.sims.coordUtils.utils import ReturnCamera
+from lsst.sims.coordUtils import chipNameFromRaDec, pixelCoordsFromRaDec
+from lsst.sims.coordUtils import raDecFromPixelCoords
+from lsst.sims.coordUtils import chipNameFromRaDecLSST, pixelCoordsFromRaDecLSST
+from lsst.sims.coordUtils import raDecFromPixelCoordsLSST, cameraCoordsFromRaDecLSST
+from lsst.sims.coordUtils import clean_up_lsst_camera
+from lsst.sims.coordUtils import _run_in_chunks
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class ParallelTestCase(unittest.TestCase):
+    """
+    Test that splitting the objects among workers gives results identical
+    to converting all of them in the calling thread
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cameraDir = getPackageDir('sims_coordUtils')
+        cameraDir = os.path.join(cameraDir, 'tests', 'cameraData')
+        cls.camera = ReturnCamera(cameraDir)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.camera
+        clean_up_lsst_camera()
+
+    def setUp(self):
+        self.rng = np.random.RandomState(66134)
+        self.obs = ObservationMetaData(pointingRA=112.1, pointingDec=-34.1,
+                                       rotSkyPos=45.0, mjd=59580.0, bandpassName='r')
+
+    def random_ra_dec(self, n_obj, radius):
+        rr = self.rng.random_sample(n_obj)*radius
+        theta = self.rng.random_sample(n_obj)*2.0*np.pi
+        ra = self.obs.pointingRA + rr*np.cos(theta)
+        dec = self.obs.pointingDec + rr*np.sin(theta)
+        return ra, dec
+
+    def test_generic(self):
+        """
+        Test the methods that take an arbitrary camera
+        """
+        ra, dec = self.random_ra_dec(1001, 0.1)
+        names = chipNameFromRaDec(ra, dec, obs_metadata=self.obs, camera=self.camera)
+        xpix, ypix = pixelCoordsFromRaDec(ra, dec, obs_metadata=self.obs, camera=self.camera)
+        ra_back, dec_back = raDecFromPixelCoords(xpix, ypix, names, obs_metadata=self.obs,
+                                                 camera=self.camera)
+        self.assertGreater(len(np.where(np.equal(names, None))[0]), 0)
+        self.assertGreater(len(np.where(np.not_equal(names, None))[0]), 0)
+
+        for workers in (1, 3, 8):
+            np.testing.assert_array_equal(chipNameFromRaDec(ra, dec, obs_metadata=self.obs,
+                                                            camera=self.camera,
+                                                            workers=workers),
+                                          names)
+            np.testing.assert_array_equal(pixelCoordsFromRaDec(ra, dec, obs_metadata=self.obs,
+                                                               camera=self.camera,
+                                                               workers=workers),
+                                          [xpix, ypix])
+            np.testing.assert_array_equal(raDecFromPixelCoords(xpix, ypix, names,
+                                                               obs_metadata=self.obs,
+                                                               camera=self.camera,
+                                                               workers=workers),
+                                          [ra_back, dec_back])
+
+        # chipName given as a single value
+        xpix, ypix = pixelCoordsFromRaDec(ra, dec, obs_metadata=self.obs, camera=self.camera,
+                                          chipName=names[2])
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            np.testing.assert_array_equal(pixelCoordsFromRaDec(ra, dec, obs_metadata=self.obs,
+                                                               camera=self.camera,
+                                                               chipName=names[2],
+                                                               executor=executor),
+                                          [xpix, ypix])
+
+    def test_lsst(self):
+        """
+        Test the methods specific to the LSST camera, on both a thread
+        pool and a process pool
+        """
+        ra, dec = self.random_ra_dec(2001, 1.75)
+        names = chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs)
+        codes = chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs, as_codes=True)
+        xpix, ypix = pixelCoordsFromRaDecLSST(ra, dec, obs_metadata=self.obs)
+        ra_back, dec_back = raDecFromPixelCoordsLSST(xpix, ypix, names, obs_metadata=self.obs)
+        coords = cameraCoordsFromRaDecLSST(ra, dec, obs_metadata=self.obs)
+
+        with ThreadPoolExecutor(max_workers=4) as thread_pool, \
+             ProcessPoolExecutor(max_workers=2) as process_pool:
+
+            for kwargs in ({'workers': 5}, {'executor': thread_pool},
+                           {'executor': process_pool}):
+
+                np.testing.assert_array_equal(chipNameFromRaDecLSST(ra, dec,
+                                                                    obs_metadata=self.obs,
+                                                                    **kwargs),
+                                              names)
+                test_codes = chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs,
+                                                   as_codes=True, **kwargs)
+                self.assertEqual(test_codes.dtype, np.int16)
+                np.testing.assert_array_equal(test_codes, codes)
+                np.testing.assert_array_equal(pixelCoordsFromRaDecLSST(ra, dec,
+                                                                       obs_metadata=self.obs,
+                                                                       **kwargs),
+                                              [xpix, ypix])
+                np.testing.assert_array_equal(raDecFromPixelCoordsLSST(xpix, ypix, names,
+                                                                       obs_metadata=self.obs,
+                                                                       **kwargs),
+                                              [ra_back, dec_back])
+                test_coords = cameraCoordsFromRaDecLSST(ra, dec, obs_metadata=self.obs,
+                                                        **kwargs)
+                self.assertEqual(test_coords.dtype, coords.dtype)
+                for col in coords.dtype.names:
+                    np.testing.assert_array_equal(test_coords[col], coords[col])
+
+        # scalar inputs
+        self.assertEqual(chipNameFromRaDecLSST(ra[3], dec[3], obs_metadata=self.obs,
+                                               workers=4), names[3])
+
+    def test_chunking(self):
+        """
+        Test that the points are split among the workers of an executor
+        (or into workers chunks, if both are given), and that the chunks
+        still waiting to run are cancelled if one of them fails
+        """
+        chunk_sizes = []
+
+        def method(xx, scale=1.0):
+            chunk_sizes.append(len(xx))
+            if xx[0] < 0.0:
+                raise ValueError("negative chunk")
+            time.sleep(0.01)
+            return np.array([xx*scale, xx])
+
+        xx = np.arange(1200.0)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            result = _run_in_chunks(method, dict(xx=xx), dict(scale=2.0), executor=executor)
+            np.testing.assert_array_equal(result, [2.0*xx, xx])
+            self.assertEqual(chunk_sizes, [400]*3)
+
+            del chunk_sizes[:]
+            result = _run_in_chunks(method, dict(xx=xx), dict(scale=2.0), workers=6,
+                                    executor=executor)
+            np.testing.assert_array_equal(result, [2.0*xx, xx])
+            self.assertEqual(chunk_sizes, [200]*6)
+
+        # a single-worker executor still gets some of the work
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            del chunk_sizes[:]
+            _run_in_chunks(method, dict(xx=xx), {}, executor=executor)
+            self.assertEqual(chunk_sizes, [600]*2)
+
+            del chunk_sizes[:]
+            xx[100] = -1.0
+            with self.assertRaises(ValueError):
+                _run_in_chunks(method, dict(xx=xx), {}, workers=12, executor=executor)
+            # the first chunk, the failing chunk and (at most) the chunk
+            # the worker picked up before the others were cancelled
+            self.assertLessEqual(len(chunk_sizes), 3)
+
+    def test_exceptions(self):
+        """
+        Test that bad values of workers raise exceptions
+        """
+        ra, dec = self.random_ra_dec(100, 1.0)
+        with self.assertRaises(RuntimeError):
+            chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs, workers=0)
+        with self.assertRaises(RuntimeError):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs, workers=-2,
+                                      executor=executor)
+
+        # workers and executor together
+        names = chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            np.testing.assert_array_equal(chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs,
+                                                                workers=4, executor=executor),
+                                          names)
+
+        # inconsistent inputs are still caught
+        with self.assertRaises(RuntimeError):
+            chipNameFromRaDecLSST(ra, dec[:10], obs_metadata=self.obs, workers=2)
+
+
+class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
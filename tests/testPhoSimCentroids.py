@@ -0,0 +1,146 @@
+import unittest
+import os
+import shutil
+import tempfile
+import warnings
+import numpy as np
+
+import lsst.utils.tests
+from lsst.utils import getPackageDir
+from lsst.sims.coordUtils import readPhoSimCentroidFile
+from lsst.sims.coordUtils import readPhoSimCentroids
+from lsst.sims.coordUtils import consolidatePhoSimCentroids
+from lsst.sims.coordUtils import loadPhoSimCentroids
+from lsst.sims.coordUtils import LsstZernikeFitter
+from lsst.sims.coordUtils import clean_up_lsst_camera
+import lsst.sims.coordUtils.PhoSimCentroids as PhoSimCentroids
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class PhoSimCentroidTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._phosim_dir = os.path.join(getPackageDir('sims_data'),
+                                       'FocalPlaneData', 'PhoSimData')
+        cls._scratch_dir = tempfile.mkdtemp(prefix='phosim_centroid_test_')
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.exists(cls._scratch_dir):
+            shutil.rmtree(cls._scratch_dir)
+        clean_up_lsst_camera()
+
+    def test_read_file(self):
+        """
+        Test that readPhoSimCentroidFile agrees with np.genfromtxt
+        """
+        phosim_dtype = np.dtype([('id', int), ('phot', float),
+                                 ('xpix', float), ('ypix', float)])
+        for i_filter in (0, 5):
+            file_name = os.path.join(self._phosim_dir,
+                                     'centroid_lsst_e_2_f%d_R22_S11_E000.txt' % i_filter)
+            control = np.genfromtxt(file_name, dtype=phosim_dtype, skip_header=1)
+            test = readPhoSimCentroidFile(file_name)
+            for column in ('id', 'phot', 'xpix', 'ypix'):
+                np.testing.assert_array_equal(test[column], control[column])
+
+    def test_bad_file(self):
+        """
+        Test that a file with the wrong number of columns raises an exception
+        """
+        file_name = os.path.join(self._scratch_dir, 'bad_centroid.txt')
+        with open(file_name, 'w') as output_file:
+            output_file.write('SourceID Photons AvgX AvgY\n')
+            output_file.write('1 200 1000.0 1000.0\n')
+            output_file.write('2 200 1000.0\n')
+        with self.assertRaises(RuntimeError):
+            readPhoSimCentroidFile(file_name)
+
+    def test_consolidated(self):
+        """
+        Test that the data memory-mapped from the consolidated file
+        is the same as the data read from the text files, and that
+        LsstZernikeFitter gets the same fit from either
+        """
+        cache_dir = os.path.join(self._scratch_dir, 'consolidated')
+        file_name = consolidatePhoSimCentroids(self._phosim_dir, cache_dir=cache_dir)
+        self.assertTrue(os.path.exists(file_name))
+        self.assertEqual(os.path.dirname(file_name), cache_dir)
+
+        for i_filter in range(6):
+            control = readPhoSimCentroids(self._phosim_dir, i_filter, n_threads=1)
+            test = loadPhoSimCentroids(self._phosim_dir, i_filter, cache_dir=cache_dir)
+            self.assertEqual(sorted(test.keys()), sorted(control.keys()))
+            for det_name in control:
+                for column in ('id', 'phot', 'xpix', 'ypix'):
+                    self.assertIsInstance(test[det_name][column], np.memmap)
+                    np.testing.assert_array_equal(test[det_name][column],
+                                                  control[det_name][column])
+
+        rng = np.random.RandomState(8812)
+        xmm = rng.random_sample(100)*600.0-300.0
+        ymm = rng.random_sample(100)*600.0-300.0
+        fitter_control = LsstZernikeFitter(use_cache=False)
+        fitter_test = LsstZernikeFitter(cache_dir=cache_dir)
+        for band in 'gi':
+            np.testing.assert_array_equal(fitter_test.dxdy(xmm, ymm, band),
+                                          fitter_control.dxdy(xmm, ymm, band))
+            np.testing.assert_array_equal(fitter_test.dxdy_inverse(xmm, ymm, band),
+                                          fitter_control.dxdy_inverse(xmm, ymm, band))
+
+    def test_stale_consolidated(self):
+        """
+        Test that loadPhoSimCentroids warns about a consolidated file that
+        is out of date, and that consolidatePhoSimCentroids replaces it
+        """
+        phosim_dir = os.path.join(self._scratch_dir, 'stale_phosim')
+        cache_dir = os.path.join(self._scratch_dir, 'stale_cache')
+        os.makedirs(phosim_dir)
+        for name in sorted(os.listdir(self._phosim_dir)):
+            if name.startswith('centroid_lsst_e_2_f2_R22'):
+                shutil.copy(os.path.join(self._phosim_dir, name), phosim_dir)
+        copied = sorted(os.listdir(phosim_dir))
+        self.assertGreater(len(copied), 0)
+
+        file_name = consolidatePhoSimCentroids(phosim_dir, cache_dir=cache_dir)
+        with warnings.catch_warnings(record=True) as warning_list:
+            warnings.simplefilter('always')
+            data = loadPhoSimCentroids(phosim_dir, 2, cache_dir=cache_dir)
+        self.assertEqual(len(warning_list), 0)
+        det_name = sorted(data.keys())[0]
+        self.assertIsInstance(data[det_name]['xpix'], np.memmap)
+
+        # touching one of the centroid files makes the consolidated file stale
+        stat = os.stat(os.path.join(phosim_dir, copied[0]))
+        os.utime(os.path.join(phosim_dir, copied[0]),
+                 ns=(stat.st_atime_ns, stat.st_mtime_ns+1000000000))
+        # the key of the centroid files is computed once per process
+        with warnings.catch_warnings(record=True) as warning_list:
+            warnings.simplefilter('always')
+            data = loadPhoSimCentroids(phosim_dir, 2, cache_dir=cache_dir)
+        self.assertEqual(len(warning_list), 0)
+        self.assertIsInstance(data[det_name]['xpix'], np.memmap)
+        del PhoSimCentroids._centroid_files_key._cache
+        with warnings.catch_warnings(record=True) as warning_list:
+            warnings.simplefilter('always')
+            data = loadPhoSimCentroids(phosim_dir, 2, cache_dir=cache_dir)
+        self.assertEqual(len(warning_list), 1)
+        self.assertIn(file_name, str(warning_list[0].message))
+        self.assertNotIsInstance(data[det_name]['xpix'], np.memmap)
+
+        new_file_name = consolidatePhoSimCentroids(phosim_dir, cache_dir=cache_dir)
+        self.assertNotEqual(new_file_name, file_name)
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(new_file_name)])
+
+
+class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -4,6 +4,7 @@ import numpy as np
 import lsst.utils.tests
 from lsst.sims.coordUtils import DMtoCameraPixelTransformer
 from lsst.sims.coordUtils import lsst_camera
+from lsst.sims.coordUtils import chipCodeFromChipName
 from lsst.sims.coordUtils import pupilCoordsFromPixelCoords
 from lsst.afw.cameraGeom import FOCAL_PLANE, PIXELS
 
@@ -58,6 +59,44 @@ class PixelTransformerTestCase(unittest.TestCase):
         del camera_wrapper
         del lsst_camera._lsst_camera
 
+    def test_mixed_chips(self):
+        """
+        Test that converting points on many different chips in one call
+        gives the same answer as converting them chip-by-chip, and that
+        chip codes can be used in place of chip names
+        """
+        camera_wrapper = DMtoCameraPixelTransformer()
+        rng = np.random.RandomState(8812)
+        camera = lsst_camera()
+        npts = 2000
+        names = rng.choice([det.getName() for det in camera] + [None], size=npts)
+        names[11] = None
+        x_in = rng.random_sample(npts)*4000.0
+        y_in = rng.random_sample(npts)*4000.0
+
+        cam_x, cam_y = camera_wrapper.cameraPixFromDMPix(x_in, y_in, names)
+        dm_x, dm_y = camera_wrapper.dmPixFromCameraPix(x_in, y_in, list(names))
+        for ix, name in enumerate(names):
+            if name is None:
+                self.assertTrue(np.isnan(cam_x[ix]))
+                self.assertTrue(np.isnan(dm_y[ix]))
+                continue
+            x_control, y_control = camera_wrapper.cameraPixFromDMPix(x_in[ix], y_in[ix], name)
+            self.assertEqual(cam_x[ix], x_control)
+            self.assertEqual(cam_y[ix], y_control)
+            x_control, y_control = camera_wrapper.dmPixFromCameraPix(x_in[ix], y_in[ix], name)
+            self.assertEqual(dm_x[ix], x_control)
+            self.assertEqual(dm_y[ix], y_control)
+
+        codes = chipCodeFromChipName(names, camera)
+        np.testing.assert_array_equal(camera_wrapper.cameraPixFromDMPix(x_in, y_in, codes),
+                                      (cam_x, cam_y))
+        np.testing.assert_array_equal(camera_wrapper.dmPixFromCameraPix(x_in, y_in, codes),
+                                      (dm_x, dm_y))
+
+        del camera_wrapper
+        del lsst_camera._lsst_camera
+
 
 class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
     pass
@@ -0,0 +1,358 @@
+import unittest
+import os
+import shutil
+import tempfile
+import tracemalloc
+import numpy as np
+
+import lsst.utils.tests
+from lsst.utils import getPackageDir
+from lsst.sims.utils import ObservationMetaData
+from lsst.sims.coordUtils.utils import ReturnCamera
+from lsst.sims.coordUtils import streamConversion
+from lsst.sims.coordUtils import pixelCoordsFromRaDec, raDecFromPixelCoords
+from lsst.sims.coordUtils import chipNameFromRaDecLSST, pixelCoordsFromRaDecLSST
+from lsst.sims.coordUtils import cameraCoordsFromRaDecLSST, raDecFromPixelCoordsLSST
+from lsst.sims.coordUtils import chipNameFromRaDec
+from lsst.sims.coordUtils import clean_up_lsst_camera
+import lsst.sims.coordUtils.StreamingUtils as StreamingUtils
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class StreamConversionTestCase(unittest.TestCase):
+    """
+    Test that converting a catalog chunk-by-chunk with streamConversion
+    gives the same results as converting it all at once
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cameraDir = getPackageDir('sims_coordUtils')
+        cameraDir = os.path.join(cameraDir, 'tests', 'cameraData')
+        cls.camera = ReturnCamera(cameraDir)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.camera
+        clean_up_lsst_camera()
+
+    def setUp(self):
+        rng = np.random.RandomState(11823)
+        self.obs = ObservationMetaData(pointingRA=25.0, pointingDec=-34.0,
+                                       rotSkyPos=112.0, mjd=59580.0, bandpassName='r')
+        n_obj = 3000
+        rr = rng.random_sample(n_obj)*1.75
+        theta = rng.random_sample(n_obj)*2.0*np.pi
+        self.catalog = np.zeros(n_obj, dtype=[('ra', float), ('dec', float),
+                                              ('pm_ra', float), ('pm_dec', float)])
+        self.catalog['ra'] = self.obs.pointingRA + rr*np.cos(theta)
+        self.catalog['dec'] = self.obs.pointingDec + rr*np.sin(theta)
+        self.catalog['pm_ra'] = rng.random_sample(n_obj)*0.1
+        self.catalog['pm_dec'] = rng.random_sample(n_obj)*0.1
+
+    def read_chunks(self, chunk_size):
+        """
+        Mimic reading the catalog from a file or a database cursor
+        """
+        for i_start in range(0, len(self.catalog), chunk_size):
+            yield self.catalog[i_start:i_start+chunk_size]
+
+    def test_lsst(self):
+        """
+        Test the LSST pipeline with structured array, dict and tuple chunks
+        """
+        names = chipNameFromRaDecLSST(self.catalog['ra'], self.catalog['dec'],
+                                      pm_ra=self.catalog['pm_ra'],
+                                      pm_dec=self.catalog['pm_dec'],
+                                      obs_metadata=self.obs)
+        streamed = list(streamConversion(chipNameFromRaDecLSST, self.read_chunks(700),
+                                         obs_metadata=self.obs))
+        self.assertEqual(len(streamed), 5)
+        np.testing.assert_array_equal(np.concatenate(streamed), names)
+
+        xpix, ypix = pixelCoordsFromRaDecLSST(self.catalog['ra'], self.catalog['dec'],
+                                              obs_metadata=self.obs, band='g')
+        chunks = [(self.catalog['ra'][:1000], self.catalog['dec'][:1000]),
+                  {'ra': self.catalog['ra'][1000:], 'dec': self.catalog['dec'][1000:]}]
+        streamed = list(streamConversion(pixelCoordsFromRaDecLSST, iter(chunks),
+                                         obs_metadata=self.obs, band='g'))
+        self.assertEqual(len(streamed), 2)
+        np.testing.assert_array_equal(np.concatenate(streamed, axis=1), [xpix, ypix])
+
+        coords = cameraCoordsFromRaDecLSST(self.catalog['ra'], self.catalog['dec'],
+                                           pm_ra=self.catalog['pm_ra'],
+                                           pm_dec=self.catalog['pm_dec'],
+                                           obs_metadata=self.obs)
+        streamed = np.concatenate(list(streamConversion(cameraCoordsFromRaDecLSST,
+                                                        self.read_chunks(2000),
+                                                        obs_metadata=self.obs)))
+        for col in coords.dtype.names:
+            np.testing.assert_array_equal(streamed[col], coords[col])
+
+    def test_max_chunk_bytes(self):
+        """
+        Test that chunks which are too big for max_chunk_bytes are split
+        """
+        xpix, ypix = pixelCoordsFromRaDec(self.catalog['ra'], self.catalog['dec'],
+                                          obs_metadata=self.obs, camera=self.camera,
+                                          chipName='Det22')
+        names = np.array(['Det22']*len(xpix))
+        ra, dec = raDecFromPixelCoords(xpix, ypix, names, obs_metadata=self.obs,
+                                       camera=self.camera)
+
+        max_chunk_bytes = 400*StreamingUtils._working_bytes_per_object
+        streamed = list(streamConversion(raDecFromPixelCoords,
+                                         [(xpix[:1000], ypix[:1000], names[:1000]),
+                                          (xpix[1000:], ypix[1000:], 'Det22')],
+                                         max_chunk_bytes=max_chunk_bytes,
+                                         obs_metadata=self.obs, camera=self.camera))
+        self.assertEqual([chunk.shape[1] for chunk in streamed],
+                         [400, 400, 200] + [400]*5)
+        np.testing.assert_array_equal(np.concatenate(streamed, axis=1), [ra, dec])
+
+        # chunks whose first column is a list, or which only contain lists
+        streamed = list(streamConversion(raDecFromPixelCoords,
+                                         [{'chipName': list(names[:1000]),
+                                           'xPix': xpix[:1000], 'yPix': ypix[:1000]},
+                                          (list(xpix[1000:]), list(ypix[1000:]),
+                                           list(names[1000:]))],
+                                         max_chunk_bytes=max_chunk_bytes,
+                                         obs_metadata=self.obs, camera=self.camera))
+        self.assertEqual([chunk.shape[1] for chunk in streamed],
+                         [400, 400, 200] + [400]*5)
+        np.testing.assert_array_equal(np.concatenate(streamed, axis=1), [ra, dec])
+
+        with self.assertRaises(RuntimeError):
+            list(streamConversion(raDecFromPixelCoords, [(xpix, ypix, names)],
+                                  max_chunk_bytes=0, camera=self.camera))
+
+        with self.assertRaises(RuntimeError):
+            list(streamConversion(raDecFromPixelCoords, [xpix], camera=self.camera))
+
+    def measure_bytes_per_object(self, method, *args, **kwargs):
+        """
+        Return the peak memory (in bytes) traced by tracemalloc while
+        calling method(*args, **kwargs), divided by the number of objects
+        """
+        # build the camera, the distortion model, etc. before measuring
+        n_obj = len(args[0])
+        method(*[arg[:10] for arg in args],
+               **dict((name, value[:10] if isinstance(value, np.ndarray) and
+                       len(value) == n_obj else value)
+                      for name, value in kwargs.items()))
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            result = method(*args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        del result
+        return (peak - baseline)/n_obj
+
+    def test_working_set(self):
+        """
+        Measure the memory that the LSST and generic pipelines need per
+        object and test that it is within _working_bytes_per_object (the
+        estimate with which streamConversion and the out= buffers size chunks)
+        """
+        rng = np.random.RandomState(7713)
+        n_obj = 100000
+        rr = rng.random_sample(n_obj)*1.75
+        theta = rng.random_sample(n_obj)*2.0*np.pi
+        ra = self.obs.pointingRA + rr*np.cos(theta)
+        dec = self.obs.pointingDec + rr*np.sin(theta)
+        pm_ra = rng.random_sample(n_obj)*0.1
+        pm_dec = rng.random_sample(n_obj)*0.1
+        xpix, ypix = pixelCoordsFromRaDecLSST(ra, dec, obs_metadata=self.obs)
+        names = chipNameFromRaDecLSST(ra, dec, obs_metadata=self.obs)
+        on_chip = np.where(np.logical_not(np.equal(names, None)))
+        xpix = xpix[on_chip]
+        ypix = ypix[on_chip]
+        names = names[on_chip]
+
+        measured = {}
+        measured['chipNameFromRaDecLSST'] = \
+            self.measure_bytes_per_object(chipNameFromRaDecLSST, ra, dec, pm_ra=pm_ra,
+                                          pm_dec=pm_dec, obs_metadata=self.obs)
+        measured['pixelCoordsFromRaDecLSST'] = \
+            self.measure_bytes_per_object(pixelCoordsFromRaDecLSST, ra, dec, pm_ra=pm_ra,
+                                          pm_dec=pm_dec, obs_metadata=self.obs)
+        measured['cameraCoordsFromRaDecLSST'] = \
+            self.measure_bytes_per_object(cameraCoordsFromRaDecLSST, ra, dec, pm_ra=pm_ra,
+                                          pm_dec=pm_dec, obs_metadata=self.obs)
+        measured['raDecFromPixelCoordsLSST'] = \
+            self.measure_bytes_per_object(raDecFromPixelCoordsLSST, xpix, ypix, names,
+                                          obs_metadata=self.obs)
+
+        # the generic pipelines, with the camera of the unit tests
+        xpix, ypix = pixelCoordsFromRaDec(ra, dec, obs_metadata=self.obs, camera=self.camera,
+                                          chipName='Det22')
+        names = np.array(['Det22']*n_obj)
+        measured['chipNameFromRaDec'] = \
+            self.measure_bytes_per_object(chipNameFromRaDec, ra, dec, pm_ra=pm_ra,
+                                          pm_dec=pm_dec, obs_metadata=self.obs,
+                                          camera=self.camera)
+        measured['pixelCoordsFromRaDec'] = \
+            self.measure_bytes_per_object(pixelCoordsFromRaDec, ra, dec, pm_ra=pm_ra,
+                                          pm_dec=pm_dec, obs_metadata=self.obs,
+                                          camera=self.camera)
+        measured['raDecFromPixelCoords'] = \
+            self.measure_bytes_per_object(raDecFromPixelCoords, xpix, ypix, names,
+                                          obs_metadata=self.obs, camera=self.camera)
+
+        for name, bytes_per_object in measured.items():
+            self.assertLessEqual(bytes_per_object, StreamingUtils._working_bytes_per_object,
+                                 msg='%s needs %.0f bytes per object' % (name, bytes_per_object))
+
+        # so the peak memory of a stream of large chunks is bounded by max_chunk_bytes
+        max_chunk_bytes = 5000*StreamingUtils._working_bytes_per_object
+        chunks = [(ra[i_start:i_start+25000], dec[i_start:i_start+25000])
+                  for i_start in range(0, n_obj, 25000)]
+        pixelCoordsFromRaDecLSST(ra[:10], dec[:10], obs_metadata=self.obs)
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            n_streamed = 0
+            for chunk in streamConversion(pixelCoordsFromRaDecLSST, chunks,
+                                          max_chunk_bytes=max_chunk_bytes,
+                                          obs_metadata=self.obs):
+                n_streamed += chunk.shape[1]
+                del chunk
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(n_streamed, n_obj)
+        self.assertLessEqual(peak - baseline, max_chunk_bytes)
+
+
+class OutputBufferTestCase(unittest.TestCase):
+    """
+    Test that writing the output of the conversion methods into
+    preallocated buffers (out=) gives the same results as returning it
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cameraDir = getPackageDir('sims_coordUtils')
+        cameraDir = os.path.join(cameraDir, 'tests', 'cameraData')
+        cls.camera = ReturnCamera(cameraDir)
+        cls._scratch_dir = tempfile.mkdtemp(prefix='output_buffer_test_')
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.camera
+        clean_up_lsst_camera()
+        if os.path.exists(cls._scratch_dir):
+            shutil.rmtree(cls._scratch_dir)
+
+    def setUp(self):
+        rng = np.random.RandomState(8812)
+        self.obs = ObservationMetaData(pointingRA=25.0, pointingDec=-34.0,
+                                       rotSkyPos=112.0, mjd=59580.0, bandpassName='r')
+        n_obj = 2500
+        rr = rng.random_sample(n_obj)*1.75
+        theta = rng.random_sample(n_obj)*2.0*np.pi
+        self.catalog = np.zeros(n_obj, dtype=[('ra', float), ('dec', float),
+                                              ('xPix', float), ('yPix', float),
+                                              ('chipName', object), ('chipCode', np.int16)])
+        self.catalog['ra'] = self.obs.pointingRA + rr*np.cos(theta)
+        self.catalog['dec'] = self.obs.pointingDec + rr*np.sin(theta)
+
+    def test_structured_array(self):
+        """
+        Test writing into the fields of a structured array (in chunks much
+        smaller than the catalog)
+        """
+        cat = self.catalog
+        names = chipNameFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs)
+        xpix, ypix = pixelCoordsFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs)
+        coords = cameraCoordsFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs,
+                                           columns=['xPix', 'chipCode'])
+
+        chunk_bytes = StreamingUtils._default_max_chunk_bytes
+        StreamingUtils._default_max_chunk_bytes = 300*StreamingUtils._working_bytes_per_object
+        try:
+            out = chipNameFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs,
+                                        out=cat['chipName'])
+            self.assertIs(out.base, cat)
+            np.testing.assert_array_equal(cat['chipName'], names)
+
+            pixelCoordsFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs,
+                                     out=(cat['xPix'], cat['yPix']))
+            np.testing.assert_array_equal(cat['xPix'], xpix)
+            np.testing.assert_array_equal(cat['yPix'], ypix)
+
+            cat['xPix'] = 0.0
+            cameraCoordsFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs,
+                                      columns=['xPix', 'chipCode'], out=cat)
+            np.testing.assert_array_equal(cat['xPix'], coords['xPix'])
+            np.testing.assert_array_equal(cat['chipCode'], coords['chipCode'])
+
+            # a (2, N) buffer, with the conversion also split among workers
+            ra_dec = np.zeros((2, len(cat)), dtype=float)
+            out = raDecFromPixelCoordsLSST(xpix, ypix, names, obs_metadata=self.obs,
+                                           workers=3, out=ra_dec)
+            self.assertIs(out, ra_dec)
+            np.testing.assert_array_equal(ra_dec,
+                                          raDecFromPixelCoordsLSST(xpix, ypix, names,
+                                                                   obs_metadata=self.obs))
+        finally:
+            StreamingUtils._default_max_chunk_bytes = chunk_bytes
+
+    def test_memmap(self):
+        """
+        Test annotating a catalog stored on disk in place
+        """
+        file_name = os.path.join(self._scratch_dir, 'catalog.dat')
+        on_disk = np.memmap(file_name, dtype=self.catalog.dtype.descr[:4], mode='w+',
+                            shape=self.catalog.shape)
+        on_disk['ra'] = self.catalog['ra']
+        on_disk['dec'] = self.catalog['dec']
+        on_disk.flush()
+        del on_disk
+
+        on_disk = np.memmap(file_name, dtype=self.catalog.dtype.descr[:4], mode='r+',
+                            shape=self.catalog.shape)
+        pixelCoordsFromRaDec(on_disk['ra'], on_disk['dec'], obs_metadata=self.obs,
+                             camera=self.camera, out=(on_disk['xPix'], on_disk['yPix']))
+        on_disk.flush()
+        del on_disk
+
+        on_disk = np.memmap(file_name, dtype=self.catalog.dtype.descr[:4], mode='r',
+                            shape=self.catalog.shape)
+        xpix, ypix = pixelCoordsFromRaDec(self.catalog['ra'], self.catalog['dec'],
+                                          obs_metadata=self.obs, camera=self.camera)
+        np.testing.assert_array_equal(on_disk['xPix'], xpix)
+        np.testing.assert_array_equal(on_disk['yPix'], ypix)
+        del on_disk
+
+    def test_exceptions(self):
+        """
+        Test that buffers which cannot hold the output raise exceptions
+        """
+        cat = self.catalog
+        with self.assertRaises(RuntimeError):
+            pixelCoordsFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs,
+                                     out=cat['xPix'])
+        with self.assertRaises(RuntimeError):
+            pixelCoordsFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs,
+                                     out=np.zeros((2, len(cat)-1)))
+        with self.assertRaises(RuntimeError):
+            cameraCoordsFromRaDecLSST(cat['ra'], cat['dec'], obs_metadata=self.obs,
+                                      columns=['xFocal'], out=cat)
+        with self.assertRaises(RuntimeError):
+            chipNameFromRaDec(cat['ra'][0], cat['dec'][0], obs_metadata=self.obs,
+                              camera=self.camera, out=cat['chipName'][:1])
+
+
+class MemoryTestClass(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()